@@ -8,7 +8,7 @@ import platform
 from maya import mel
 from pathlib import Path
 
-from robotools import robotools_utils
+from robotools import command_registry, robotools_utils
 
 
 def maya_useNewAPI():
@@ -33,6 +33,22 @@ class RobotoolsShelfInitializeCmd(om.MPxCommand):
         raise Exception('Plugin not supposed to be invoked - only loaded or unloaded.')
 
 
+def registry_command_creator(name: str):
+    """
+    Creator for a Maya command running a registered Robotools command
+    @param name:
+    @return:
+    """
+    class RobotoolsRegistryCmd(om.MPxCommand):
+        def __init__(self):
+            om.MPxCommand.__init__(self)
+
+        def doIt(self, args):
+            command_registry.run_command(name)
+
+    return RobotoolsRegistryCmd
+
+
 def initializePlugin(plugin):
     """
     Initialize the plug-in
@@ -45,20 +61,23 @@ def initializePlugin(plugin):
     try:
         robotools_utils.setup_robotools_shelf()
         logging.info('>>>> Initializing Robotools Shelf')
-        hotkey_manager = robotools_utils.RobotoolsHotkeyManager()
+        applied = robotools_utils.RobotoolsHotkeyManager().init_hotkeys()
 
-        if hotkey_manager.exists:
-            logging.info('>>>> Hotkeys imported')
-            hotkey_manager.import_set()
+        if applied:
+            logging.info('>>>> Hotkeys applied: {}'.format(', '.join(applied)))
         else:
-            logging.info('>>>> Hotkey preferences file created')
-            hotkey_manager.init_hotkeys()
-            hotkey_manager.export_set()
+            logging.info('>>>> Hotkeys up to date')
 
         pluginFn.registerCommand(RobotoolsShelfInitializeCmd.kPluginCmdName, RobotoolsShelfInitializeCmd.cmdCreator)
     except RuntimeError:
         raise RuntimeError('Failed to register command: %s\n' % RobotoolsShelfInitializeCmd.kPluginCmdName)
 
+    for name in command_registry.REGISTRY.names:
+        try:
+            pluginFn.registerCommand(name, registry_command_creator(name))
+        except RuntimeError:
+            raise RuntimeError('Failed to register command: %s\n' % name)
+
 
 def uninitializePlugin(plugin):
     """
@@ -68,7 +87,7 @@ def uninitializePlugin(plugin):
     pluginFn = om.MFnPlugin(plugin)
 
     try:
-        from robotools import robotools_utils
+        from robotools import command_registry, robotools_utils
 
         logging.info('>>>> Deleting Robotools Shelf')
         robotools_utils.delete_robotools_shelf()
@@ -78,3 +97,9 @@ def uninitializePlugin(plugin):
         pluginFn.deregisterCommand(RobotoolsShelfInitializeCmd.kPluginCmdName)
     except RuntimeError:
         raise RuntimeError('Failed to unregister command: %s\n' % RobotoolsShelfInitializeCmd.kPluginCmdName)
+
+    for name in command_registry.REGISTRY.names:
+        try:
+            pluginFn.deregisterCommand(name)
+        except RuntimeError:
+            raise RuntimeError('Failed to unregister command: %s\n' % name)
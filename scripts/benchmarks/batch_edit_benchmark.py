@@ -0,0 +1,88 @@
+"""
+Time multi-step Robotools edits with and without BatchEdit
+
+Needs Maya. Each function runs on a fresh scene of poly cubes, once with batches enabled and once with
+BatchEdit.enabled switched off so every command records its own undo step and refresh.
+Run with mayapy from the scripts directory:
+    mayapy -m benchmarks.batch_edit_benchmark
+"""
+import time
+
+import maya.standalone
+
+maya.standalone.initialize(name='python')
+
+import pymel.core as pm  # noqa: E402
+
+from typing import Callable, Dict, List  # noqa: E402
+
+from robotools import geometry_utils, node_utils  # noqa: E402
+from robotools.node_utils import BatchEdit  # noqa: E402
+
+
+def create_cubes(count: int) -> List[pm.nodetypes.Transform]:
+    """
+    A grid of offset, rotated and scaled cubes
+    @param count:
+    @return:
+    """
+    cubes = []
+    for index in range(count):
+        cube = pm.polyCube(subdivisionsX=2, subdivisionsY=2, subdivisionsZ=2)[0]
+        pm.xform(cube, translation=(index % 32 * 3, index // 32 * 3, 1), rotation=(index % 90, 0, 0),
+                 scale=(1, 1 + index % 3, 1))
+        cubes.append(cube)
+    return cubes
+
+
+def super_reset(cubes):
+    node_utils.super_reset(cubes)
+
+
+def mirror_geometry(cubes):
+    geometry_utils.mirror_geometry(cubes)
+
+
+def combine(cubes):
+    geometry_utils.combine(cubes)
+
+
+def relax_vertices(cubes):
+    geometry_utils.relax_vertices(cubes)
+
+
+def duplicate_between(cubes):
+    pm.select(cubes[0], cubes[-1])
+    node_utils.duplicate_between(len(cubes))
+
+
+def time_function(function: Callable, count: int, batched: bool) -> float:
+    pm.newFile(force=True)
+    cubes = create_cubes(count)
+    pm.flushUndo()
+    BatchEdit.enabled = batched
+    start = time.perf_counter()
+    try:
+        function(cubes)
+    finally:
+        BatchEdit.enabled = True
+    return time.perf_counter() - start
+
+
+def run(count: int = 1000):
+    pm.undoInfo(state=True, infinity=True)
+    functions = (super_reset, mirror_geometry, combine, relax_vertices, duplicate_between)
+    results: Dict[str, tuple] = {}
+    for function in functions:
+        results[function.__name__] = (time_function(function, count, batched=False),
+                                      time_function(function, count, batched=True))
+
+    print(f'{count} objects')
+    print(f'    {"function":<22}{"plain s":>10}{"batched s":>12}{"speed-up":>10}')
+    for name, (plain, batched) in results.items():
+        print(f'    {name:<22}{plain:>10.3f}{batched:>12.3f}{plain / batched:>9.2f}x')
+
+
+if __name__ == '__main__':
+    run()
+    maya.standalone.uninitialize()
@@ -0,0 +1,70 @@
+"""
+Time range-compressed component decoding/encoding against per-index expansion
+
+The per-index path mirrors pm.ls(flatten=True) followed by .index(): one string and one parse per index.
+Run from the scripts directory:
+    python -m benchmarks.component_strings_benchmark
+"""
+import random
+import re
+import timeit
+
+from typing import List
+
+from core.component_strings import decode_component_strings, encode_component_strings
+
+INDEX_PATTERN = re.compile(r'\[(\d+)\]$')
+
+
+def build_selection(count: int, run_length: int = 5000, seed: int = 0) -> List[str]:
+    """
+    Compact component strings covering roughly count indices in runs
+    @param count:
+    @param run_length:
+    @param seed:
+    @return:
+    """
+    rng = random.Random(seed)
+    strings = []
+    start = 0
+    while start < count:
+        length = rng.randint(1, run_length)
+        stop = min(start + length, count) - 1
+        strings.append(f'mesh.vtx[{start}:{stop}]' if stop > start else f'mesh.vtx[{start}]')
+        start = stop + 1 + rng.randint(1, 10)
+    return strings
+
+
+def flatten_indices(strings: List[str]) -> List[int]:
+    """
+    Per-index reference path: expand every range into its own string, then parse each one
+    @param strings:
+    @return:
+    """
+    flattened = []
+    for text in strings:
+        node, indices = text.split('[', 1)
+        bounds = [int(x) for x in indices[:-1].split(':')]
+        flattened.extend(f'{node}[{i}]' for i in range(bounds[0], bounds[-1] + 1))
+    return [int(INDEX_PATTERN.search(x).group(1)) for x in flattened]
+
+
+def run(count: int = 500000, repeat: int = 3):
+    strings = build_selection(count)
+    indices = decode_component_strings(strings)
+    assert indices.tolist() == flatten_indices(strings)
+    timings = {
+        'per-index decode': min(timeit.repeat(lambda: flatten_indices(strings), number=1, repeat=repeat)),
+        'range decode': min(timeit.repeat(lambda: decode_component_strings(strings), number=1, repeat=repeat)),
+        'per-index encode': min(timeit.repeat(lambda: [f'mesh.vtx[{i}]' for i in indices.tolist()],
+                                              number=1, repeat=repeat)),
+        'range encode': min(timeit.repeat(lambda: encode_component_strings('mesh', 'vtx', indices),
+                                          number=1, repeat=repeat)),
+    }
+    print(f'{len(indices)} indices in {len(strings)} component strings')
+    for label, seconds in timings.items():
+        print(f'{label:<18}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,77 @@
+"""
+Check and time planning a single pass split of face sets headless
+
+Checks plan_face_split, FaceSplitPlan.labels and group_faces_by_label on a small mesh and on random overlapping
+sets: labelling the working faces and grouping them by label must give back every set exactly, then times a plan
+for many sets on a large mesh.
+Run from the scripts directory:
+    python -m benchmarks.face_extraction_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from core.face_extraction import group_faces_by_label, plan_face_split
+
+
+def split_sets(face_count: int, face_sets) -> list:
+    """
+    Source faces of each piece the plan produces, as the split in geometry_utils lays them out
+    @param face_count:
+    @param face_sets:
+    @return: sorted source faces per set
+    """
+    plan = plan_face_split(face_count, face_sets)
+    # working faces, then the chipped off copies appended in set order
+    sources = np.concatenate([plan.extracted] + [plan.extracted[x] for x in plan.copies])
+    groups = group_faces_by_label(plan.labels())
+    assert sorted(groups) == list(range(plan.set_count))
+    assert np.array_equal(np.sort(np.concatenate([plan.remainder, plan.extracted])), np.arange(face_count))
+    return [np.sort(sources[groups[i]]).tolist() for i in range(plan.set_count)]
+
+
+def check():
+    plan = plan_face_split(6, [[1, 0], [4, 1, 2, 2], [5]])
+    assert plan.remainder.tolist() == [3]
+    assert plan.extracted.tolist() == [0, 1, 2, 4, 5]
+    assert plan.owners.tolist() == [0, 0, 1, 1, 2]
+    assert [x.tolist() for x in plan.copies] == [[], [1], []]
+    assert plan.labels().tolist() == [0, 0, 1, 1, 2, 1]
+    assert split_sets(6, [[1, 0], [4, 1, 2, 2], [5]]) == [[0, 1], [1, 2, 4], [5]]
+
+    # sets covering every face leave no remainder
+    plan = plan_face_split(4, [[0, 1], [2, 3]])
+    assert plan.remainder.size == 0 and plan.labels().tolist() == [0, 0, 1, 1]
+
+    groups = group_faces_by_label([2, 0, 2, 1, 0])
+    assert {k: v.tolist() for k, v in groups.items()} == {0: [1, 4], 1: [3], 2: [0, 2]}
+    assert group_faces_by_label([]) == {}
+
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        face_count = int(rng.integers(1, 200))
+        face_sets = [rng.choice(face_count, size=int(rng.integers(1, face_count + 1)), replace=True)
+                     for _ in range(int(rng.integers(1, 6)))]
+        assert split_sets(face_count, face_sets) == [sorted(set(x.tolist())) for x in face_sets]
+    print('face split plans check out')
+
+
+def run(face_count: int = 1_000_000, set_count: int = 64, repeat: int = 5):
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, set_count, face_count)
+    face_sets = list(group_faces_by_label(labels).values())
+    face_sets[0] = np.concatenate([face_sets[0], face_sets[1][:1000]])
+    timings = {
+        'group faces by label': lambda: group_faces_by_label(labels),
+        'plan face split': lambda: plan_face_split(face_count, face_sets),
+        'plan labels': lambda: plan_face_split(face_count, face_sets).labels(),
+    }
+    print(f'{face_count} faces in {set_count} sets')
+    for label, function in timings.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+        print(f'    {label:<24}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    check()
+    run()
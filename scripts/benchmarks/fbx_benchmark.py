@@ -0,0 +1,60 @@
+"""
+Time the streaming FBX reader against the shipped base character models
+
+Reports the header-only walk (lazy, no payloads read) and a full geometry/hierarchy read.
+Run from the scripts directory:
+    python -m benchmarks.fbx_benchmark
+"""
+import timeit
+
+from pathlib import Path
+
+from core.fbx_reader import FbxReader
+
+MODELS_FOLDER: Path = Path(__file__).resolve().parents[2].joinpath('models')
+
+
+def walk_headers(path: Path) -> int:
+    """
+    Visit every node record without parsing properties
+    @param path:
+    @return: record count
+    """
+    with FbxReader(path) as reader:
+        stack = list(reader.nodes)
+        count = 0
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.iter_children())
+        return count
+
+
+def read_geometry(path: Path) -> dict:
+    """
+    Read meshes and hierarchy
+    @param path:
+    @return:
+    """
+    with FbxReader(path) as reader:
+        return {'meshes': reader.model_meshes(), 'hierarchy': reader.hierarchy(), 'version': reader.version}
+
+
+def run(repeat: int = 5):
+    for path in sorted(MODELS_FOLDER.glob('*.fbx')):
+        result = read_geometry(path)
+        print(f'{path.name} (FBX {result["version"]}, {path.stat().st_size / 1024:.0f} KB)')
+        for name, mesh in result['meshes'].items():
+            print(f'    {name}: {mesh.vertex_count} vertices, {mesh.face_count} faces, '
+                  f'{0 if mesh.uvs is None else len(mesh.uvs)} uvs')
+        timings = {
+            f'header walk ({walk_headers(path)} records)': min(timeit.repeat(
+                lambda: walk_headers(path), number=1, repeat=repeat)),
+            'geometry + hierarchy': min(timeit.repeat(lambda: read_geometry(path), number=1, repeat=repeat)),
+        }
+        for label, seconds in timings.items():
+            print(f'    {label:<32}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
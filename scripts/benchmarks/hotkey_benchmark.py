@@ -0,0 +1,97 @@
+"""
+Count the Maya commands issued when the Robotools hotkeys are set up
+
+Compares the rebuild in the previous update_robotools, which bound every hotkey and exported the set, with the
+digest-gated HotkeyManager.apply on a fake hotkey set scripted into the Maya stub.
+Run from the scripts directory:
+    python -m benchmarks.hotkey_benchmark
+"""
+from benchmarks import maya_stub
+
+maya_stub.install()
+
+import tempfile  # noqa: E402
+
+from dataclasses import replace  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Dict, Tuple  # noqa: E402
+
+from robotools.utils.hotkey_utils import HotkeyDefinition, HotkeyManager  # noqa: E402
+
+
+class FakeHotkeySets:
+    """Hotkey sets and bindings answering the commands HotkeyManager issues"""
+
+    def __init__(self):
+        self.sets: Dict[str, Dict[Tuple, str]] = {}
+        self.current = None
+
+    def install(self):
+        maya_stub.LOG.respond('pymel.core.hotkeySet', self.hotkey_set)
+        maya_stub.LOG.respond('pymel.core.hotkey', self.hotkey)
+        maya_stub.LOG.respond('pymel.core.nameCommand', lambda *args, **kwargs: None)
+        maya_stub.LOG.respond('pymel.core.warning', lambda *args, **kwargs: None)
+
+    def hotkey_set(self, name=None, exists=False, edit=False, source=None, current=False, delete=False, export=None,
+                   ip=None):
+        if exists:
+            return name in self.sets
+        if delete:
+            self.sets.pop(name)
+        elif export:
+            Path(export).write_text(name)
+        elif ip:
+            self.sets[Path(ip).read_text()] = {}
+        elif current:
+            self.current = name
+        elif not edit:
+            self.sets[name] = {}
+
+    def hotkey(self, keyShortcut, altModifier, ctrlModifier, commandModifier, name, releaseName=None):
+        self.sets[self.current][(keyShortcut, altModifier, ctrlModifier, commandModifier)] = name
+
+
+def build_table(count: int):
+    return [HotkeyDefinition(f'tool{index}', annotation=f'Tool {index}', mel_command=f'Tool{index}',
+                             key=chr(ord('A') + index % 26), alt=bool(index // 26 % 2), ctrl=bool(index // 52 % 2),
+                             cmd=bool(index // 104 % 2)) for index in range(count)]
+
+
+def legacy_update(path: Path, table):
+    """The previous update_robotools: delete the exported set and bind every hotkey"""
+    path.unlink(missing_ok=True)
+    manager = HotkeyManager('Benchmark', path)
+    for x in table:
+        manager.set_hotkey(x.name, annotation=x.annotation, key=x.key, mel_command=x.mel_command, alt=x.alt,
+                           ctrl=x.ctrl, cmd=x.cmd, overwrite=True)
+    manager.export_set()
+
+
+def count_commands(function, *args) -> int:
+    maya_stub.LOG.reset()
+    function(*args)
+    return maya_stub.LOG.total
+
+
+def run(count: int = 100):
+    FakeHotkeySets().install()
+    table = build_table(count)
+    changed = list(table)
+    changed[-1] = replace(changed[-1], mel_command='Changed')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir).joinpath('Benchmark.mhk')
+        results = {
+            'legacy update': count_commands(legacy_update, path, table),
+            'first apply': count_commands(lambda: HotkeyManager('Benchmark', path).apply(table, force=True)),
+            'unchanged': count_commands(lambda: HotkeyManager('Benchmark', path).apply(table)),
+            'one hotkey changed': count_commands(lambda: HotkeyManager('Benchmark', path).apply(changed)),
+            'one hotkey removed': count_commands(lambda: HotkeyManager('Benchmark', path).apply(changed[:-1])),
+        }
+    print(f'{count} hotkeys')
+    for label, commands in results.items():
+        print(f'    {label:<22}{commands:>8} commands')
+
+
+if __name__ == '__main__':
+    run()
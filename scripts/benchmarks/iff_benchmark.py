@@ -0,0 +1,44 @@
+"""
+Time the Maya binary chunk scanner against the shipped base character scenes
+
+Run from the scripts directory:
+    python -m benchmarks.iff_benchmark
+"""
+import timeit
+
+from pathlib import Path
+
+from core.iff_scanner import IffScanner, scan_scene
+
+SCENES_FOLDER: Path = Path(__file__).resolve().parents[2].joinpath('scenes')
+
+
+def count_chunks(path: Path) -> int:
+    """
+    Visit every chunk header in the file
+    @param path:
+    @return:
+    """
+    with IffScanner(path) as scanner:
+        return sum(1 for _ in scanner.walk())
+
+
+def run(repeat: int = 10):
+    for path in sorted(SCENES_FOLDER.glob('*.mb')):
+        info = scan_scene(path)
+        print(f'{path.name} (Maya {info.version}, {path.stat().st_size / 1024:.0f} KB)')
+        print(f'    plug-ins: {info.plug_ins}')
+        print(f'    references: {info.references}')
+        print(f'    {info.node_count} nodes: {info.node_type_counts}')
+        print(f'    by IFF tag: {info.node_tag_counts}')
+        timings = {
+            f'full chunk walk ({count_chunks(path)} chunks)': min(timeit.repeat(
+                lambda: count_chunks(path), number=1, repeat=repeat)),
+            'scan_scene': min(timeit.repeat(lambda: scan_scene(path), number=1, repeat=repeat)),
+        }
+        for label, seconds in timings.items():
+            print(f'    {label:<32}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,61 @@
+"""
+Report the import cost of robotools modules under the stand-in Maya modules
+
+Each module is imported into a fresh module cache so the figures include its robotools/core dependencies. Every
+Maya command issued at import is counted and charged a simulated latency, which is where real import time went.
+Run from the scripts directory:
+    python -m benchmarks.import_benchmark
+"""
+import importlib
+import sys
+import time
+
+from benchmarks import maya_stub
+
+MODULES = (
+    'robotools.material_utils',
+    'robotools.plug_in_utils',
+    'robotools.module_utils',
+    'robotools.maya_tools',
+    'robotools.widgets.maya_widget',
+    'robotools.utils.shelf_manager',
+    'robotools.utils.tool_caddy',
+    'robotools.robotools_utils',
+)
+
+
+def clear_modules():
+    for name in [x for x in sys.modules if x.split('.')[0] in ('robotools', 'core')]:
+        del sys.modules[name]
+
+
+def import_cost(module_name: str, latency: float):
+    """
+    Import a module from scratch
+    @param module_name:
+    @param latency: seconds charged per Maya command
+    @return: seconds, commands issued
+    """
+    clear_modules()
+    maya_stub.LOG.reset()
+    start = time.perf_counter()
+    importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    return elapsed + maya_stub.LOG.total * latency, dict(maya_stub.LOG.counts)
+
+
+def run(latency: float = 0.005):
+    maya_stub.install()
+    # warm the stub and stdlib imports so the first module is not charged for them
+    import_cost(MODULES[0], latency)
+    print(f'simulated latency per Maya command: {latency * 1000:.1f} ms')
+    for module_name in MODULES:
+        seconds, commands = import_cost(module_name, latency)
+        issued = ', '.join(f'{k}: {v}' for k, v in sorted(commands.items())) or 'none'
+        print(f'{module_name:<36}{seconds * 1000:>9.2f} ms    commands at import: {issued}')
+    clear_modules()
+    maya_stub.uninstall()
+
+
+if __name__ == '__main__':
+    run()
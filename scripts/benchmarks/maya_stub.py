@@ -0,0 +1,180 @@
+"""
+Stand-in Maya, PyMEL and Qt modules for headless benchmarks
+
+Installing the stub makes 'import pymel.core as pm' and friends resolve to modules whose every
+attribute is a stub class. Calling a stub records the call in LOG and returns either a scripted
+response or a stub instance, so robotools modules can be imported and exercised outside Maya
+while counting the commands they issue.
+"""
+import importlib.abc
+import importlib.machinery
+import sys
+import types
+
+from collections import Counter
+from typing import Any, Callable, Dict
+
+STUB_ROOTS = ('pymel', 'maya', 'PySide2', 'shiboken2', 'pyperclip')
+_MISSING = object()
+
+
+class CommandLog:
+    """Counts stub calls by dotted path and serves scripted responses"""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.responses: Dict[str, Any] = {}
+
+    def record(self, path: str):
+        self.counts[path] += 1
+
+    def respond(self, path: str, response: Any):
+        """
+        Script the return value of a stub command
+        @param path: dotted path, e.g. 'pymel.core.ls'
+        @param response: a value, or a callable receiving the call arguments
+        """
+        self.responses[path] = response
+
+    def reset(self, responses: bool = False):
+        self.counts.clear()
+        if responses:
+            self.responses.clear()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> str:
+        return ', '.join(f'{path.split(".")[-1]}: {count}' for path, count in sorted(self.counts.items()))
+
+
+LOG = CommandLog()
+_STUB_CLASSES: Dict[str, type] = {}
+
+
+class _StubMeta(type):
+    def __getattr__(cls, item):
+        if item.startswith('__'):
+            raise AttributeError(item)
+        return stub_class(f'{cls._stub_path}.{item}')
+
+    def __add__(cls, other):
+        # enum arithmetic such as Qt.UserRole + 1 or Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return stub_class(f'{cls._stub_path}+{getattr(other, "_stub_path", other)}')
+
+    def __or__(cls, other):
+        return stub_class(f'{cls._stub_path}|{getattr(other, "_stub_path", other)}')
+
+    def __call__(cls, *args, **kwargs):
+        if '_stub_path' not in cls.__dict__:
+            # a real class deriving from a stub, e.g. a widget subclassing QWidget
+            return super().__call__(*args, **kwargs)
+        LOG.record(cls._stub_path)
+        response = LOG.responses.get(cls._stub_path, _MISSING)
+        if response is not _MISSING:
+            return response(*args, **kwargs) if callable(response) else response
+        return super().__call__()
+
+
+class StubObject(metaclass=_StubMeta):
+    _stub_path = 'stub'
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, item):
+        if item.startswith('__'):
+            raise AttributeError(item)
+        return stub_class(f'{type(self)._stub_path}.{item}')
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __int__(self):
+        return 0
+
+    def __index__(self):
+        return 0
+
+    def __float__(self):
+        return 0.0
+
+    def __str__(self):
+        return type(self)._stub_path
+
+    def __fspath__(self):
+        return type(self)._stub_path
+
+    def __getitem__(self, item):
+        return self
+
+
+def stub_class(path: str) -> type:
+    """
+    Get the stub class for a dotted path, the same class is returned for the same path
+    @param path:
+    @return:
+    """
+    if path not in _STUB_CLASSES:
+        _STUB_CLASSES[path] = _StubMeta(path.split('.')[-1], (StubObject,), {'_stub_path': path})
+    return _STUB_CLASSES[path]
+
+
+class StubModule(types.ModuleType):
+    def __getattr__(self, item):
+        if item.startswith('__'):
+            raise AttributeError(item)
+        return stub_class(f'{self.__name__}.{item}')
+
+
+class _StubLoader(importlib.abc.Loader):
+    def create_module(self, spec):
+        module = StubModule(spec.name)
+        module.__path__ = []
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+class _StubFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split('.')[0] in STUB_ROOTS:
+            return importlib.machinery.ModuleSpec(fullname, _StubLoader(), is_package=True)
+        return None
+
+
+_FINDER = _StubFinder()
+
+
+def install():
+    """
+    Route imports of Maya, PyMEL and Qt modules to stubs
+    """
+    if _FINDER not in sys.meta_path:
+        sys.meta_path.insert(0, _FINDER)
+
+
+def uninstall():
+    """
+    Remove the stub finder and any stub modules already imported
+    """
+    if _FINDER in sys.meta_path:
+        sys.meta_path.remove(_FINDER)
+    for name in [x for x in sys.modules if x.split('.')[0] in STUB_ROOTS]:
+        del sys.modules[name]
+
+
+def count_calls(function: Callable, *args, **kwargs) -> Counter:
+    """
+    Run a function and return the stub commands it issued
+    @param function:
+    @return:
+    """
+    LOG.reset()
+    function(*args, **kwargs)
+    return Counter(LOG.counts)
@@ -0,0 +1,86 @@
+"""
+Time mesh cache hits against reading the FBX for the shipped base character models
+
+Checks layer expansion for Direct and IndexToDirect layers and ByEdge smoothing on a synthetic mesh first.
+The cache is written to a temporary directory. Run from the scripts directory:
+    python -m benchmarks.mesh_cache_benchmark
+"""
+import tempfile
+import timeit
+import numpy as np
+
+from pathlib import Path
+
+from core.fbx_reader import FbxError, FbxMesh
+from core.mesh_cache import MaterialSpec, MeshCache, mesh_arrays_from_fbx, read_fbx_meshes
+
+MODELS_FOLDER: Path = Path(__file__).resolve().parents[2].joinpath('models')
+
+
+def check():
+    # two triangles sharing an edge, normals IndexToDirect per face-vertex, uvs Direct per vertex
+    mesh = FbxMesh(id=1, name='', vertices=np.zeros((4, 3)), face_counts=np.array([3, 3]),
+                   face_connects=np.array([0, 1, 2, 2, 1, 3]),
+                   normals=np.array([[0, 0, 1], [0, 1, 0]], dtype=np.float64),
+                   normal_indices=np.array([0, 0, 0, 1, 1, 1]), normal_mapping='ByPolygonVertex',
+                   normal_reference='IndexToDirect', uvs=np.arange(8, dtype=np.float64).reshape(4, 2),
+                   uv_indices=None, uv_mapping='ByVertice', uv_reference='Direct', uv_set='st0',
+                   material_indices=np.array([1, 0]), material_mapping='ByPolygon',
+                   edges=np.array([0, 1, 2, 4, 5]), smoothing=np.array([1, 0, 1, 1, 0]), smoothing_mapping='ByEdge',
+                   smoothing_reference='Direct')
+    materials = [MaterialSpec('red', color=(1.0, 0.0, 0.0)), MaterialSpec('blue', color=(0.0, 0.0, 1.0))]
+    arrays = mesh_arrays_from_fbx(mesh, 'triangles', materials)
+    assert arrays.normal_ids.tolist() == [0, 0, 0, 1, 1, 1]
+    assert arrays.uv_ids.tolist() == [0, 1, 2, 2, 1, 3]
+    assert arrays.material_ids.tolist() == [1, 0]
+    # the shared edge 1-2 and the edge 3-2 are hard
+    assert arrays.hard_edge_slots.tolist() == [1, 5]
+    mesh.smoothing_mapping = 'ByPolygon'
+    try:
+        mesh_arrays_from_fbx(mesh)
+    except FbxError:
+        pass
+    else:
+        raise AssertionError('smoothing groups were accepted')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir).joinpath('triangles.fbx')
+        source.write_bytes(b'triangles')
+        cache = MeshCache(Path(temp_dir).joinpath('cache'))
+        cache.write(source, [arrays])
+        cached = cache.read(source)[0]
+        assert cached.uv_set == 'st0' and cached.materials == materials
+        assert np.array_equal(cached.hard_edge_slots, arrays.hard_edge_slots)
+        assert np.array_equal(cached.normals[cached.normal_ids], arrays.normals[arrays.normal_ids])
+    print('layer expansion and cache round trip check out')
+
+
+def run(repeat: int = 10):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = MeshCache(Path(temp_dir))
+        for path in sorted(MODELS_FOLDER.glob('*.fbx')):
+            source = read_fbx_meshes(path)
+            cache.write(path, source)
+            cached = MeshCache(Path(temp_dir)).read(path)
+            for expected, result in zip(source, cached):
+                assert expected.name == result.name
+                assert np.array_equal(expected.face_connects, result.face_connects)
+                assert np.array_equal(expected.uv_ids, result.uv_ids)
+                assert (expected.hard_edge_slots is None) == (result.hard_edge_slots is None)
+                assert expected.materials == result.materials and expected.uv_set == result.uv_set
+            print(f'{path.name}: {", ".join(f"{x.name} ({x.vertex_count} vertices)" for x in cached)}, '
+                  f'materials {[x.name for x in cached[0].materials]}, '
+                  f'hard edges {[None if x.hard_edge_slots is None else len(x.hard_edge_slots) for x in cached]}')
+            timings = {
+                'fbx read': min(timeit.repeat(lambda: read_fbx_meshes(path), number=1, repeat=repeat)),
+                'cache hit (new index)': min(timeit.repeat(lambda: MeshCache(Path(temp_dir)).read(path),
+                                                           number=1, repeat=repeat)),
+                'cache hit (warm index)': min(timeit.repeat(lambda: cache.read(path), number=1, repeat=repeat)),
+            }
+            for label, seconds in timings.items():
+                print(f'    {label:<24}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    check()
+    run()
@@ -0,0 +1,97 @@
+"""
+Check and time the mesh topology index headless
+
+Builds MeshTopology from Maya style face counts and face connects, checks vertex / edge / face / uv conversions on
+two quads and their round trips on a grid, then times building the index and converting large selections.
+Run from the scripts directory:
+    python -m benchmarks.mesh_topology_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from core.mesh_topology import MeshTopology, slot_edge_vertices
+
+
+def grid(columns: int, rows: int):
+    """
+    Face counts and face connects of a quad grid
+    @param columns:
+    @param rows:
+    @return:
+    """
+    corners = (np.arange(rows)[:, None] * (columns + 1) + np.arange(columns)[None, :]).ravel()
+    face_connects = np.stack([corners, corners + 1, corners + columns + 2, corners + columns + 1], axis=1).ravel()
+    return np.full(columns * rows, 4, dtype=np.int64), face_connects
+
+
+def check():
+    #  3---4---5
+    #  | 0 | 1 |
+    #  0---1---2
+    face_counts, face_connects = np.array([4, 4]), np.array([0, 1, 4, 3, 1, 2, 5, 4])
+    topology = MeshTopology(face_counts, face_connects)
+    assert topology.signature == (6, 7, 2)
+    shared = np.flatnonzero((np.sort(topology.edge_vertices, axis=1) == [1, 4]).all(axis=1))
+    assert len(shared) == 1
+    assert topology.convert(shared, 'edge', 'vertex').tolist() == [1, 4]
+    assert topology.convert(shared, 'edge', 'face').tolist() == [0, 1]
+    assert topology.convert(0, 'face', 'vertex').tolist() == [0, 1, 3, 4]
+    assert topology.convert(1, 'vertex', 'face').tolist() == [0, 1]
+    assert topology.convert(0, 'vertex', 'face').tolist() == [0]
+    assert len(topology.convert(0, 'face', 'edge')) == 4
+    assert len(topology.convert([0, 1], 'face', 'edge')) == 7
+
+    # Maya numbered edges, listed per face-vertex as polyInfo -faceToEdge reports them
+    slot_edges = np.array([0, 2, 4, 1, 3, 5, 6, 2])
+    edge_vertices = slot_edge_vertices(face_counts, face_connects, slot_edges, 7)
+    assert edge_vertices.tolist() == [[0, 1], [0, 3], [1, 4], [1, 2], [3, 4], [2, 5], [4, 5]]
+    maya_topology = MeshTopology(face_counts, face_connects, edge_vertices=edge_vertices)
+    assert maya_topology.slot_edges.tolist() == slot_edges.tolist()
+    assert maya_topology.convert(2, 'edge', 'face').tolist() == [0, 1]
+    assert maya_topology.convert(1, 'face', 'edge').tolist() == [2, 3, 5, 6]
+    try:
+        slot_edge_vertices(face_counts, face_connects, np.array([0, 2, 4, 1, 3, 5, 6, 0]), 7)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('inconsistent edge ids were accepted')
+
+    # uvs split along the shared edge: each face owns its own four
+    topology.set_uvs([4, 4], np.arange(8), 8)
+    assert topology.convert(1, 'vertex', 'uv').tolist() == [1, 4]
+    assert topology.convert([4, 5, 6, 7], 'uv', 'face').tolist() == [1]
+    assert topology.convert(shared, 'edge', 'uv').tolist() == [1, 2, 4, 7]
+
+    # round trips on a grid: every face is back in face -> vertex -> face and face -> edge -> face
+    face_counts, face_connects = grid(40, 30)
+    topology = MeshTopology(face_counts, face_connects)
+    for face in (0, 39, 600, 1199):
+        assert face in topology.convert(topology.convert(face, 'face', 'vertex'), 'vertex', 'face')
+        assert face in topology.convert(topology.convert(face, 'face', 'edge'), 'edge', 'face')
+        edges = topology.convert(face, 'face', 'edge')
+        assert np.array_equal(topology.convert(edges, 'edge', 'vertex'), topology.convert(face, 'face', 'vertex'))
+    assert topology.edge_count == 40 * 31 + 41 * 30
+    print('mesh topology conversions check out')
+
+
+def run(columns: int = 1000, rows: int = 500, repeat: int = 3):
+    face_counts, face_connects = grid(columns, rows)
+    topology = MeshTopology(face_counts, face_connects)
+    faces = np.arange(0, topology.face_count, 3)
+    timings = {
+        'build': lambda: MeshTopology(face_counts, face_connects),
+        'face -> vertex': lambda: topology.convert(faces, 'face', 'vertex'),
+        'face -> edge': lambda: topology.convert(faces, 'face', 'edge'),
+        'vertex -> face': lambda: topology.convert(faces, 'vertex', 'face'),
+        'edge -> face': lambda: topology.convert(faces, 'edge', 'face'),
+    }
+    print(f'{topology.face_count} faces, {topology.edge_count} edges, converting {len(faces)} components')
+    for label, function in timings.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+        print(f'    {label:<20}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    check()
+    run()
@@ -0,0 +1,92 @@
+"""
+Check the profiler reports and time its overhead headless
+
+Profiles a few calls into a temporary JSON line report, including a failing call and a failing inspector, checks
+the records read back, aggregate and compare, then times a profiled call with the profiler off and on.
+Run from the scripts directory:
+    python -m benchmarks.profiler_benchmark
+"""
+import tempfile
+import timeit
+
+from dataclasses import replace
+from pathlib import Path
+
+from core.profiler import Profiler, aggregate, compare, load_records
+
+
+def inspect_result(result) -> dict:
+    if result is None:
+        raise RuntimeError('nothing to inspect')
+    return {'node_count': len(result), 'node_types': {'transform': len(result)}, 'loaded': True}
+
+
+def check():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report_dir = Path(temp_dir)
+        scene = report_dir.joinpath('scene.ma')
+        scene.write_text('//Maya ASCII scene\n')
+        profiler = Profiler(inspector=inspect_result)
+        profiler.enable(report_dir)
+
+        @profiler.profile('load_scene', label_arg='file_path')
+        def load_scene(file_path, nodes=('a', 'b')):
+            if nodes == 'fail':
+                raise ValueError('bad scene')
+            return list(nodes) if nodes else None
+
+        assert load_scene(scene) == ['a', 'b']
+        assert load_scene(file_path=scene, nodes=('a', 'b', 'c')) == ['a', 'b', 'c']
+        # an inspector error is recorded but the call still returns its result
+        assert load_scene(scene, nodes=()) is None
+        try:
+            load_scene(scene, nodes='fail')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('the profiled error was swallowed')
+
+        records = load_records(report_dir)
+        assert [x.node_count for x in records] == [2, 3, None, None]
+        assert records[0].metadata == {'file_size': scene.stat().st_size, 'loaded': True}
+        assert records[2].metadata['inspector_error'] == 'RuntimeError: nothing to inspect' and records[2].error is None
+        assert records[3].error == 'ValueError: bad scene'
+
+        summary = aggregate(records)[('load_scene', str(scene))]
+        assert summary['count'] == 3 and summary['sessions'] == 1
+        assert summary['file_size'] == scene.stat().st_size
+        assert summary['wall_time_min'] <= summary['wall_time_median'] <= summary['wall_time_max']
+
+    # medians per (operation, label): 1.0 -> 1.3 is a regression at 20%, 2.0 -> 2.2 is not, new keys are ignored
+    def timed(operation, label, *wall_times):
+        return [replace(records[0], operation=operation, label=label, wall_time=x) for x in wall_times]
+
+    baseline = timed('load_scene', 'a.ma', 0.9, 1.0, 1.1) + timed('import_model', 'b.fbx', 2.0)
+    current = timed('load_scene', 'a.ma', 1.3, 1.3, 5.0) + timed('import_model', 'b.fbx', 2.2) + \
+        timed('create_reference', 'c.ma', 9.0)
+    regressions = compare(baseline, current)
+    assert list(regressions) == [('load_scene', 'a.ma')]
+    assert abs(regressions[('load_scene', 'a.ma')]['ratio'] - 1.3) < 1e-9
+    assert compare(baseline, current, tolerance=0.5) == {}
+    print('profiler records, aggregate and compare check out')
+
+
+def run(repeat: int = 5, number: int = 1000):
+    profiler = Profiler()
+
+    @profiler.profile('noop')
+    def noop():
+        return None
+
+    timings = {'plain call': lambda: None, 'profiler off': noop}
+    results = {label: min(timeit.repeat(function, number=number, repeat=repeat)) / number
+               for label, function in timings.items()}
+    profiler.enable()
+    results['profiler on'] = min(timeit.repeat(noop, number=number, repeat=repeat)) / number
+    for label, seconds in results.items():
+        print(f'{label:<16}{seconds * 1e6:>10.2f} us')
+
+
+if __name__ == '__main__':
+    check()
+    run()
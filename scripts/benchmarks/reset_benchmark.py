@@ -0,0 +1,86 @@
+"""
+Time bulk freeze / reset pivot / super reset against the per-node loops they replaced, and check the results match
+
+Needs Maya. Builds a kit-bash style scene of offset, rotated and scaled cubes, with a few nested groups, runs each
+implementation on a fresh copy and compares translates, pivots and world space bounding boxes.
+Run with mayapy from the scripts directory:
+    mayapy -m benchmarks.reset_benchmark
+"""
+import time
+
+import maya.standalone
+
+maya.standalone.initialize(name='python')
+
+import numpy as np  # noqa: E402
+import pymel.core as pm  # noqa: E402
+
+from maya import cmds  # noqa: E402
+
+from robotools import node_utils  # noqa: E402
+
+
+def create_pieces(count: int) -> list:
+    """
+    Cubes with random transforms and pivots, every 50th parented under the previous one
+    @param count:
+    @return: transforms
+    """
+    rng = np.random.default_rng(0)
+    pieces = []
+    for index in range(count):
+        cube = cmds.polyCube()[0]
+        cmds.xform(cube, translation=rng.uniform(-50, 50, 3).tolist(), rotation=rng.uniform(0, 360, 3).tolist(),
+                   scale=rng.uniform(0.5, 2, 3).tolist())
+        cmds.xform(cube, worldSpace=True, pivots=rng.uniform(-50, 50, 3).tolist())
+        if index % 50 == 49:
+            cube = cmds.parent(cube, pieces[-1])[0]
+        pieces.append(cmds.ls(cube, long=True)[0])
+    return pm.ls(pieces)
+
+
+def legacy_super_reset(nodes):
+    for node in nodes:
+        pm.makeIdentity(node, apply=True, translate=True, rotate=True, scale=True)
+    for item in nodes:
+        pivot_node = pm.xform(item, query=True, worldSpace=True, rotatePivot=True)
+        pm.xform(item, relative=True, translation=[-i for i in pivot_node])
+        pm.makeIdentity(item, apply=True, translate=True)
+        pm.xform(item, translation=pivot_node)
+    pm.delete(nodes, constructionHistory=True)
+
+
+def snapshot(nodes) -> np.ndarray:
+    """
+    Translate, world pivot and world bounding box of every node
+    @param nodes:
+    @return:
+    """
+    return np.array([cmds.getAttr(f'{x}.translate')[0] + tuple(cmds.xform(x, query=True, worldSpace=True,
+                                                                            rotatePivot=True)) +
+                     tuple(cmds.exactWorldBoundingBox(x)) for x in nodes])
+
+
+def time_reset(function, count: int):
+    cmds.file(new=True, force=True)
+    nodes = create_pieces(count)
+    start = time.perf_counter()
+    function(nodes)
+    return time.perf_counter() - start, snapshot(nodes)
+
+
+def run(count: int = 20000):
+    pm.undoInfo(state=True, infinity=True)
+    legacy_time, legacy_result = time_reset(legacy_super_reset, count)
+    bulk_time, bulk_result = time_reset(node_utils.super_reset, count)
+    max_difference = float(np.abs(legacy_result - bulk_result).max())
+    print(f'super_reset on {count} pieces')
+    print(f'    legacy loop {legacy_time:>10.2f} s')
+    print(f'    bulk        {bulk_time:>10.2f} s  ({legacy_time / bulk_time:.1f}x)')
+    print(f'    largest difference in translate / pivot / bounds: {max_difference:.2e}')
+    assert max_difference < 1e-6
+
+
+if __name__ == '__main__':
+    run()
+    maya.standalone.uninitialize()
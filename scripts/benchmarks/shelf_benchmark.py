@@ -0,0 +1,253 @@
+"""
+Count the Maya UI commands issued when the Robotools shelf is set up
+
+Compares the delete-and-rebuild setup with the spec diff in ShelfManager.build, and per-button insertion with
+the label index against the per-insert label scan it replaced, on a fake shelf UI scripted into the Maya stub.
+The legacy 2000 button run issues about six million commands and takes most of a minute.
+Run from the scripts directory:
+    python -m benchmarks.shelf_benchmark
+"""
+from benchmarks import maya_stub
+
+maya_stub.install()
+
+import pymel.core as pm  # noqa: E402
+
+from pathlib import Path  # noqa: E402
+from typing import Dict, List, Optional  # noqa: E402
+
+from robotools import icon_path  # noqa: E402
+from robotools.utils.shelf_manager import ShelfManager, ShelfButton, ShelfLabel, ShelfSeparator  # noqa: E402
+
+TOP_LEVEL_SHELF = 'ShelfLayout'
+
+
+class FakeControl(str):
+    """UI name returned by control creation"""
+    ui: 'FakeShelfUI' = None
+
+    def setImageOverlayLabel(self, label: str):
+        self.ui.controls[self]['imageOverlayLabel'] = label
+
+
+class FakeShelfUI:
+    """Shelf layouts and their child controls, answering the commands ShelfManager issues"""
+
+    def __init__(self):
+        self.shelves: Dict[str, List[str]] = {}
+        self.controls: Dict[str, dict] = {}
+        self.option_vars: Dict[str, str] = {}
+        self.parent: Optional[str] = None
+        self.counter = 0
+        FakeControl.ui = self
+
+    def install(self):
+        responses = {
+            'maya.mel.eval': lambda *args, **kwargs: TOP_LEVEL_SHELF,
+            'pymel.core.tabLayout': lambda *args, **kwargs: list(self.shelves),
+            'pymel.core.shelfTabLayout': lambda *args, **kwargs: None,
+            'pymel.core.shelfLayout': self.shelf_layout,
+            'pymel.core.shelfButton': lambda *args, **kwargs: self.control('shelfButton', *args, **kwargs),
+            'pymel.core.separator': lambda *args, **kwargs: self.control('separator', *args, **kwargs),
+            'pymel.core.text': lambda *args, **kwargs: self.control('text', *args, **kwargs),
+            'pymel.core.control': lambda *args, **kwargs: self.control(None, *args, **kwargs),
+            'pymel.core.setParent': self.set_parent,
+            'pymel.core.deleteUI': self.delete_ui,
+            'pymel.core.renameUI': self.rename_ui,
+            'pymel.core.objectTypeUI': lambda name: self.controls[name]['type'],
+            'pymel.core.optionVar': self.option_var,
+        }
+        for path, response in responses.items():
+            maya_stub.LOG.respond(path, response)
+
+    def set_parent(self, name):
+        self.parent = name
+
+    def shelf_layout(self, name=None, query=False, edit=False, **kwargs):
+        if query:
+            if kwargs.get('exists'):
+                return name in self.shelves
+            if kwargs.get('childArray'):
+                return list(self.shelves[name]) or None
+            if kwargs.get('spacing'):
+                return self.controls.get(name, {}).get('spacing', 0)
+        elif edit:
+            if 'spacing' in kwargs:
+                self.controls.setdefault(name, {})['spacing'] = kwargs['spacing']
+            if 'position' in kwargs:
+                control, index = kwargs['position']
+                children = self.shelves[name]
+                children.remove(control)
+                children.insert(index - 1, control)
+        else:
+            self.shelves[name] = []
+            self.parent = name
+        return name
+
+    def control(self, control_type, name=None, query=False, edit=False, exists=False, **kwargs):
+        if exists:
+            return name in self.controls and self.controls[name]['type'] == control_type
+        if query:
+            flag = next(iter(kwargs))
+            return self.controls[name].get(flag)
+        if edit:
+            self.controls[name].update(kwargs)
+            return None
+        parent = kwargs.pop('parent', self.parent)
+        if name is None:
+            self.counter += 1
+            name = f'{control_type}{self.counter}'
+        self.controls[name] = dict(kwargs, type=control_type)
+        self.shelves[parent].append(name)
+        return FakeControl(name)
+
+    def delete_ui(self, name):
+        if name in self.shelves:
+            for child in self.shelves.pop(name):
+                self.controls.pop(child, None)
+            return
+        self.controls.pop(name)
+        for children in self.shelves.values():
+            if name in children:
+                children.remove(name)
+
+    def rename_ui(self, name, new_name):
+        self.controls[new_name] = self.controls.pop(name)
+        for children in self.shelves.values():
+            if name in children:
+                children[children.index(name)] = new_name
+        return new_name
+
+    def option_var(self, query=None, exists=None, remove=None, stringValue=None):
+        if exists is not None:
+            return exists in self.option_vars
+        if remove is not None:
+            self.option_vars.pop(remove, None)
+        elif stringValue is not None:
+            self.option_vars[stringValue[0]] = stringValue[1]
+        elif query is not None:
+            return self.option_vars.get(query, 0)
+
+
+def build_items(button_count: int) -> list:
+    """
+    A shelf spec with a label and separator every ten buttons
+    @param button_count:
+    @return:
+    """
+    items = []
+    for index in range(button_count):
+        if index % 10 == 0:
+            items.extend([ShelfSeparator(), ShelfLabel(text=f'Group {index // 10}:', bold=True)])
+        items.append(ShelfButton(label=f'Tool {index}', command=f'print({index})', overlay_label=f't{index}'))
+    return items
+
+
+class LegacyShelfManager(ShelfManager):
+    """Button lookup prior to the label index: every insert and delete rescans the shelf"""
+
+    @property
+    def current_button_labels(self) -> List[str]:
+        return [pm.shelfButton(x, query=True, label=True) for x in self.current_buttons]
+
+    @property
+    def current_buttons(self) -> List[str]:
+        shelf_contents = pm.shelfLayout(self.name, query=True, childArray=True)
+        return [] if shelf_contents is None else [x for x in shelf_contents if 'shelfButton' in x]
+
+    def add_shelf_button(self, label: str, icon: Optional[Path] = None, command: str = '',
+                         overlay_label: Optional[str] = None,  overwrite: bool = True, name: Optional[str] = None):
+        if label in self.current_button_labels and overwrite:
+            self.delete_button(label=label)
+        icon = icon if icon else icon_path('script.png')
+        button = pm.shelfButton(label=label, image1=icon, parent=self.name, command=command,
+                                overlayLabelBackColor=(0, 0, 0, 0))
+        if overlay_label:
+            button.setImageOverlayLabel(overlay_label)
+
+    def delete_button(self, label: str):
+        button = next((x for x in self.current_buttons if pm.shelfButton(x, query=True, label=True) == label), None)
+        if button:
+            pm.deleteUI(button)
+
+
+def legacy_setup(manager: ShelfManager, items: list):
+    """
+    The setup prior to the spec diff: delete the shelf, recreate it and add every item
+    @param manager:
+    @param items:
+    """
+    manager.delete()
+    manager.create(select=False)
+    manager.delete_buttons()
+    for item in items:
+        if isinstance(item, ShelfButton):
+            manager.add_shelf_button(label=item.label, icon=icon_path('script.png'), command=item.command,
+                                     overlay_label=item.overlay_label)
+        elif isinstance(item, ShelfLabel):
+            manager.add_label(text=item.text, bold=item.bold)
+        else:
+            manager.add_separator(color=item.color)
+
+
+def count_commands(function, *args) -> int:
+    maya_stub.LOG.reset()
+    function(*args)
+    return maya_stub.LOG.total
+
+
+def insertion_queries(manager: ShelfManager, buttons: List[ShelfButton], bulk: bool) -> int:
+    """
+    Add buttons to an empty shelf, then add them again so every insert overwrites
+    @param manager:
+    @param buttons:
+    @param bulk: use add_shelf_buttons
+    @return: commands issued
+    """
+    manager.delete()
+    manager.create()
+
+    def add():
+        if bulk:
+            manager.add_shelf_buttons(buttons)
+        else:
+            for x in buttons:
+                manager.add_shelf_button(label=x.label, icon=x.icon, command=x.command, overlay_label=x.overlay_label)
+    return count_commands(add) + count_commands(add)
+
+
+def run_insertion(button_counts=(20, 200, 2000)):
+    FakeShelfUI().install()
+    print('button insertion (fill, then overwrite every button)')
+    for button_count in button_counts:
+        buttons = [x for x in build_items(button_count) if isinstance(x, ShelfButton)]
+        legacy = insertion_queries(LegacyShelfManager('Insertion'), buttons, bulk=False)
+        indexed = insertion_queries(ShelfManager('Insertion'), buttons, bulk=False)
+        bulk = insertion_queries(ShelfManager('Insertion'), buttons, bulk=True)
+        print(f'    {button_count:>5} buttons  legacy {legacy:>10}  indexed {indexed:>8}  bulk {bulk:>8}  commands')
+
+
+def run(button_count: int = 20):
+    ui = FakeShelfUI()
+    ui.install()
+    manager = ShelfManager('Robotools')
+    items = build_items(button_count)
+    changed = list(items)
+    changed[-1] = ShelfButton(label=changed[-1].label, command='print("changed")')
+
+    results = {
+        'legacy rebuild': count_commands(legacy_setup, LegacyShelfManager(manager.name), items),
+        'first build': count_commands(lambda: (manager.delete(), manager.build(items))),
+        'unchanged': count_commands(manager.build, items),
+        'one button changed': count_commands(manager.build, changed),
+        'one button removed': count_commands(manager.build, changed[:-1]),
+    }
+    assert ui.shelves['Robotools'] == manager.buttons
+    print(f'{button_count} buttons, {len(items)} shelf items')
+    for label, count in results.items():
+        print(f'    {label:<22}{count:>8} commands')
+
+
+if __name__ == '__main__':
+    run()
+    run_insertion()
@@ -0,0 +1,107 @@
+"""
+Count the Maya commands issued per State snapshot/restore
+
+Compares robotools.node_utils.State with the implementation it replaced, which toggled component
+mode to read the object selection. Run from the scripts directory:
+    python -m benchmarks.state_benchmark
+"""
+from benchmarks import maya_stub
+
+maya_stub.install()
+
+import pymel.core as pm  # noqa: E402
+
+from robotools.node_utils import State, get_component_mode, set_component_mode  # noqa: E402
+from robotools.robotools_enums import ComponentType  # noqa: E402
+
+
+class LegacyState:
+    """The State implementation prior to the shared snapshot version"""
+
+    def __init__(self):
+        self.component_mode = get_component_mode()
+        self.selection = pm.ls(sl=True)
+        if self.object_mode:
+            self.object_selection = pm.ls(sl=True)
+            self.component_selection = []
+        else:
+            self.component_selection = pm.ls(sl=True)
+            set_component_mode(ComponentType.object)
+            self.object_selection = pm.ls(sl=True)
+            set_component_mode(self.component_mode)
+            pm.hilite(self.object_selection)
+
+    def restore(self):
+        if self.object_selection:
+            pm.select(self.object_selection, noExpand=True)
+            set_component_mode(self.component_mode)
+        else:
+            set_component_mode(ComponentType.object)
+            pm.select(clear=True)
+        if not self.object_mode:
+            pm.select(self.component_selection)
+
+    @property
+    def object_mode(self):
+        return self.component_mode == ComponentType.object
+
+
+class FakeSelection:
+    """Minimal selection model answering the queries State makes"""
+
+    def __init__(self, mode: ComponentType):
+        self.mode = mode
+        self.objects = ['pCube1', 'pCube2']
+        self.components = ['pCube1.vtx[0:7]', 'pCube2.vtx[3]']
+
+    def ls(self, *args, **kwargs):
+        if kwargs.get('hilite'):
+            return list(self.objects)
+        return list(self.objects if self.mode == ComponentType.object else self.components)
+
+    def select_mode(self, *args, **kwargs):
+        if kwargs.get('query'):
+            return self.mode == ComponentType.object
+        if kwargs.get('object'):
+            self.mode = ComponentType.object
+
+    def select_type(self, *args, **kwargs):
+        if kwargs.get('query'):
+            return kwargs.get(self.mode.name if self.mode != ComponentType.face else 'facet', False)
+        for flag, mode in (('vertex', ComponentType.vertex), ('edge', ComponentType.edge),
+                           ('facet', ComponentType.face), ('polymeshUV', ComponentType.uv)):
+            if kwargs.get(flag):
+                self.mode = mode
+
+    def install(self):
+        maya_stub.LOG.respond('pymel.core.ls', self.ls)
+        maya_stub.LOG.respond('pymel.core.selectMode', self.select_mode)
+        maya_stub.LOG.respond('pymel.core.selectType', self.select_type)
+
+
+def measure(state_class: type, mode: ComponentType):
+    """
+    Count commands for one snapshot and one restore
+    @param state_class:
+    @param mode:
+    @return: snapshot count, restore count
+    """
+    FakeSelection(mode).install()
+    maya_stub.LOG.reset()
+    state = state_class()
+    snapshot = maya_stub.LOG.total
+    maya_stub.LOG.reset()
+    state.restore()
+    return snapshot, maya_stub.LOG.total
+
+
+def run():
+    print(f'{"mode":<8}{"class":<14}{"snapshot":>10}{"restore":>10}')
+    for mode in (ComponentType.object, ComponentType.vertex, ComponentType.face):
+        for state_class in (LegacyState, State):
+            snapshot, restore = measure(state_class, mode)
+            print(f'{mode.name:<8}{state_class.__name__:<14}{snapshot:>10}{restore:>10}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,149 @@
+"""
+Time the cached tool catalogue against the per-access JSON parse ToolCaddy used to do
+
+Checks the Tool Caddy list model and its search proxy over a small catalogue under the stand-in Qt modules, then
+builds a temporary catalogue with thousands of tools and times a refresh with the legacy tool_data property, a
+cached listing, fuzzy searches and typing a query one character at a time.
+Run from the scripts directory:
+    python -m benchmarks.tool_catalogue_benchmark
+"""
+import json
+import random
+import tempfile
+import timeit
+
+from functools import cmp_to_key
+from pathlib import Path
+
+from benchmarks import maya_stub
+from core.tool_catalogue import ToolCatalogue
+
+WORDS = ('toggle', 'mirror', 'connect', 'edge', 'flow', 'vertex', 'color', 'select', 'faces', 'merge', 'relax',
+         'extract', 'combine', 'layer', 'shading', 'pivot', 'reset', 'freeze', 'transform', 'uv', 'normal', 'rig')
+
+
+def build_catalogue(path: Path, tool_count: int, category_count: int = 20):
+    """
+    Write a tool_caddy.json style file
+    @param path:
+    @param tool_count:
+    @param category_count:
+    """
+    rng = random.Random(0)
+    data = {}
+    for index in range(tool_count):
+        name = ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 4))) + f' {index}'
+        data.setdefault(f'Category {index % category_count}', {})[name] = {
+            'script': f'from robotools import node_utils\nnode_utils.tool_{index}()', 'tool_tip': f'Tool {index}.'}
+    path.write_text(json.dumps(data, indent=2))
+
+
+def legacy_refresh(path: Path):
+    """The previous refresh_buttons for the 'All' filter, tool_data parsed the file on each access"""
+    def tool_data():
+        with open(path) as f:
+            return json.load(f)
+    scripts = [x for y in tool_data().keys() for x in tool_data()[y].items()]
+    scripts.sort(key=lambda x: x[0].lower())
+    return [compile(value['script'], name, 'exec') for name, value in scripts[:1]]
+
+
+def type_query(catalogue: ToolCatalogue, query: str):
+    for length in range(1, len(query) + 1):
+        catalogue.search(query[:length])
+
+
+class ListIndex:
+    """Row index standing in for a QModelIndex"""
+
+    def __init__(self, row: int = -1):
+        self._row = row
+
+    def row(self) -> int:
+        return self._row
+
+    def isValid(self) -> bool:
+        return self._row >= 0
+
+
+def check():
+    maya_stub.install()
+    try:
+        from robotools.utils.tool_caddy import TOOL_ENTRY_ROLE, ToolFilterProxyModel, ToolListModel
+        from PySide2.QtCore import Qt
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir).joinpath('tool_caddy.json')
+            path.write_text(json.dumps({
+                'Modeling': {'Mirror Geometry': {'script': 'pass', 'tool_tip': 'Mirror.'},
+                             'Merge Vertices': {'script': 'pass', 'tool_tip': 'Merge.'}},
+                'Rigging': {'Reset Pivot': {'script': 'pass', 'tool_tip': 'Reset.'},
+                            'Broken Tool': {'script': 'def', 'tool_tip': 'Broken.'}}}))
+            catalogue = ToolCatalogue(path)
+            catalogue.refresh()
+
+            model = ToolListModel()
+            model.set_tools(catalogue.tools())
+            tools = catalogue.tools()
+            assert model.rowCount() == len(tools) == 4
+            assert model.rowCount(ListIndex(0)) == 0
+            broken = next(i for i, x in enumerate(tools) if x.name == 'Broken Tool')
+            merge = next(i for i, x in enumerate(tools) if x.name == 'Merge Vertices')
+            assert model.data(ListIndex(merge)) == 'Merge Vertices'
+            assert model.data(ListIndex(merge), Qt.ToolTipRole) == 'Merge.'
+            assert model.data(ListIndex(merge), TOOL_ENTRY_ROLE) is tools[merge]
+            assert model.data(ListIndex(broken), Qt.ToolTipRole).startswith('Syntax error')
+            assert model.data(ListIndex()) is None
+            assert model.flags(ListIndex(broken)) is Qt.NoItemFlags
+            assert model.flags(ListIndex(merge)) is not Qt.NoItemFlags
+
+            proxy = ToolFilterProxyModel()
+            proxy.sourceModel = lambda: model
+
+            def shown(query: str, category=None):
+                proxy.set_matches(catalogue.search(query, category=category))
+                rows = [x for x in range(model.rowCount()) if proxy.filterAcceptsRow(x, ListIndex())]
+                order = cmp_to_key(lambda a, b: -1 if proxy.lessThan(ListIndex(a), ListIndex(b)) else
+                                   int(proxy.lessThan(ListIndex(b), ListIndex(a))))
+                return [tools[x].name for x in sorted(rows, key=order)]
+
+            assert shown('') == [x.name for x in catalogue.search('')]
+            assert set(shown('')) == {x.name for x in tools}
+            assert shown('mer') == [x.name for x in catalogue.search('mer')]
+            assert 'Reset Pivot' not in shown('mer') and 'Merge Vertices' in shown('mer')
+            assert shown('', category='Rigging') == [x.name for x in catalogue.search('', category='Rigging')]
+            assert 'Mirror Geometry' not in shown('', category='Rigging')
+            assert shown('zzz') == []
+    finally:
+        maya_stub.uninstall()
+    print('tool list model and search proxy check out')
+
+
+def run(tool_count: int = 5000, repeat: int = 5):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir).joinpath('tool_caddy.json')
+        build_catalogue(path, tool_count)
+        catalogue = ToolCatalogue(path)
+        catalogue.refresh()
+        assert not catalogue.errors()
+        print(f'{tool_count} tools, "mir flow" matches {len(catalogue.search("mir flow"))}, '
+              f'"cef" matches {len(catalogue.search("cef"))}')
+
+        timings = {
+            'legacy refresh (parse)': min(timeit.repeat(lambda: legacy_refresh(path), number=1, repeat=repeat)),
+            'catalogue load + compile': min(timeit.repeat(lambda: catalogue.refresh(force=True), number=1,
+                                                          repeat=repeat)),
+            'cached listing': min(timeit.repeat(catalogue.tools, number=100, repeat=repeat)) / 100,
+            'full search': min(timeit.repeat(lambda: (catalogue.search('mirror'), catalogue.search('cwef')),
+                                             number=10, repeat=repeat)) / 20,
+            'type "connect edge"': min(timeit.repeat(lambda: type_query(catalogue, 'connect edge'), number=1,
+                                                     repeat=repeat)),
+        }
+
+    for label, seconds in timings.items():
+        print(f'{label:<28}{seconds * 1000:>10.4f} ms')
+
+
+if __name__ == '__main__':
+    check()
+    run()
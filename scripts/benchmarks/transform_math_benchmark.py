@@ -0,0 +1,76 @@
+"""
+Check and time the batched transform math headless
+
+Round-trips random transforms through compose_matrices / decompose_matrices for every rotate order, checks pivots
+stay fixed and the axis conventions match Maya's, then times each helper on a large batch.
+Run from the scripts directory:
+    python -m benchmarks.transform_math_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from core.transform_math import ROTATE_ORDERS, compose_matrices, decompose_matrices, euler_to_matrices, \
+    matrices_to_euler, transform_points, world_rotate_pivots
+
+
+def random_transforms(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    translations = rng.uniform(-100, 100, (count, 3))
+    rotations = rng.uniform(-180, 180, (count, 3))
+    scales = rng.uniform(0.1, 4, (count, 3)) * np.where(np.arange(count) % 5 == 0, -1, 1)[:, None]
+    rotate_orders = np.arange(count) % len(ROTATE_ORDERS)
+    pivots = rng.uniform(-10, 10, (count, 3))
+    return translations, rotations, scales, rotate_orders, pivots
+
+
+def check(count: int = 6000):
+    translations, rotations, scales, rotate_orders, pivots = random_transforms(count)
+
+    # Maya conventions: rotate x 90 takes +y to +z, rotate y 90 takes +z to +x, rotate z 90 takes +x to +y
+    axes = euler_to_matrices([[90, 0, 0], [0, 90, 0], [0, 0, 90]])
+    assert np.allclose(np.einsum('ni,nij->nj', np.array([[0, 1, 0], [0, 0, 1], [1, 0, 0]]), axes),
+                       [[0, 0, 1], [1, 0, 0], [0, 1, 0]])
+
+    rotation = euler_to_matrices(rotations, rotate_orders)
+    assert np.allclose(euler_to_matrices(matrices_to_euler(rotation, rotate_orders), rotate_orders), rotation)
+
+    for order, name in enumerate(ROTATE_ORDERS):
+        locked = np.zeros((2, 3))
+        locked[:, 'xyz'.index(name[0])] = 25
+        locked[:, 'xyz'.index(name[1])] = [90, -90]
+        locked[:, 'xyz'.index(name[2])] = -40
+        matrices = euler_to_matrices(locked, order)
+        assert np.allclose(euler_to_matrices(matrices_to_euler(matrices, order), order), matrices), name
+
+    matrices = compose_matrices(translations, rotations, scales, rotate_orders)
+    decomposed = decompose_matrices(matrices, rotate_orders)
+    assert np.allclose(compose_matrices(*decomposed, rotate_orders), matrices)
+    assert np.allclose(np.abs(decomposed[2]), np.abs(scales))
+
+    pivoted = compose_matrices(translations, rotations, scales, rotate_orders, rotate_pivots=pivots,
+                               scale_pivots=pivots)
+    assert np.allclose(transform_points(pivots, pivoted), pivots + translations)
+    parents = compose_matrices(translations[::-1], rotations[::-1])
+    assert np.allclose(world_rotate_pivots(translations, pivots, parents),
+                       transform_points(pivots, np.einsum('nij,njk->nik', pivoted, parents)))
+    print(f'{count} transforms round-trip across {len(ROTATE_ORDERS)} rotate orders')
+
+
+def run(count: int = 100000, repeat: int = 5):
+    translations, rotations, scales, rotate_orders, pivots = random_transforms(count)
+    matrices = compose_matrices(translations, rotations, scales, rotate_orders)
+    timings = {
+        'compose': lambda: compose_matrices(translations, rotations, scales, rotate_orders, rotate_pivots=pivots),
+        'decompose': lambda: decompose_matrices(matrices, rotate_orders),
+        'transform points': lambda: transform_points(pivots, matrices),
+    }
+    print(f'{count} transforms')
+    for label, function in timings.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+        print(f'    {label:<20}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    check()
+    run()
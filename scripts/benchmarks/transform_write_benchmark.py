@@ -0,0 +1,197 @@
+"""
+Check the batched translate writes of reset_pivot and set_translations headless and count the commands they issue
+
+A fake scene of unparented transforms, each with a translate, an object space rotate pivot and a geometry offset,
+answers the API and cmds calls both make under the stand-in Maya modules. With the undo queue on every node gets a
+setAttr, with it off each write is a single MDGModifier. Either way reset_pivot must leave each node translated to
+its former world pivot with its geometry in place, and set_translations must write the requested values.
+Run from the scripts directory:
+    python -m benchmarks.transform_write_benchmark
+"""
+from collections import Counter
+
+import numpy as np
+
+from benchmarks import maya_stub
+
+maya_stub.install()
+
+from robotools import node_utils  # noqa: E402
+
+
+class Vector:
+    def __init__(self, values):
+        self.x, self.y, self.z = values
+
+
+class FakeNode:
+    def __init__(self, name: str):
+        self.name = name
+
+    def longName(self) -> str:
+        return self.name
+
+    def exclusiveMatrixInverse(self) -> list:
+        return np.eye(4).ravel().tolist()
+
+
+class FakeSelectionList:
+    def __init__(self):
+        self.names = []
+
+    def add(self, item, merge_with_existing: bool = True):
+        name = item if isinstance(item, str) else item.name
+        if merge_with_existing and name in self.names:
+            return
+        self.names.append(name)
+
+    def length(self) -> int:
+        return len(self.names)
+
+    def getDagPath(self, index: int) -> FakeNode:
+        return FakeNode(self.names[index])
+
+    getDependNode = getDagPath
+
+
+class FakePlug:
+    def __init__(self, name: str, axis: int = -1):
+        self.name, self.axis = name, axis
+
+    def child(self, axis: int) -> 'FakePlug':
+        return FakePlug(self.name, axis)
+
+
+class FakeDependencyNode:
+    def __init__(self, node: FakeNode):
+        self.node = node
+
+    def findPlug(self, attribute: str, want_networked_plug: bool) -> FakePlug:
+        return FakePlug(self.node.name)
+
+
+class FakeScene:
+    """Unparented transforms without rotation or scale, so world space is translate plus object space"""
+
+    def __init__(self, count: int, undo: bool):
+        rng = np.random.default_rng(0)
+        self.names = [f'|piece{x}' for x in range(count)]
+        self.translations = dict(zip(self.names, rng.uniform(-50, 50, (count, 3))))
+        self.pivots = dict(zip(self.names, rng.uniform(-50, 50, (count, 3))))
+        self.geometry = dict(zip(self.names, rng.uniform(-50, 50, (count, 3))))
+        self.undo = undo
+        self.pending = []
+
+    def world_pivot(self, name: str) -> np.ndarray:
+        return self.translations[name] + self.pivots[name]
+
+    def world_geometry(self, name: str) -> np.ndarray:
+        return self.translations[name] + self.geometry[name]
+
+    def set_attr(self, plug: str, *values, **kwargs):
+        self.translations[plug.split('.')[0]] = np.array(values)
+
+    def make_identity(self, names, apply: bool = False, translate: bool = False):
+        for name in names:
+            self.pivots[name] = self.pivots[name] + self.translations[name]
+            self.geometry[name] = self.geometry[name] + self.translations[name]
+            self.translations[name] = np.zeros(3)
+
+    def transform_fn(self, dag_path: FakeNode):
+        scene = self
+
+        class TransformFn:
+            def translation(self, space):
+                return Vector(scene.translations[dag_path.name])
+
+            def rotatePivot(self, space):
+                return Vector(scene.world_pivot(dag_path.name))
+
+        return TransformFn()
+
+    def modifier(self):
+        scene = self
+
+        class Modifier:
+            def newPlugValueDouble(self, plug: FakePlug, value: float):
+                scene.pending.append((plug, value))
+
+            def doIt(self):
+                for plug, value in scene.pending:
+                    scene.translations[plug.name] = scene.translations[plug.name].copy()
+                    scene.translations[plug.name][plug.axis] = value
+                scene.pending.clear()
+
+        return Modifier()
+
+    def install(self):
+        responses = {
+            'pymel.core.ls': lambda nodes=None, **kwargs: [FakeNode(x) for x in nodes],
+            'maya.api.OpenMaya.MSelectionList': lambda: FakeSelectionList(),
+            'maya.api.OpenMaya.MFnTransform': self.transform_fn,
+            'maya.api.OpenMaya.MFnDependencyNode': FakeDependencyNode,
+            'maya.api.OpenMaya.MDGModifier': self.modifier,
+            'maya.cmds.undoInfo': lambda **kwargs: self.undo,
+            'maya.cmds.setAttr': self.set_attr,
+            'maya.cmds.makeIdentity': self.make_identity,
+        }
+        for path, response in responses.items():
+            maya_stub.LOG.respond(path, response)
+
+
+def reset(count: int, undo: bool) -> Counter:
+    """
+    Reset the pivots of a fake scene and check every node moved to its former world pivot
+    @param count:
+    @param undo: state of the undo queue
+    @return: commands issued
+    """
+    scene = FakeScene(count, undo)
+    scene.install()
+    pivots = {x: scene.world_pivot(x) for x in scene.names}
+    geometry = {x: scene.world_geometry(x) for x in scene.names}
+    commands = maya_stub.count_calls(node_utils.reset_pivot, scene.names)
+    for name in scene.names:
+        assert np.allclose(scene.translations[name], pivots[name])
+        assert np.allclose(scene.world_pivot(name), pivots[name])
+        assert np.allclose(scene.world_geometry(name), geometry[name])
+    maya_stub.LOG.reset(responses=True)
+    return commands
+
+
+def set_translations(count: int, undo: bool, world_space: bool) -> Counter:
+    """
+    Set the translates of a fake scene and check the values landed
+    @param count:
+    @param undo: state of the undo queue
+    @param world_space: nodes are unparented, so world and local positions agree
+    @return: commands issued
+    """
+    scene = FakeScene(count, undo)
+    scene.install()
+    translations = np.arange(count * 3, dtype=np.float64).reshape(-1, 3)
+    commands = maya_stub.count_calls(node_utils.set_translations, scene.names, translations, world_space)
+    assert np.array_equal(np.array([scene.translations[x] for x in scene.names]), translations)
+    maya_stub.LOG.reset(responses=True)
+    return commands
+
+
+def run(count: int = 500):
+    for undo in (True, False):
+        commands = reset(count, undo)
+        assert commands['maya.cmds.makeIdentity'] == 1
+        assert commands['maya.cmds.setAttr'] == (2 * count if undo else 0)
+        assert commands['maya.api.OpenMaya.MDGModifier'] == (0 if undo else 2)
+        print(f'reset_pivot on {count} pieces, undo {"on" if undo else "off"}: setAttr '
+              f'{commands["maya.cmds.setAttr"]}, MDGModifier {commands["maya.api.OpenMaya.MDGModifier"]}, '
+              f'makeIdentity {commands["maya.cmds.makeIdentity"]}')
+        for world_space in (False, True):
+            commands = set_translations(count, undo, world_space)
+            assert commands['maya.cmds.setAttr'] == (count if undo else 0)
+            assert commands['maya.api.OpenMaya.MDGModifier'] == (0 if undo else 1)
+        print(f'set_translations on {count} pieces, undo {"on" if undo else "off"}: setAttr '
+              f'{commands["maya.cmds.setAttr"]}, MDGModifier {commands["maya.api.OpenMaya.MDGModifier"]}')
+
+
+if __name__ == '__main__':
+    run()
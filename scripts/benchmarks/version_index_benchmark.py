@@ -0,0 +1,63 @@
+"""
+Time the cached version index against the glob-and-sort lookup load_base_character used to do
+
+Builds a temporary scenes folder with thousands of versioned files.
+Run from the scripts directory:
+    python -m benchmarks.version_index_benchmark
+"""
+import tempfile
+import timeit
+
+from pathlib import Path
+
+from core.version_index import VersionIndex
+
+NAMES = ('base_mesh_male', 'base_mesh_female', 'prop_crate', 'prop_barrel', 'env_street')
+
+
+def build_tree(directory: Path, version_count: int):
+    """
+    Create name.NNNN.mb files plus an unversioned file per name
+    @param directory:
+    @param version_count:
+    """
+    for name in NAMES:
+        directory.joinpath(f'{name}.mb').touch()
+        for version in range(1, version_count + 1):
+            directory.joinpath(f'{name}.{version}.mb').touch()
+
+
+def legacy_latest(directory: Path, name: str) -> Path:
+    scenes = directory.glob(f'{name}*')
+    scenes = [x for x in scenes if len(x.as_posix().split('.')) == 3]
+    scenes.sort(key=lambda x: x.stem.split('.')[1])
+    return scenes[-1]
+
+
+def run(version_count: int = 1000, repeat: int = 5):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        build_tree(directory, version_count)
+        index = VersionIndex(directory)
+        latest = index.latest('base_mesh_male', '.mb')
+        assert latest.version == version_count, latest
+        assert [x.version for x in index.versions('base_mesh_male')] == list(range(1, version_count + 1))
+        print(f'{len(NAMES) * (version_count + 1)} files, legacy pick: {legacy_latest(directory, "base_mesh_male").name}'
+              f', index pick: {latest.path.name}')
+
+        timings = {
+            'legacy glob + string sort': min(timeit.repeat(
+                lambda: legacy_latest(directory, 'base_mesh_male'), number=1, repeat=repeat)),
+            'index build': min(timeit.repeat(lambda: index.refresh(force=True), number=1, repeat=repeat)),
+            'cached latest': min(timeit.repeat(
+                lambda: index.latest('base_mesh_male', '.mb'), number=1000, repeat=repeat)) / 1000,
+        }
+        directory.joinpath(f'base_mesh_male.{version_count + 1}.mb').touch()
+        assert index.latest('base_mesh_male', '.mb').version == version_count + 1
+
+    for label, seconds in timings.items():
+        print(f'{label:<28}{seconds * 1000:>10.4f} ms')
+
+
+if __name__ == '__main__':
+    run()
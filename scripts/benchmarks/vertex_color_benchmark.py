@@ -0,0 +1,61 @@
+"""
+Time batched vertex color application against the per-face loop it replaced
+
+Needs Maya, run with mayapy from the scripts directory:
+    mayapy -m benchmarks.vertex_color_benchmark
+"""
+import time
+
+from typing import Callable
+
+
+def legacy_apply_vertex_color(obj, faces, color):
+    """The per-face loop prior to batching: one polyColorPerVertex per selected face"""
+    import pymel.core as pm
+
+    for face in faces:
+        pm.polyColorPerVertex(obj.f[int(face)], colorRGB=color, cdo=True)
+
+
+def timed(function: Callable, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run(subdivisions: int = 50):
+    import numpy as np
+    import pymel.core as pm
+
+    from robotools import maya_vertex_colors
+    from robotools.node_utils import set_component_mode, encode_components
+    from robotools.robotools_enums import ComponentType
+
+    face_count = subdivisions * subdivisions
+    timings = {}
+
+    pm.system.newFile(force=True)
+    plane = pm.polyPlane(subdivisionsX=subdivisions, subdivisionsY=subdivisions)[0]
+    timings['per-face loop'] = timed(legacy_apply_vertex_color, plane, range(face_count), (1, 0, 0))
+
+    pm.system.newFile(force=True)
+    plane = pm.polyPlane(subdivisionsX=subdivisions, subdivisionsY=subdivisions)[0]
+    set_component_mode(ComponentType.face)
+    pm.select(encode_components(plane, range(face_count)))
+    timings['apply_vertex_color'] = timed(maya_vertex_colors.apply_vertex_color, (1, 0, 0))
+
+    pm.system.newFile(force=True)
+    plane = pm.polyPlane(subdivisionsX=subdivisions, subdivisionsY=subdivisions)[0]
+    colors = np.random.default_rng(0).random((face_count, 3))
+    timings['apply_face_colors'] = timed(maya_vertex_colors.apply_face_colors, plane, np.arange(face_count), colors)
+
+    print(f'{face_count} faces')
+    for label, seconds in timings.items():
+        print(f'{label:<20}{seconds * 1000:>12.2f} ms')
+
+
+if __name__ == '__main__':
+    import maya.standalone
+
+    maya.standalone.initialize()
+    run()
@@ -0,0 +1,103 @@
+"""
+Check and time grouping faces by vertex color headless
+
+Checks face color averaging, grouping and tolerance matching on synthetic face-vertex colors, including unset
+colors and faces without any, then exact and chunked tolerance matching and key packing validation, then times
+building the color index for a large mesh.
+Run from the scripts directory:
+    python -m benchmarks.vertex_color_groups_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from core.vertex_color_groups import MAX_PACK_BASE, ColorFaceIndex, face_colors_from_face_vertex_colors, \
+    group_faces_by_color, pack_color_keys, quantize_colors
+
+RED, GREEN, BLUE = (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)
+
+
+def check():
+    # a triangle, a quad, a face without vertices and a triangle with one unset face-vertex color
+    face_counts = [3, 4, 0, 3]
+    colors = np.array([RED + (1.0,)] * 3 + [(0.0, 0.5, 0.0, 1.0), (0.0, 1.0, 0.0, 1.0)] * 2 +
+                      [BLUE + (1.0,), (-1.0, -1.0, -1.0, -1.0), BLUE + (1.0,)])
+    face_colors = face_colors_from_face_vertex_colors(colors, face_counts)
+    assert np.allclose(face_colors[:2], [RED, (0.0, 0.75, 0.0)])
+    assert np.isnan(face_colors[2:]).all()
+    assert np.isnan(face_colors_from_face_vertex_colors(np.empty((0, 4)), [0, 0])).all()
+    assert quantize_colors([[0.5, np.nan, 0.25]], 2).tolist() == [[-1, -1, -1]]
+
+    # colors equal after quantization share a group, faces without a color are left out
+    face_colors = np.array([RED, GREEN, (1.0, 0.00001, 0.0), (np.nan,) * 3, GREEN, BLUE])
+    groups = {k: v.tolist() for k, v in group_faces_by_color(face_colors).items()}
+    assert groups == {RED: [0, 2], GREEN: [1, 4], BLUE: [5]}
+    assert {k: v.tolist() for k, v in group_faces_by_color(face_colors, precision=6).items()} == {
+        RED: [0], (1.0, 0.00001, 0.0): [2], GREEN: [1, 4], BLUE: [5]}
+
+    index = ColorFaceIndex.from_face_colors(face_colors)
+    assert index.face_labels[3] == -1
+    assert index.faces_for_colors([RED]).tolist() == [0, 2]
+    assert index.faces_for_colors([(0.9, 0.0, 0.0)]).tolist() == []
+    assert index.faces_for_colors([(0.9, 0.0, 0.0)], tolerance=0.15).tolist() == [0, 2]
+    assert index.faces_for_colors([(0.5, 0.5, 0.0)], tolerance=0.75).tolist() == [0, 1, 2, 4]
+    assert index.faces_matching_faces([3]).tolist() == []
+    assert index.faces_matching_faces([3, 5]).tolist() == [5]
+    assert index.faces_matching_faces([1], tolerance=2.0).tolist() == [0, 1, 2, 4, 5]
+
+    empty = ColorFaceIndex.from_face_colors(np.full((4, 3), np.nan))
+    assert empty.as_dict() == {} and (empty.face_labels == -1).all()
+    assert empty.faces_for_colors([RED], tolerance=1.0).tolist() == []
+    print('vertex color grouping checks out')
+
+
+def check_matching():
+    keys = pack_color_keys([[1, 2, 3], [0, 0, 0]], 10)
+    assert keys.tolist() == [123, 0]
+    assert pack_color_keys([[MAX_PACK_BASE - 1] * 3], MAX_PACK_BASE)[0] == MAX_PACK_BASE ** 3 - 1
+    assert pack_color_keys(np.empty((0, 3)), 1).size == 0
+    for components, base in (([[0, 0, -1]], 10), ([[0, 10, 0]], 10), ([[0, 0, 0]], 0),
+                             ([[0, 0, 0]], MAX_PACK_BASE + 1)):
+        try:
+            pack_color_keys(components, base)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f'{components} packed with base {base}')
+
+    rng = np.random.default_rng(0)
+    palette = np.round(rng.random((300, 3)), 4)
+    index = ColorFaceIndex.from_face_colors(palette[rng.integers(0, len(palette), 5000)])
+    # exact queries match the entry they quantize to, including values above the palette's own key range
+    queries = np.concatenate([palette[:20] + 0.00002, [(2.0, 2.0, 2.0), (np.nan, 0.0, 0.0)]])
+    expected = np.flatnonzero((quantize_colors(index.palette)[:, None] == quantize_colors(palette[:20])).all(2).any(1))
+    assert np.array_equal(index.match(queries), expected) and len(expected) == 20
+    # tolerance matching gives the same entries whatever the query block size
+    distances = np.linalg.norm(queries[:20, None] - index.palette[None], axis=2)
+    expected = np.flatnonzero((distances <= 0.1).any(axis=0))
+    for chunk_size in (1, 7, 4096):
+        assert np.array_equal(index.match(queries, tolerance=0.1, chunk_size=chunk_size), expected)
+    print('color matching and key packing check out')
+
+
+def run(face_count: int = 1_000_000, color_count: int = 256, repeat: int = 5):
+    rng = np.random.default_rng(0)
+    palette = rng.random((color_count, 3))
+    face_colors = palette[rng.integers(0, color_count, face_count)]
+    face_colors[rng.random(face_count) < 0.1] = np.nan
+    index = ColorFaceIndex.from_face_colors(face_colors)
+    timings = {
+        'build index': lambda: ColorFaceIndex.from_face_colors(face_colors),
+        'faces for colors': lambda: index.faces_for_colors(palette[:16]),
+        'faces within tolerance': lambda: index.faces_for_colors(palette[:16], tolerance=0.05),
+    }
+    print(f'{face_count} faces, {len(index.palette)} colors')
+    for label, function in timings.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+        print(f'    {label:<24}{seconds * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    check()
+    check_matching()
+    run()
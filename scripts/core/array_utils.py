@@ -0,0 +1,33 @@
+import numpy as np
+
+
+def expand_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Concatenate the integer ranges [start, start + length) without a Python loop
+    @param starts:
+    @param lengths:
+    @return:
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(total, dtype=np.int64) + shifts
+
+
+def unique_sorted(values: np.ndarray) -> np.ndarray:
+    """
+    Sorted unique values of an integer array
+    Sort-and-mask is consistently fast across NumPy versions, unlike np.unique on large inputs
+    @param values:
+    @return:
+    """
+    values = np.sort(np.asarray(values, dtype=np.int64).ravel())
+    if values.size < 2:
+        return values
+    keep = np.empty(values.size, dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
@@ -0,0 +1,99 @@
+import re
+import numpy as np
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.array_utils import expand_ranges, unique_sorted
+
+
+COMPONENT_PATTERN = re.compile(r'^(?P<node>[^\[\]]+)\.(?P<flag>[A-Za-z]+)\[(?P<start>\d+)(?::(?P<stop>\d+))?\]$')
+FLAG_ALIASES: Dict[str, str] = {
+    'vertex': 'vtx',
+    'edge': 'e',
+    'face': 'f',
+    'uv': 'map',
+}
+
+
+def canonical_flag(flag: str) -> str:
+    """
+    Maya accepts long and short component flags, decoding works on the short form
+    @param flag:
+    @return:
+    """
+    return FLAG_ALIASES.get(flag, flag)
+
+
+def parse_component_string(text: str) -> Optional[Tuple[str, str, int, int]]:
+    """
+    Split a compact component string such as 'mesh.vtx[0:4999]'
+    @param text:
+    @return: node, flag, first index, last index (inclusive), or None for non-component strings
+    """
+    match = COMPONENT_PATTERN.match(text)
+    if not match:
+        return None
+    start = int(match.group('start'))
+    stop = match.group('stop')
+    return match.group('node'), canonical_flag(match.group('flag')), start, int(stop) if stop else start
+
+
+def decode_components(strings: Iterable[str]) -> Dict[Tuple[str, str], np.ndarray]:
+    """
+    Expand compact component strings into index arrays grouped by node and flag
+    Strings that are not single index or range components (objects, vtxFace, [*]) are ignored
+    @param strings:
+    @return: (node, flag) -> sorted unique indices
+    """
+    ranges: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    for text in strings:
+        parsed = parse_component_string(text)
+        if parsed:
+            node, flag, start, stop = parsed
+            ranges.setdefault((node, flag), []).append((start, stop))
+
+    result = {}
+    for key, value in ranges.items():
+        bounds = np.array(value, dtype=np.int64)
+        result[key] = unique_sorted(expand_ranges(bounds[:, 0], bounds[:, 1] - bounds[:, 0] + 1))
+    return result
+
+
+def decode_component_strings(strings: Iterable[str], flag: Optional[str] = None) -> np.ndarray:
+    """
+    Expand compact component strings into a single index array, ignoring node names
+    @param strings:
+    @param flag: only decode components of this flag
+    @return: sorted unique indices
+    """
+    flag = canonical_flag(flag) if flag else None
+    decoded = [value for (_, component_flag), value in decode_components(strings).items()
+               if flag is None or component_flag == flag]
+    return unique_sorted(np.concatenate(decoded)) if decoded else np.empty(0, dtype=np.int64)
+
+
+def encode_ranges(indices: Sequence[int]) -> np.ndarray:
+    """
+    Compress indices into inclusive (first, last) runs
+    @param indices:
+    @return: (N, 2) array of runs
+    """
+    indices = unique_sorted(np.asarray(indices, dtype=np.int64))
+    if indices.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(indices) != 1)
+    starts = np.concatenate([[0], breaks + 1])
+    stops = np.concatenate([breaks, [indices.size - 1]])
+    return np.stack([indices[starts], indices[stops]], axis=1)
+
+
+def encode_component_strings(node: str, flag: str, indices: Sequence[int]) -> List[str]:
+    """
+    Build the minimal list of component strings for a set of indices, e.g. ['mesh.f[17:5000]']
+    @param node:
+    @param flag:
+    @param indices:
+    @return:
+    """
+    return [f'{node}.{flag}[{start}]' if start == stop else f'{node}.{flag}[{start}:{stop}]'
+            for start, stop in encode_ranges(indices).tolist()]
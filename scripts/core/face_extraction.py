@@ -0,0 +1,69 @@
+import numpy as np
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from core.array_utils import unique_sorted
+
+
+@dataclass
+class FaceSplitPlan:
+    """
+    Single pass split of several face sets out of one mesh
+    remainder: source faces in no set, they stay on the source
+    extracted: sorted source faces in any set, a working mesh holding just these is split into the pieces
+    owners: per working face, the first set containing it, which keeps that face
+    copies: per set, working faces it shares with an earlier set and receives a chipped off copy of
+    """
+    remainder: np.ndarray
+    extracted: np.ndarray
+    owners: np.ndarray
+    copies: List[np.ndarray]
+
+    @property
+    def set_count(self) -> int:
+        return len(self.copies)
+
+    def labels(self) -> np.ndarray:
+        """
+        Set index of every working face once the copies have been appended, in order, after the working faces
+        @return:
+        """
+        return np.concatenate([self.owners] + [np.full(len(x), i, dtype=np.int64) for i, x in enumerate(self.copies)])
+
+
+def plan_face_split(face_count: int, face_sets: Sequence[Sequence[int]]) -> FaceSplitPlan:
+    """
+    Plan splitting several face sets out of one mesh without duplicating the mesh per set
+    Each face goes to the first set containing it; every later set containing the same face gets a copy.
+    @param face_count:
+    @param face_sets:
+    @return:
+    """
+    face_sets = [unique_sorted(x) for x in face_sets]
+    owners = np.full(face_count, -1, dtype=np.int64)
+    for i, faces in reversed(list(enumerate(face_sets))):
+        owners[faces] = i
+
+    in_any = owners >= 0
+    extracted = np.flatnonzero(in_any)
+    working_index = np.cumsum(in_any) - 1
+    copies = [working_index[faces[owners[faces] != i]] for i, faces in enumerate(face_sets)]
+    return FaceSplitPlan(remainder=np.flatnonzero(~in_any), extracted=extracted, owners=owners[extracted],
+                         copies=copies)
+
+
+def group_faces_by_label(labels: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    Group face indices by a per-face integer label, e.g. a shader index
+    @param labels: one label per face
+    @return: label -> sorted face indices
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    if labels.size == 0:
+        return {}
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+    boundaries = np.flatnonzero(np.diff(sorted_labels)) + 1
+    return {int(group[0]): faces for group, faces in
+            zip(np.split(sorted_labels, boundaries), np.split(order, boundaries))}
@@ -0,0 +1,484 @@
+"""
+Streaming reader for binary FBX files
+
+Node records are read on demand: iterating a node list reads only record headers, properties and
+children are parsed the first time they are accessed, and compressed array properties are inflated
+straight into NumPy arrays. No Maya or FBX SDK is required.
+"""
+import struct
+import zlib
+import numpy as np
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+FBX_MAGIC: bytes = b'Kaydara FBX Binary  \x00'
+FBX_HEADER_SIZE: int = 27
+NAME_SEPARATOR: str = '\x00\x01'
+ARRAY_TYPES: Dict[str, np.dtype] = {
+    'f': np.dtype('<f4'),
+    'd': np.dtype('<f8'),
+    'l': np.dtype('<i8'),
+    'i': np.dtype('<i4'),
+    'b': np.dtype('?'),
+}
+SCALAR_TYPES: Dict[str, str] = {
+    'Y': '<h',
+    'C': '?',
+    'I': '<i',
+    'F': '<f',
+    'D': '<d',
+    'L': '<q',
+}
+# Model properties and their values when a model adds no transform of its own
+IDENTITY_TRANSFORM: Dict[str, Tuple[float, float, float]] = {
+    'Lcl Translation': (0.0, 0.0, 0.0),
+    'Lcl Rotation': (0.0, 0.0, 0.0),
+    'Lcl Scaling': (1.0, 1.0, 1.0),
+    'PreRotation': (0.0, 0.0, 0.0),
+    'PostRotation': (0.0, 0.0, 0.0),
+    'RotationOffset': (0.0, 0.0, 0.0),
+    'RotationPivot': (0.0, 0.0, 0.0),
+    'ScalingOffset': (0.0, 0.0, 0.0),
+    'ScalingPivot': (0.0, 0.0, 0.0),
+    'GeometricTranslation': (0.0, 0.0, 0.0),
+    'GeometricRotation': (0.0, 0.0, 0.0),
+    'GeometricScaling': (1.0, 1.0, 1.0),
+}
+INDEXED_REFERENCES: Tuple[str, ...] = ('IndexToDirect', 'Index')
+
+
+class FbxError(Exception):
+    pass
+
+
+class FbxNode:
+    """A node record, properties and children are read lazily from the owning reader"""
+
+    __slots__ = ('name', 'end_offset', 'property_count', 'property_offset', 'property_length', '_reader',
+                 '_properties', '_children')
+
+    def __init__(self, reader: 'FbxReader', name: str, end_offset: int, property_count: int,
+                 property_offset: int, property_length: int):
+        self._reader = reader
+        self.name = name
+        self.end_offset = end_offset
+        self.property_count = property_count
+        self.property_offset = property_offset
+        self.property_length = property_length
+        self._properties = None
+        self._children = None
+
+    def __repr__(self):
+        return f'FbxNode({self.name})'
+
+    @property
+    def children_offset(self) -> int:
+        return self.property_offset + self.property_length
+
+    @property
+    def properties(self) -> List[Any]:
+        if self._properties is None:
+            self._properties = self._reader.read_properties(self)
+        return self._properties
+
+    @property
+    def children(self) -> List['FbxNode']:
+        if self._children is None:
+            self._children = list(self.iter_children())
+        return self._children
+
+    def iter_children(self) -> Iterator['FbxNode']:
+        """
+        Walk child record headers without caching them
+        """
+        if self._children is not None:
+            return iter(self._children)
+        return self._reader.iter_nodes(self.children_offset, self.end_offset)
+
+    def find(self, name: str) -> Optional['FbxNode']:
+        """
+        First child with a name
+        @param name:
+        @return:
+        """
+        return next((x for x in self.iter_children() if x.name == name), None)
+
+    def find_all(self, name: str) -> List['FbxNode']:
+        """
+        All children with a name
+        @param name:
+        @return:
+        """
+        return [x for x in self.iter_children() if x.name == name]
+
+    def value(self, name: str, default: Any = None) -> Any:
+        """
+        First property of the first child with a name, e.g. node.value('Vertices')
+        @param name:
+        @param default:
+        @return:
+        """
+        child = self.find(name)
+        return child.properties[0] if child is not None and child.properties else default
+
+
+@dataclass
+class FbxMesh:
+    """
+    Geometry arrays from a Mesh geometry node, face data in Maya's counts/connects layout
+    Layer indices are only set when the layer's ReferenceInformationType is IndexToDirect
+    edges lists the face-vertex each FBX edge starts at, ByEdge smoothing values follow its order
+    """
+    id: int
+    name: str
+    vertices: np.ndarray
+    face_counts: np.ndarray
+    face_connects: np.ndarray
+    normals: Optional[np.ndarray] = None
+    normal_indices: Optional[np.ndarray] = None
+    normal_mapping: Optional[str] = None
+    normal_reference: Optional[str] = None
+    uvs: Optional[np.ndarray] = None
+    uv_indices: Optional[np.ndarray] = None
+    uv_mapping: Optional[str] = None
+    uv_reference: Optional[str] = None
+    uv_set: str = ''
+    material_indices: Optional[np.ndarray] = None
+    material_mapping: Optional[str] = None
+    edges: Optional[np.ndarray] = None
+    smoothing: Optional[np.ndarray] = None
+    smoothing_mapping: Optional[str] = None
+    smoothing_reference: Optional[str] = None
+    layer_names: List[str] = field(default_factory=list)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.face_counts)
+
+
+@dataclass
+class FbxObject:
+    """A Model object and its place in the hierarchy, material_ids in the order layer material indices use"""
+    id: int
+    name: str
+    object_type: str
+    parent_id: int = 0
+    child_ids: List[int] = field(default_factory=list)
+    geometry_ids: List[int] = field(default_factory=list)
+    material_ids: List[int] = field(default_factory=list)
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def has_identity_transform(self) -> bool:
+        return all(np.allclose(self.properties.get(name, default), default)
+                   for name, default in IDENTITY_TRANSFORM.items())
+
+
+@dataclass
+class FbxMaterial:
+    """A Material object and its Properties70 values"""
+    id: int
+    name: str
+    shading_model: str
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+
+def split_name(value: str) -> Tuple[str, str]:
+    """
+    FBX object names are stored as 'Name\\x00\\x01Class'
+    @param value:
+    @return: name, class
+    """
+    name, _, object_class = value.partition(NAME_SEPARATOR)
+    return name, object_class
+
+
+def properties70(node: Optional[FbxNode]) -> Dict[str, Any]:
+    """
+    Values of a node's Properties70 block by property name
+    Each P record holds name, type, label and flags before its values; single values are unpacked
+    @param node:
+    @return:
+    """
+    block = node.find('Properties70') if node is not None else None
+    result = {}
+    for record in block.iter_children() if block is not None else []:
+        values = record.properties[4:]
+        result[record.properties[0]] = values[0] if len(values) == 1 else tuple(values)
+    return result
+
+
+def decode_polygon_vertex_index(polygon_vertex_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    FBX marks the last vertex of each polygon by storing it as -(index + 1)
+    @param polygon_vertex_index:
+    @return: face counts, face connects
+    """
+    polygon_vertex_index = np.asarray(polygon_vertex_index, dtype=np.int64)
+    ends = np.flatnonzero(polygon_vertex_index < 0)
+    face_counts = np.diff(np.concatenate([[-1], ends]))
+    face_connects = np.where(polygon_vertex_index < 0, -polygon_vertex_index - 1, polygon_vertex_index)
+    return face_counts, face_connects
+
+
+def _layer_indices(layer: FbxNode, reference: Optional[str], *names: str) -> Optional[np.ndarray]:
+    """
+    Index array of an IndexToDirect layer element, None for Direct layers
+    @param layer:
+    @param reference: ReferenceInformationType
+    @param names: child names the index array may be stored under
+    @return:
+    """
+    if reference not in INDEXED_REFERENCES:
+        return None
+    for name in names:
+        indices = layer.value(name)
+        if indices is not None:
+            return np.asarray(indices, dtype=np.int64)
+    raise FbxError(f'{layer.name} is {reference} but has no {names[0]}')
+
+
+class FbxReader:
+    """
+    Lazily walks the node records of a binary FBX file
+    Use as a context manager or call close()
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file: BinaryIO = open(self.path, 'rb')
+        header = self._file.read(FBX_HEADER_SIZE)
+        if not header.startswith(FBX_MAGIC):
+            self.close()
+            raise FbxError(f'Not a binary FBX file: {self.path}')
+        self.version: int = struct.unpack('<I', header[23:27])[0]
+        self._wide = self.version >= 7500
+        self._header_format = '<QQQB' if self._wide else '<IIIB'
+        self._header_size = struct.calcsize(self._header_format)
+        self._file.seek(0, 2)
+        self.size: int = self._file.tell()
+        self._nodes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def nodes(self) -> List[FbxNode]:
+        """
+        Top level node records, e.g. FBXHeaderExtension, Objects, Connections
+        """
+        if self._nodes is None:
+            self._nodes = list(self.iter_nodes(FBX_HEADER_SIZE, self.size))
+        return self._nodes
+
+    def find(self, name: str) -> Optional[FbxNode]:
+        return next((x for x in self.nodes if x.name == name), None)
+
+    def iter_nodes(self, offset: int, end: int) -> Iterator[FbxNode]:
+        """
+        Read sibling record headers until the null record or the end offset
+        @param offset:
+        @param end:
+        """
+        while offset + self._header_size <= end:
+            self._file.seek(offset)
+            end_offset, property_count, property_length, name_length = struct.unpack(
+                self._header_format, self._file.read(self._header_size))
+            if end_offset == 0:
+                return
+            name = self._file.read(name_length).decode('ascii', errors='replace')
+            property_offset = offset + self._header_size + name_length
+            yield FbxNode(self, name, end_offset, property_count, property_offset, property_length)
+            offset = end_offset
+
+    def read_properties(self, node: FbxNode) -> List[Any]:
+        """
+        Parse the property list of a node
+        @param node:
+        @return:
+        """
+        self._file.seek(node.property_offset)
+        data = self._file.read(node.property_length)
+        properties = []
+        position = 0
+        for _ in range(node.property_count):
+            type_code = chr(data[position])
+            position += 1
+            if type_code in SCALAR_TYPES:
+                value_format = SCALAR_TYPES[type_code]
+                properties.append(struct.unpack_from(value_format, data, position)[0])
+                position += struct.calcsize(value_format)
+            elif type_code in ARRAY_TYPES:
+                length, encoding, byte_length = struct.unpack_from('<III', data, position)
+                position += 12
+                payload = data[position:position + byte_length]
+                position += byte_length
+                if encoding == 1:
+                    payload = zlib.decompress(payload)
+                properties.append(np.frombuffer(payload, dtype=ARRAY_TYPES[type_code], count=length))
+            elif type_code in ('S', 'R'):
+                length = struct.unpack_from('<I', data, position)[0]
+                position += 4
+                raw = data[position:position + length]
+                position += length
+                properties.append(raw.decode('utf-8', errors='replace') if type_code == 'S' else raw)
+            else:
+                raise FbxError(f'Unknown property type {type_code!r} in {node.name}')
+        return properties
+
+    def objects(self) -> Dict[int, FbxObject]:
+        """
+        Model objects keyed on id, with parent/child and geometry links from the Connections section
+        @return:
+        """
+        objects_node = self.find('Objects')
+        result = {}
+        if objects_node is None:
+            return result
+
+        for node in objects_node.find_all('Model'):
+            object_id, full_name, object_type = node.properties[:3]
+            result[object_id] = FbxObject(id=object_id, name=split_name(full_name)[0], object_type=object_type,
+                                          properties=properties70(node))
+
+        material_ids = set(self.materials())
+        for child_id, parent_id in self.object_connections():
+            if child_id in result:
+                result[child_id].parent_id = parent_id
+                if parent_id in result:
+                    result[parent_id].child_ids.append(child_id)
+            elif parent_id in result:
+                links = result[parent_id].material_ids if child_id in material_ids else result[parent_id].geometry_ids
+                links.append(child_id)
+        return result
+
+    def materials(self) -> Dict[int, FbxMaterial]:
+        """
+        Material objects keyed on id
+        @return:
+        """
+        objects_node = self.find('Objects')
+        result = {}
+        for node in objects_node.find_all('Material') if objects_node is not None else []:
+            material_id, full_name = node.properties[:2]
+            result[material_id] = FbxMaterial(id=material_id, name=split_name(full_name)[0],
+                                              shading_model=str(node.value('ShadingModel', '')).lower(),
+                                              properties=properties70(node))
+        return result
+
+    def global_settings(self) -> Dict[str, Any]:
+        """
+        GlobalSettings values, e.g. UpAxis and UnitScaleFactor
+        @return:
+        """
+        return properties70(self.find('GlobalSettings'))
+
+    def object_connections(self) -> List[Tuple[int, int]]:
+        """
+        Object to object connections as (child id, parent id)
+        @return:
+        """
+        connections_node = self.find('Connections')
+        if connections_node is None:
+            return []
+        connections = []
+        for node in connections_node.find_all('C'):
+            properties = node.properties
+            if properties[0] == 'OO':
+                connections.append((properties[1], properties[2]))
+        return connections
+
+    def hierarchy(self) -> Dict[str, List[str]]:
+        """
+        Model names by parent name, the scene root is ''
+        @return:
+        """
+        objects = self.objects()
+        result = {}
+        for item in objects.values():
+            parent = objects.get(item.parent_id)
+            result.setdefault(parent.name if parent else '', []).append(item.name)
+        return result
+
+    def meshes(self) -> List[FbxMesh]:
+        """
+        Read every Mesh geometry
+        @return:
+        """
+        objects_node = self.find('Objects')
+        if objects_node is None:
+            return []
+        return [self.read_mesh(x) for x in objects_node.find_all('Geometry')
+                if len(x.properties) > 2 and x.properties[2] == 'Mesh']
+
+    def model_meshes(self) -> Dict[str, FbxMesh]:
+        """
+        Meshes keyed on the name of the Model they are connected to, geometry nodes are usually unnamed
+        @return:
+        """
+        meshes = {x.id: x for x in self.meshes()}
+        result = {}
+        for item in self.objects().values():
+            for geometry_id in item.geometry_ids:
+                if geometry_id in meshes:
+                    result[item.name] = meshes[geometry_id]
+        return result
+
+    def read_mesh(self, node: FbxNode) -> FbxMesh:
+        """
+        Build an FbxMesh from a Geometry node
+        @param node:
+        @return:
+        """
+        vertices = np.asarray(node.value('Vertices', np.empty(0)), dtype=np.float64).reshape(-1, 3)
+        face_counts, face_connects = decode_polygon_vertex_index(
+            node.value('PolygonVertexIndex', np.empty(0, dtype=np.int64)))
+        mesh = FbxMesh(id=node.properties[0], name=split_name(node.properties[1])[0], vertices=vertices,
+                       face_counts=face_counts, face_connects=face_connects)
+
+        mesh.layer_names = [x.name for x in node.iter_children() if x.name.startswith('LayerElement')]
+        edges = node.value('Edges')
+        if edges is not None:
+            mesh.edges = np.asarray(edges, dtype=np.int64)
+
+        normal_layer = node.find('LayerElementNormal')
+        if normal_layer is not None:
+            mesh.normals = np.asarray(normal_layer.value('Normals'), dtype=np.float64).reshape(-1, 3)
+            mesh.normal_mapping = normal_layer.value('MappingInformationType')
+            mesh.normal_reference = normal_layer.value('ReferenceInformationType')
+            mesh.normal_indices = _layer_indices(normal_layer, mesh.normal_reference, 'NormalsIndex', 'NormalIndex')
+
+        uv_layer = node.find('LayerElementUV')
+        if uv_layer is not None:
+            mesh.uvs = np.asarray(uv_layer.value('UV'), dtype=np.float64).reshape(-1, 2)
+            mesh.uv_mapping = uv_layer.value('MappingInformationType')
+            mesh.uv_reference = uv_layer.value('ReferenceInformationType')
+            mesh.uv_indices = _layer_indices(uv_layer, mesh.uv_reference, 'UVIndex')
+            mesh.uv_set = uv_layer.value('Name', '')
+
+        material_layer = node.find('LayerElementMaterial')
+        if material_layer is not None:
+            mesh.material_mapping = material_layer.value('MappingInformationType')
+            mesh.material_indices = np.asarray(material_layer.value('Materials', np.zeros(1)), dtype=np.int64)
+
+        smoothing_layer = node.find('LayerElementSmoothing')
+        if smoothing_layer is not None:
+            mesh.smoothing = np.asarray(smoothing_layer.value('Smoothing', np.empty(0)), dtype=np.int64)
+            mesh.smoothing_mapping = smoothing_layer.value('MappingInformationType')
+            mesh.smoothing_reference = smoothing_layer.value('ReferenceInformationType')
+
+        return mesh
+
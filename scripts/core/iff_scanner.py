@@ -0,0 +1,250 @@
+"""
+Headless scanner for Maya binary (.mb) scene files
+
+Maya binary files are IFF chunk trees (FOR4 for 32-bit, FOR8 for 64-bit headers). The file is memory-mapped and
+only chunk headers are visited; payloads are sliced out on request, so scene metadata can be triaged without Maya.
+"""
+import mmap
+import struct
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+GROUP_TAGS: Dict[str, tuple] = {
+    'FOR4': ('FOR4', 'LIS4', 'CAT4', 'PRO4'),
+    'FOR8': ('FOR8', 'LIS8', 'CAT8', 'PRO8'),
+}
+HEADER_FORMATS: Dict[str, str] = {'FOR4': '>4sI', 'FOR8': '>4s4xQ'}
+ALIGNMENTS: Dict[str, int] = {'FOR4': 4, 'FOR8': 8}
+# node type of some common IFF node tags, nodes of any other type are still counted by their tag
+NODE_TYPE_TAGS: Dict[str, str] = {
+    'XFRM': 'transform',
+    'DMSH': 'mesh',
+    'DCAM': 'camera',
+    'JOIN': 'joint',
+    'RLLK': 'lightLinker',
+    'SDML': 'shapeEditorManager',
+    'PSDM': 'poseInterpolatorManager',
+    'DPLM': 'displayLayerManager',
+    'DSPL': 'displayLayer',
+    'RNLM': 'renderLayerManager',
+    'RNDL': 'renderLayer',
+    'RLAM': 'lambert',
+    'SHAD': 'shadingEngine',
+    'DMTI': 'materialInfo',
+    'SCRP': 'script',
+    'NGEI': 'nodeGraphEditorInfo',
+}
+UNKNOWN_NODE_TYPE: str = 'unknown'
+
+
+class IffError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class IffChunk:
+    """Chunk header, data_offset points past the header (and past the form type for groups)"""
+    tag: str
+    offset: int
+    data_offset: int
+    size: int
+    form_type: Optional[str] = None
+
+    @property
+    def is_group(self) -> bool:
+        return self.form_type is not None
+
+    @property
+    def end(self) -> int:
+        return self.data_offset + self.size - (4 if self.is_group else 0)
+
+
+@dataclass
+class SceneInfo:
+    """Metadata gathered from a scene without loading it"""
+    path: Path
+    version: str = ''
+    file_info: Dict[str, str] = field(default_factory=dict)
+    units: Dict[str, str] = field(default_factory=dict)
+    plug_ins: Dict[str, str] = field(default_factory=dict)
+    references: List[str] = field(default_factory=list)
+    node_tag_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def node_count(self) -> int:
+        return sum(self.node_tag_counts.values())
+
+    @property
+    def node_type_counts(self) -> Dict[str, int]:
+        """
+        Node counts by type name for the tags in NODE_TYPE_TAGS, every other tag is counted under UNKNOWN_NODE_TYPE
+        @return:
+        """
+        counts = {}
+        for tag, count in self.node_tag_counts.items():
+            node_type = NODE_TYPE_TAGS.get(tag, UNKNOWN_NODE_TYPE)
+            counts[node_type] = counts.get(node_type, 0) + count
+        return dict(sorted(counts.items(), key=lambda x: (-x[1], x[0])))
+
+
+class IffScanner:
+    """
+    Walks the chunk tree of a memory-mapped IFF file
+    Use as a context manager or call close()
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise IffError(f'Empty file: {self.path}')
+        self.flavour = self._map[:4].decode('ascii', errors='replace')
+        if self.flavour not in GROUP_TAGS:
+            self.close()
+            raise IffError(f'Not a Maya binary file: {self.path}')
+        self._header_format = HEADER_FORMATS[self.flavour]
+        self._header_size = struct.calcsize(self._header_format)
+        self._group_tags = GROUP_TAGS[self.flavour]
+        self._alignment = ALIGNMENTS[self.flavour]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def root(self) -> IffChunk:
+        return next(self.iter_chunks(0, len(self._map)))
+
+    def _align(self, value: int) -> int:
+        return (value + self._alignment - 1) & ~(self._alignment - 1)
+
+    def iter_chunks(self, offset: int, end: int) -> Iterator[IffChunk]:
+        """
+        Read sibling chunk headers between two offsets
+        Data chunks are padded to the alignment, group chunks are already aligned by their contents
+        @param offset:
+        @param end:
+        """
+        while offset + self._header_size <= end:
+            tag, size = struct.unpack_from(self._header_format, self._map, offset)
+            tag = tag.decode('ascii', errors='replace')
+            data_offset = offset + self._header_size
+            if tag in self._group_tags:
+                form_type = self._map[data_offset:data_offset + 4].decode('ascii', errors='replace')
+                yield IffChunk(tag=tag, offset=offset, data_offset=data_offset + 4, size=size, form_type=form_type)
+                offset = data_offset + 4 + self._align(size - 4)
+            else:
+                yield IffChunk(tag=tag, offset=offset, data_offset=data_offset, size=size)
+                offset = data_offset + self._align(size)
+
+    def children(self, chunk: IffChunk) -> Iterator[IffChunk]:
+        """
+        Child chunks of a group
+        @param chunk:
+        """
+        if not chunk.is_group:
+            return iter(())
+        return self.iter_chunks(chunk.data_offset, chunk.end)
+
+    def walk(self, chunk: Optional[IffChunk] = None) -> Iterator[IffChunk]:
+        """
+        Depth first walk of every chunk below a group
+        @param chunk: defaults to the root form
+        """
+        stack = [chunk or self.root]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(list(self.children(current))))
+
+    def payload(self, chunk: IffChunk) -> bytes:
+        """
+        Copy out the data of a chunk
+        @param chunk:
+        @return:
+        """
+        return self._map[chunk.data_offset:chunk.end]
+
+    def strings(self, chunk: IffChunk) -> List[str]:
+        """
+        Null separated strings stored in a chunk
+        @param chunk:
+        @return:
+        """
+        return [x.decode('utf-8', errors='replace') for x in self.payload(chunk).split(b'\x00') if x]
+
+
+def scan_scene(path: Path) -> SceneInfo:
+    """
+    Collect version, plug-ins, references and node counts from a Maya binary scene
+    Only the header chunks and reference chunks are read, node forms are counted from their headers by IFF tag
+    @param path:
+    @return:
+    """
+    info = SceneInfo(path=Path(path))
+    node_tag_counts = {}
+
+    with IffScanner(path) as scanner:
+        for chunk in scanner.children(scanner.root):
+            if chunk.form_type == 'HEAD':
+                _read_header(scanner, chunk, info)
+            elif chunk.tag == 'FREF':
+                info.references.append(_reference_path(scanner.strings(chunk)))
+            elif chunk.is_group:
+                first = next(scanner.children(chunk), None)
+                if first is not None and first.tag == 'CREA':
+                    node_tag_counts[chunk.form_type] = node_tag_counts.get(chunk.form_type, 0) + 1
+                for child in scanner.children(chunk):
+                    if child.tag == 'FREF':
+                        info.references.append(_reference_path(scanner.strings(child)))
+
+    info.node_tag_counts = dict(sorted(node_tag_counts.items(), key=lambda x: (-x[1], x[0])))
+    return info
+
+
+def _read_header(scanner: IffScanner, head: IffChunk, info: SceneInfo):
+    """
+    Fill scene info from the HEAD form
+    @param scanner:
+    @param head:
+    @param info:
+    """
+    units = {'LUNI': 'linear', 'AUNI': 'angle', 'TUNI': 'time'}
+    for chunk in scanner.children(head):
+        if chunk.tag == 'VERS':
+            info.version = scanner.payload(chunk).rstrip(b'\x00').decode('ascii', errors='replace')
+        elif chunk.tag in units:
+            info.units[units[chunk.tag]] = scanner.payload(chunk).rstrip(b'\x00').decode('ascii', errors='replace')
+        elif chunk.tag == 'PLUG':
+            values = scanner.strings(chunk)
+            if values:
+                info.plug_ins[values[0]] = values[1] if len(values) > 1 else ''
+        elif chunk.tag == 'FINF':
+            values = scanner.strings(chunk)
+            if values:
+                info.file_info[values[0]] = values[1] if len(values) > 1 else ''
+        elif chunk.tag == 'FREF':
+            info.references.append(_reference_path(scanner.strings(chunk)))
+
+
+def _reference_path(values: List[str]) -> str:
+    """
+    Reference chunks hold the file -r flag values, the file path is the last string
+    @param values:
+    @return:
+    """
+    return values[-1] if values else ''
@@ -0,0 +1,31 @@
+"""
+Module attributes resolved on first access instead of at import
+
+Modules that used to query Maya while importing keep those names importable through a module level __getattr__
+(PEP 562) built here:
+    __getattr__ = lazy_attributes(__name__, {'MAYA_MAIN_WINDOW': get_maya_main_window})
+"""
+from typing import Any, Callable, Dict
+
+
+def lazy_attributes(module_name: str, accessors: Dict[str, Callable[[], Any]],
+                    cached: bool = True) -> Callable[[str], Any]:
+    """
+    Build a module __getattr__ resolving attribute names through accessor functions
+    @param module_name:
+    @param accessors: attribute name -> function returning its value
+    @param cached: keep the first value of each attribute, otherwise every access calls its accessor
+    @return:
+    """
+    values: Dict[str, Any] = {}
+
+    def __getattr__(name: str) -> Any:
+        if name not in accessors:
+            raise AttributeError(f'module {module_name!r} has no attribute {name!r}')
+        if not cached:
+            return accessors[name]()
+        if name not in values:
+            values[name] = accessors[name]()
+        return values[name]
+
+    return __getattr__
@@ -0,0 +1,399 @@
+"""
+On-disk cache of mesh arrays generated from FBX models
+
+Each source file gets an entry directory named after its SHA-1 holding one raw .npy file per array plus a JSON
+manifest. Arrays are memory-mapped on load, so a cache hit costs a few file opens. An index of source path, size and
+mtime avoids rehashing unchanged sources.
+
+Only files the arrays reproduce exactly are cached: unparented, untransformed mesh models in Maya's default axes and
+units, with lambert materials and no textures. Anything else raises FbxError so callers fall back to the FBX importer.
+"""
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.fbx_reader import FbxError, FbxMaterial, FbxMesh, FbxReader
+
+CACHE_FORMAT_VERSION: int = 3
+MANIFEST_NAME: str = 'manifest.json'
+INDEX_NAME: str = 'index.json'
+MESH_ARRAYS = ('points', 'face_counts', 'face_connects', 'u_values', 'v_values', 'uv_counts', 'uv_ids', 'normals',
+               'normal_ids', 'material_ids', 'hard_edge_slots')
+# GlobalSettings of a Y up, centimetre scene, which the importer brings in unchanged
+MAYA_GLOBAL_SETTINGS: Dict[str, float] = {
+    'UpAxis': 1,
+    'UpAxisSign': 1,
+    'FrontAxis': 2,
+    'FrontAxisSign': 1,
+    'CoordAxis': 0,
+    'CoordAxisSign': 1,
+    'UnitScaleFactor': 1.0,
+}
+SUPPORTED_LAYERS: Tuple[str, ...] = ('LayerElementNormal', 'LayerElementUV', 'LayerElementMaterial',
+                                     'LayerElementSmoothing', 'LayerElementBinormal', 'LayerElementTangent')
+TEXTURE_OBJECTS: Tuple[str, ...] = ('Texture', 'Video', 'LayeredTexture')
+Color = Tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class MaterialSpec:
+    """Lambert attributes of an FBX material, as the importer sets them"""
+    name: str
+    color: Color = (0.5, 0.5, 0.5)
+    diffuse: float = 0.8
+    ambient_color: Color = (0.0, 0.0, 0.0)
+    incandescence: Color = (0.0, 0.0, 0.0)
+    transparency: Color = (0.0, 0.0, 0.0)
+
+
+@dataclass
+class MeshArrays:
+    """
+    Mesh data laid out for MFnMesh.create / assignUVs / setFaceVertexNormals
+    material_ids index materials per face
+    hard_edge_slots are the face-vertices whose edge to the next vertex of the face is hard, every other edge is
+    smooth; None when the source has no smoothing
+    """
+    name: str
+    points: np.ndarray
+    face_counts: np.ndarray
+    face_connects: np.ndarray
+    u_values: Optional[np.ndarray] = None
+    v_values: Optional[np.ndarray] = None
+    uv_counts: Optional[np.ndarray] = None
+    uv_ids: Optional[np.ndarray] = None
+    uv_set: str = ''
+    normals: Optional[np.ndarray] = None
+    normal_ids: Optional[np.ndarray] = None
+    material_ids: Optional[np.ndarray] = None
+    hard_edge_slots: Optional[np.ndarray] = None
+    materials: List[MaterialSpec] = field(default_factory=list)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.points)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.face_counts)
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-1 of a file's contents
+    @param path:
+    @param chunk_size:
+    @return:
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _layer_ids(name: str, mapping: Optional[str], reference: Optional[str], indices: Optional[np.ndarray],
+               face_counts: np.ndarray, face_connects: np.ndarray) -> np.ndarray:
+    """
+    Expand an FBX layer element to one id per face-vertex
+    @param name: layer name for errors
+    @param mapping: MappingInformationType
+    @param reference: ReferenceInformationType, the indices are only used when IndexToDirect
+    @param indices: IndexToDirect indices
+    @param face_counts:
+    @param face_connects:
+    @return:
+    """
+    if mapping == 'ByPolygonVertex':
+        element_ids = np.arange(face_connects.size)
+    elif mapping in ('ByVertice', 'ByVertex'):
+        element_ids = face_connects
+    elif mapping == 'ByPolygon':
+        element_ids = np.repeat(np.arange(face_counts.size), face_counts)
+    elif mapping == 'AllSame':
+        element_ids = np.zeros(face_connects.size, dtype=np.int64)
+    else:
+        raise FbxError(f'Unsupported {name} mapping {mapping}')
+
+    if reference == 'Direct':
+        return np.asarray(element_ids, dtype=np.int32)
+    if indices is None:
+        raise FbxError(f'Unsupported {name} reference {reference}')
+    return np.asarray(np.asarray(indices)[element_ids], dtype=np.int32)
+
+
+def _hard_edge_slots(mesh: FbxMesh) -> np.ndarray:
+    """
+    Face-vertices starting the edges an FBX smoothing layer marks hard
+    Only ByEdge smoothing is reproduced, smoothing groups need the importer
+    @param mesh:
+    @return:
+    """
+    if mesh.smoothing_mapping != 'ByEdge' or mesh.smoothing_reference != 'Direct':
+        raise FbxError(f'Unsupported smoothing mapping {mesh.smoothing_mapping} {mesh.smoothing_reference}')
+    if mesh.edges is None or len(mesh.edges) != len(mesh.smoothing):
+        raise FbxError('Smoothing does not match the mesh edges')
+    slots = mesh.edges[mesh.smoothing == 0]
+    if slots.size and (slots.min() < 0 or slots.max() >= mesh.face_connects.size):
+        raise FbxError('Mesh edges reference missing face-vertices')
+    return np.ascontiguousarray(slots, dtype=np.int32)
+
+
+def material_spec(material: FbxMaterial) -> MaterialSpec:
+    """
+    Lambert attributes of an FBX material, colors scaled by their factors
+    @param material:
+    @return:
+    """
+    properties = material.properties
+
+    def scaled(color_name: str, factor_name: str, default: Color, default_factor: float = 1.0) -> Color:
+        color = np.asarray(properties.get(color_name, default), dtype=np.float64)
+        return tuple((color * float(properties.get(factor_name, default_factor))).tolist())
+
+    return MaterialSpec(name=material.name, color=tuple(properties.get('DiffuseColor', MaterialSpec.color)),
+                        diffuse=float(properties.get('DiffuseFactor', MaterialSpec.diffuse)),
+                        ambient_color=scaled('AmbientColor', 'AmbientFactor', MaterialSpec.ambient_color),
+                        incandescence=scaled('EmissiveColor', 'EmissiveFactor', MaterialSpec.incandescence),
+                        transparency=scaled('TransparentColor', 'TransparencyFactor', MaterialSpec.transparency))
+
+
+def mesh_arrays_from_fbx(mesh: FbxMesh, name: Optional[str] = None,
+                         materials: Optional[List[MaterialSpec]] = None) -> MeshArrays:
+    """
+    Convert FBX geometry into per face-vertex uv and normal ids, per face material ids and hard edges
+    @param mesh:
+    @param name: defaults to the geometry name
+    @param materials: the model's materials, in connection order
+    @return:
+    """
+    face_counts = mesh.face_counts.astype(np.int32)
+    face_connects = mesh.face_connects.astype(np.int32)
+    result = MeshArrays(name=name or mesh.name, points=np.ascontiguousarray(mesh.vertices, dtype=np.float64),
+                        face_counts=face_counts, face_connects=face_connects)
+
+    if mesh.uvs is not None:
+        result.u_values = np.ascontiguousarray(mesh.uvs[:, 0], dtype=np.float32)
+        result.v_values = np.ascontiguousarray(mesh.uvs[:, 1], dtype=np.float32)
+        result.uv_counts = face_counts
+        result.uv_ids = _layer_ids('uv', mesh.uv_mapping, mesh.uv_reference, mesh.uv_indices, face_counts,
+                                   face_connects)
+        result.uv_set = mesh.uv_set
+
+    if mesh.normals is not None:
+        result.normals = np.ascontiguousarray(mesh.normals, dtype=np.float32)
+        result.normal_ids = _layer_ids('normal', mesh.normal_mapping, mesh.normal_reference, mesh.normal_indices,
+                                       face_counts, face_connects)
+
+    if mesh.smoothing is not None:
+        result.hard_edge_slots = _hard_edge_slots(mesh)
+
+    if materials:
+        result.materials = list(materials)
+        if mesh.material_indices is not None:
+            slot_ids = _layer_ids('material', mesh.material_mapping, 'IndexToDirect', mesh.material_indices,
+                                  face_counts, face_connects)
+            result.material_ids = np.ascontiguousarray(slot_ids[np.cumsum(face_counts) - face_counts])
+        else:
+            result.material_ids = np.zeros(len(face_counts), dtype=np.int32)
+        if result.material_ids.size and result.material_ids.max() >= len(materials):
+            raise FbxError(f'{result.name} uses more materials than are connected to it')
+
+    return result
+
+
+def unsupported_reason(reader: FbxReader) -> Optional[str]:
+    """
+    Why an FBX file cannot be rebuilt from cached arrays exactly, None if it can
+    @param reader:
+    @return:
+    """
+    settings = reader.global_settings()
+    for setting, expected in MAYA_GLOBAL_SETTINGS.items():
+        if not np.isclose(settings.get(setting, expected), expected):
+            return f'GlobalSettings {setting} is {settings[setting]}'
+
+    objects_node = reader.find('Objects')
+    if objects_node is not None and any(x.name in TEXTURE_OBJECTS for x in objects_node.iter_children()):
+        return 'materials use textures'
+    unsupported_materials = [x.name for x in reader.materials().values() if x.shading_model != 'lambert']
+    if unsupported_materials:
+        return f'materials {unsupported_materials} are not lambert'
+
+    meshes = {x.id: x for x in reader.meshes()}
+    for item in reader.objects().values():
+        if item.object_type != 'Mesh' or item.parent_id != 0 or item.child_ids:
+            return f'model {item.name} is not an unparented mesh'
+        if not item.has_identity_transform:
+            return f'model {item.name} has a transform'
+        if len([x for x in item.geometry_ids if x in meshes]) != 1:
+            return f'model {item.name} does not have exactly one mesh'
+    for mesh in meshes.values():
+        unsupported_layers = [x for x in mesh.layer_names if x not in SUPPORTED_LAYERS]
+        if unsupported_layers or mesh.layer_names.count('LayerElementUV') > 1:
+            return f'mesh layers {mesh.layer_names} are not supported'
+    return None
+
+
+def read_fbx_meshes(path: Path) -> List[MeshArrays]:
+    """
+    Read every mesh in an FBX file, named after its model
+    Raises FbxError if the meshes alone cannot reproduce the file
+    @param path:
+    @return:
+    """
+    with FbxReader(path) as reader:
+        reason = unsupported_reason(reader)
+        if reason:
+            raise FbxError(f'{Path(path).name} needs the FBX importer: {reason}')
+        materials = {x.id: material_spec(x) for x in reader.materials().values()}
+        meshes = {x.id: x for x in reader.meshes()}
+        result = []
+        for item in reader.objects().values():
+            mesh = next(meshes[x] for x in item.geometry_ids if x in meshes)
+            result.append(mesh_arrays_from_fbx(mesh, item.name, [materials[x] for x in item.material_ids]))
+        return result
+
+
+class MeshCache:
+    """
+    Directory of cached meshes keyed on the SHA-1 of their source file
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self._index: Optional[Dict[str, dict]] = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir.joinpath(INDEX_NAME)
+
+    def _load_index(self) -> Dict[str, dict]:
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_path.read_text())
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(self._load_index(), indent=1, sort_keys=True))
+        os.replace(temp_path, self.index_path)
+
+    def source_hash(self, source_path: Path) -> str:
+        """
+        Hash of a source file, reused from the index while its size and mtime are unchanged
+        @param source_path:
+        @return:
+        """
+        source_path = Path(source_path)
+        stat = source_path.stat()
+        key = source_path.resolve().as_posix()
+        entry = self._load_index().get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha1']
+        sha1 = file_hash(source_path)
+        self._load_index()[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': sha1}
+        self._save_index()
+        return sha1
+
+    def entry_dir(self, sha1: str) -> Path:
+        return self.cache_dir.joinpath(sha1)
+
+    def read(self, source_path: Path, mmap: bool = True) -> Optional[List[MeshArrays]]:
+        """
+        Cached meshes for a source file, None on a cache miss
+        @param source_path:
+        @param mmap: memory-map arrays instead of reading them
+        @return:
+        """
+        entry_dir = self.entry_dir(self.source_hash(source_path))
+        try:
+            manifest = json.loads(entry_dir.joinpath(MANIFEST_NAME).read_text())
+        except (OSError, ValueError):
+            return None
+        if manifest.get('format') != CACHE_FORMAT_VERSION:
+            return None
+
+        meshes = []
+        try:
+            for mesh_index, mesh_entry in enumerate(manifest['meshes']):
+                arrays = {name: np.load(entry_dir.joinpath(f'{mesh_index}_{name}.npy'),
+                                        mmap_mode='r' if mmap else None)
+                          for name in mesh_entry['arrays']}
+                materials = [MaterialSpec(**{k: tuple(v) if isinstance(v, list) else v for k, v in x.items()})
+                             for x in mesh_entry.get('materials', [])]
+                meshes.append(MeshArrays(name=mesh_entry['name'], uv_set=mesh_entry.get('uv_set', ''),
+                                         materials=materials, **arrays))
+        except (OSError, ValueError, TypeError):
+            return None
+        return meshes
+
+    def write(self, source_path: Path, meshes: List[MeshArrays]) -> Path:
+        """
+        Store meshes for a source file, replacing any existing entry
+        The entry is written to a temporary directory and renamed so readers never see a partial entry
+        @param source_path:
+        @param meshes:
+        @return: entry directory
+        """
+        sha1 = self.source_hash(source_path)
+        entry_dir = self.entry_dir(sha1)
+        temp_dir = self.cache_dir.joinpath(f'{sha1}.tmp')
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        temp_dir.mkdir(parents=True)
+
+        manifest = {'format': CACHE_FORMAT_VERSION, 'source': Path(source_path).name, 'sha1': sha1, 'meshes': []}
+        for mesh_index, mesh in enumerate(meshes):
+            names = [x for x in MESH_ARRAYS if getattr(mesh, x) is not None]
+            for name in names:
+                np.save(temp_dir.joinpath(f'{mesh_index}_{name}.npy'), np.ascontiguousarray(getattr(mesh, name)))
+            manifest['meshes'].append({'name': mesh.name, 'arrays': names, 'vertex_count': mesh.vertex_count,
+                                       'face_count': mesh.face_count, 'uv_set': mesh.uv_set,
+                                       'materials': [asdict(x) for x in mesh.materials]})
+        temp_dir.joinpath(MANIFEST_NAME).write_text(json.dumps(manifest, indent=1))
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(temp_dir, entry_dir)
+        return entry_dir
+
+    def load(self, source_path: Path) -> List[MeshArrays]:
+        """
+        Cached meshes for an FBX file, reading the FBX and filling the cache on a miss
+        Raises FbxError if the source cannot be read headlessly or needs the FBX importer
+        @param source_path:
+        @return:
+        """
+        meshes = self.read(source_path)
+        if meshes is None:
+            self.write(source_path, read_fbx_meshes(source_path))
+            meshes = self.read(source_path)
+        return meshes
+
+    def prune(self, keep_sources: Optional[List[Path]] = None) -> int:
+        """
+        Delete entries that no indexed source points at any more
+        @param keep_sources: sources to re-hash before pruning, e.g. the shipped models
+        @return: number of entries removed
+        """
+        for source_path in keep_sources or []:
+            self.source_hash(source_path)
+        index = self._load_index()
+        for key in [x for x in index if not Path(x).exists()]:
+            del index[key]
+        self._save_index()
+        live = {x['sha1'] for x in index.values()}
+        removed = 0
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.is_dir() and entry_dir.name not in live:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                removed += 1
+        return removed
@@ -0,0 +1,225 @@
+import numpy as np
+
+from typing import Optional, Sequence, Tuple, Union
+
+from core.array_utils import expand_ranges, unique_sorted
+
+
+IndexInput = Union[int, Sequence[int], np.ndarray]
+COMPONENT_TYPES: Tuple[str, ...] = ('vertex', 'edge', 'face', 'uv')
+
+
+def csr_from_pairs(rows: np.ndarray, cols: np.ndarray, row_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a compressed sparse row adjacency from (row, col) pairs
+    @param rows:
+    @param cols:
+    @param row_count:
+    @return: offsets (row_count + 1) and column indices sorted by row
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    order = np.lexsort((cols, rows))
+    offsets = np.zeros(row_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=row_count), out=offsets[1:])
+    return offsets, cols[order]
+
+
+def csr_gather(offsets: np.ndarray, indices: np.ndarray, rows: IndexInput) -> np.ndarray:
+    """
+    Collect the sorted, unique column indices for a set of rows
+    @param offsets:
+    @param indices:
+    @param rows:
+    @return:
+    """
+    rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+    starts = offsets[rows]
+    return unique_sorted(indices[expand_ranges(starts, offsets[rows + 1] - starts)])
+
+
+def slot_edge_vertices(face_counts: Sequence[int], face_connects: Sequence[int], slot_edges: Sequence[int],
+                       edge_count: int) -> np.ndarray:
+    """
+    Edge vertex pairs from the edge id each face-vertex starts, as MItMeshPolygon.getEdges or polyInfo -faceToEdge
+    list them: the i-th edge of a face runs from its i-th vertex to the next
+    @param face_counts:
+    @param face_connects:
+    @param slot_edges: one edge id per face-vertex
+    @param edge_count:
+    @return: (edge_count, 2)
+    """
+    face_counts = np.asarray(face_counts, dtype=np.int64)
+    face_connects = np.asarray(face_connects, dtype=np.int64)
+    slot_edges = np.asarray(slot_edges, dtype=np.int64)
+    if slot_edges.size != face_connects.size:
+        raise ValueError(f'Expected {face_connects.size} face-vertex edge ids, got {slot_edges.size}')
+
+    face_starts = np.repeat(np.cumsum(face_counts) - face_counts, face_counts)
+    positions = np.arange(face_connects.size, dtype=np.int64) - face_starts
+    slot_next = face_starts + (positions + 1) % np.repeat(face_counts, face_counts)
+    pairs = np.sort(np.stack([face_connects, face_connects[slot_next]], axis=1), axis=1)
+    edge_vertices = np.full((edge_count, 2), -1, dtype=np.int64)
+    edge_vertices[slot_edges] = pairs
+    if (edge_vertices < 0).any() or not np.array_equal(edge_vertices[slot_edges], pairs):
+        raise ValueError('Face-vertex edge ids do not describe a consistent edge list')
+    return edge_vertices
+
+
+class MeshTopology:
+    """
+    Adjacency index for a polygon mesh built from Maya style face counts and face connects
+
+    All adjacency is stored as CSR arrays (offsets, indices) so queries are array lookups.
+    Edge ids follow edge_vertices when supplied, otherwise edges are numbered by sorted vertex pair.
+    """
+
+    def __init__(self, face_counts: Sequence[int], face_connects: Sequence[int],
+                 edge_vertices: Optional[np.ndarray] = None, vertex_count: Optional[int] = None):
+        self.face_counts = np.asarray(face_counts, dtype=np.int64)
+        self.face_connects = np.asarray(face_connects, dtype=np.int64)
+        self.face_count = int(self.face_counts.size)
+        self.vertex_count = int(vertex_count if vertex_count is not None else
+                                (self.face_connects.max() + 1 if self.face_connects.size else 0))
+
+        # face -> vertex, one slot per face-vertex
+        self.face_offsets = np.zeros(self.face_count + 1, dtype=np.int64)
+        np.cumsum(self.face_counts, out=self.face_offsets[1:])
+        self.slot_faces = np.repeat(np.arange(self.face_count, dtype=np.int64), self.face_counts)
+
+        # each slot owns the edge running to the next vertex of its face
+        slot_next = np.arange(self.face_connects.size, dtype=np.int64) + 1
+        face_ends = self.face_offsets[1:]
+        slot_next[face_ends[self.face_counts > 0] - 1] = self.face_offsets[:-1][self.face_counts > 0]
+        self.slot_next = slot_next
+        self.slot_previous = np.empty_like(slot_next)
+        self.slot_previous[slot_next] = np.arange(slot_next.size, dtype=np.int64)
+        self.slot_uvs = np.full(self.face_connects.size, -1, dtype=np.int64)
+        self.uv_count = 0
+        slot_pairs = np.sort(np.stack([self.face_connects, self.face_connects[slot_next]], axis=1), axis=1)
+        slot_keys = slot_pairs[:, 0] * self.vertex_count + slot_pairs[:, 1]
+
+        if edge_vertices is None:
+            edge_keys, self.slot_edges = np.unique(slot_keys, return_inverse=True)
+            self.edge_vertices = np.stack([edge_keys // self.vertex_count, edge_keys % self.vertex_count], axis=1)
+        else:
+            self.edge_vertices = np.asarray(edge_vertices, dtype=np.int64).reshape(-1, 2)
+            edge_pairs = np.sort(self.edge_vertices, axis=1)
+            edge_keys = edge_pairs[:, 0] * self.vertex_count + edge_pairs[:, 1]
+            order = np.argsort(edge_keys)
+            positions = np.searchsorted(edge_keys[order], slot_keys)
+            self.slot_edges = order[np.minimum(positions, order.size - 1)]
+        self.slot_edges = self.slot_edges.astype(np.int64).ravel()
+        self.edge_count = int(self.edge_vertices.shape[0])
+
+        edge_rows = np.repeat(np.arange(self.edge_count, dtype=np.int64), 2)
+        self.vertex_edge_offsets, self.vertex_edges = csr_from_pairs(
+            self.edge_vertices.ravel(), edge_rows, self.vertex_count)
+        self.edge_face_offsets, self.edge_faces = csr_from_pairs(self.slot_edges, self.slot_faces, self.edge_count)
+        self.vertex_face_offsets, self.vertex_faces = csr_from_pairs(
+            self.face_connects, self.slot_faces, self.vertex_count)
+
+    def set_uvs(self, uv_counts: Sequence[int], uv_ids: Sequence[int], uv_count: int):
+        """
+        Assign uv ids to face-vertices, as returned by MFnMesh.getAssignedUVs
+        Faces with a uv count of zero have no uvs
+        @param uv_counts:
+        @param uv_ids:
+        @param uv_count: total number of uvs in the uv set
+        """
+        mapped = np.repeat(np.asarray(uv_counts, dtype=np.int64) > 0, self.face_counts)
+        self.slot_uvs = np.full(self.face_connects.size, -1, dtype=np.int64)
+        self.slot_uvs[mapped] = np.asarray(uv_ids, dtype=np.int64)
+        self.uv_count = int(uv_count)
+
+    @property
+    def signature(self) -> Tuple[int, int, int]:
+        return self.vertex_count, self.edge_count, self.face_count
+
+    def vertices_from_faces(self, faces: IndexInput) -> np.ndarray:
+        return csr_gather(self.face_offsets, self.face_connects, faces)
+
+    def edges_from_faces(self, faces: IndexInput) -> np.ndarray:
+        return csr_gather(self.face_offsets, self.slot_edges, faces)
+
+    def faces_from_edges(self, edges: IndexInput) -> np.ndarray:
+        return csr_gather(self.edge_face_offsets, self.edge_faces, edges)
+
+    def vertices_from_edges(self, edges: IndexInput) -> np.ndarray:
+        edges = np.atleast_1d(np.asarray(edges, dtype=np.int64))
+        return unique_sorted(self.edge_vertices[edges])
+
+    def edges_from_vertices(self, vertices: IndexInput) -> np.ndarray:
+        return csr_gather(self.vertex_edge_offsets, self.vertex_edges, vertices)
+
+    def faces_from_vertices(self, vertices: IndexInput) -> np.ndarray:
+        return csr_gather(self.vertex_face_offsets, self.vertex_faces, vertices)
+
+    def convert(self, indices: IndexInput, from_type: str, to_type: str) -> np.ndarray:
+        """
+        Convert component indices between vertex, edge, face and uv
+        Matches polyListComponentConversion: every target component touching a source component is returned
+        @param indices:
+        @param from_type: one of COMPONENT_TYPES
+        @param to_type: one of COMPONENT_TYPES
+        @return: sorted unique indices
+        """
+        for component_type in (from_type, to_type):
+            if component_type not in COMPONENT_TYPES:
+                raise ValueError(f'Unsupported component type: {component_type}')
+
+        indices = np.atleast_1d(np.asarray(indices, dtype=np.int64))
+
+        if from_type == to_type:
+            return unique_sorted(indices)
+
+        if 'uv' in (from_type, to_type):
+            return self._components_from_slots(self._slots_from_components(indices, from_type), to_type)
+
+        lookup = {
+            ('vertex', 'edge'): self.edges_from_vertices,
+            ('vertex', 'face'): self.faces_from_vertices,
+            ('edge', 'vertex'): self.vertices_from_edges,
+            ('edge', 'face'): self.faces_from_edges,
+            ('face', 'vertex'): self.vertices_from_faces,
+            ('face', 'edge'): self.edges_from_faces,
+        }
+        return lookup[(from_type, to_type)](indices)
+
+    def _slots_from_components(self, indices: np.ndarray, component_type: str) -> np.ndarray:
+        """
+        Boolean mask of the face-vertices touching a set of components
+        @param indices:
+        @param component_type:
+        @return:
+        """
+        sizes = {'vertex': self.vertex_count, 'edge': self.edge_count, 'face': self.face_count, 'uv': self.uv_count}
+        mask = np.zeros(sizes[component_type], dtype=bool)
+        mask[indices] = True
+
+        if component_type == 'vertex':
+            return mask[self.face_connects]
+        elif component_type == 'edge':
+            return mask[self.slot_edges] | mask[self.slot_edges[self.slot_previous]]
+        elif component_type == 'face':
+            return mask[self.slot_faces]
+        else:
+            return np.where(self.slot_uvs >= 0, mask[np.maximum(self.slot_uvs, 0)], False)
+
+    def _components_from_slots(self, slots: np.ndarray, component_type: str) -> np.ndarray:
+        """
+        Components touching a set of face-vertices
+        @param slots: boolean face-vertex mask
+        @param component_type:
+        @return:
+        """
+        if component_type == 'vertex':
+            return unique_sorted(self.face_connects[slots])
+        elif component_type == 'edge':
+            edges = np.concatenate([self.slot_edges[slots], self.slot_edges[self.slot_previous[slots]]])
+            return unique_sorted(edges)
+        elif component_type == 'face':
+            return unique_sorted(self.slot_faces[slots])
+        else:
+            uvs = self.slot_uvs[slots]
+            return unique_sorted(uvs[uvs >= 0])
@@ -0,0 +1,245 @@
+"""
+Opt-in profiler for expensive entry points such as scene loads and imports
+
+Each measured call produces a ProfileRecord with wall time, Python peak memory, an optional process memory delta and
+whatever an inspector extracts from the return value (node counts, reference counts). Records are appended as JSON
+lines to a per-session report so runs can be aggregated and compared for regressions.
+"""
+import functools
+import inspect
+import json
+import os
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+PROFILE_ENV_VAR: str = 'ROBOTOOLS_PROFILE'
+REPORT_SUFFIX: str = '.jsonl'
+
+
+@dataclass
+class ProfileRecord:
+    operation: str
+    label: str
+    session: str
+    started: str
+    wall_time: float = 0.0
+    python_peak_memory: int = 0
+    process_memory_delta: Optional[int] = None
+    node_count: Optional[int] = None
+    node_types: Dict[str, int] = field(default_factory=dict)
+    reference_count: Optional[int] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class Profiler:
+    """
+    Measures calls when enabled, does nothing otherwise
+    Enable with enable() or by setting ROBOTOOLS_PROFILE to a report directory
+    """
+
+    def __init__(self, report_dir: Optional[Path] = None, memory_sampler: Optional[Callable[[], int]] = None,
+                 inspector: Optional[Callable[[Any], Dict[str, Any]]] = None):
+        """
+        @param report_dir: directory for JSON line reports, records are only kept in memory if None
+        @param memory_sampler: returns current process memory in bytes
+        @param inspector: maps a return value to ProfileRecord fields, e.g. node_count, node_types
+        """
+        env_dir = os.environ.get(PROFILE_ENV_VAR)
+        self.enabled: bool = bool(env_dir)
+        self.report_dir: Optional[Path] = Path(env_dir) if env_dir else report_dir
+        self.memory_sampler = memory_sampler
+        self.inspector = inspector
+        self.session: str = uuid.uuid4().hex[:12]
+        self.records: List[ProfileRecord] = []
+
+    def enable(self, report_dir: Optional[Path] = None):
+        self.enabled = True
+        if report_dir is not None:
+            self.report_dir = Path(report_dir)
+
+    def disable(self):
+        self.enabled = False
+
+    @property
+    def report_path(self) -> Optional[Path]:
+        if self.report_dir is None:
+            return None
+        return self.report_dir.joinpath(f'{datetime.now():%Y%m%d}_{self.session}{REPORT_SUFFIX}')
+
+    @contextmanager
+    def measure(self, operation: str, label: str = '', **metadata) -> Iterator[Optional[ProfileRecord]]:
+        """
+        Measure a block, yields the record so the caller can add results before it is written
+        Yields None when disabled
+        @param operation:
+        @param label: usually the file path
+        @param metadata: extra values stored with the record
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        record = ProfileRecord(operation=operation, label=str(label), session=self.session,
+                               started=datetime.now().isoformat(timespec='seconds'), metadata=metadata)
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+        process_memory = self.memory_sampler() if self.memory_sampler else None
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as err:
+            record.error = f'{type(err).__name__}: {err}'
+            raise
+        finally:
+            record.wall_time = time.perf_counter() - start
+            record.python_peak_memory = tracemalloc.get_traced_memory()[1] - baseline_memory
+            if not tracing:
+                tracemalloc.stop()
+            if process_memory is not None:
+                record.process_memory_delta = self.memory_sampler() - process_memory
+            self.add_record(record)
+
+    def inspect(self, record: Optional[ProfileRecord], result: Any):
+        """
+        Fill record fields from a return value using the inspector
+        An inspector error is stored in the record metadata rather than failing the measured call
+        @param record:
+        @param result:
+        """
+        if record is None or self.inspector is None:
+            return
+        try:
+            values = self.inspector(result)
+        except Exception as err:
+            record.metadata['inspector_error'] = f'{type(err).__name__}: {err}'
+            return
+        for key, value in values.items():
+            if hasattr(record, key):
+                setattr(record, key, value)
+            else:
+                record.metadata[key] = value
+
+    def profile(self, operation: Optional[str] = None, label_arg: Optional[str] = None):
+        """
+        Decorator measuring every call of a function while the profiler is enabled
+        @param operation: defaults to the function name
+        @param label_arg: name of the argument used as the record label, e.g. 'file_path'
+        """
+        def decorator(function):
+            signature = inspect.signature(function)
+            name = operation or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                label = ''
+                if label_arg:
+                    bound = signature.bind_partial(*args, **kwargs)
+                    label = bound.arguments.get(label_arg, '')
+                with self.measure(name, label, **_file_metadata(label)) as record:
+                    result = function(*args, **kwargs)
+                    self.inspect(record, result)
+                return result
+            return wrapper
+        return decorator
+
+    def add_record(self, record: ProfileRecord):
+        """
+        Keep the record and append it to the session report
+        @param record:
+        """
+        self.records.append(record)
+        report_path = self.report_path
+        if report_path is not None:
+            report_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(report_path, 'a') as report:
+                report.write(json.dumps(asdict(record), sort_keys=True) + '\n')
+
+
+def _file_metadata(label: Any) -> Dict[str, Any]:
+    """
+    Size of the profiled file, so timings can be compared as assets grow
+    @param label:
+    @return:
+    """
+    try:
+        return {'file_size': os.path.getsize(label)} if label else {}
+    except (OSError, TypeError):
+        return {}
+
+
+def load_records(report_dir: Path) -> List[ProfileRecord]:
+    """
+    Read every record from the reports in a directory, oldest first
+    @param report_dir:
+    @return:
+    """
+    records = []
+    for report_path in sorted(Path(report_dir).glob(f'*{REPORT_SUFFIX}')):
+        with open(report_path) as report:
+            records.extend(ProfileRecord(**json.loads(line)) for line in report if line.strip())
+    records.sort(key=lambda x: x.started)
+    return records
+
+
+def aggregate(records: Sequence[ProfileRecord]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Summary statistics per (operation, label)
+    @param records:
+    @return:
+    """
+    groups = {}
+    for record in records:
+        if record.error is None:
+            groups.setdefault((record.operation, record.label), []).append(record)
+
+    result = {}
+    for key, items in groups.items():
+        wall_times = [x.wall_time for x in items]
+        result[key] = {
+            'count': len(items),
+            'sessions': len({x.session for x in items}),
+            'wall_time_mean': statistics.fmean(wall_times),
+            'wall_time_median': statistics.median(wall_times),
+            'wall_time_min': min(wall_times),
+            'wall_time_max': max(wall_times),
+            'python_peak_memory_max': max(x.python_peak_memory for x in items),
+            'node_count': items[-1].node_count,
+            'reference_count': items[-1].reference_count,
+            'file_size': items[-1].metadata.get('file_size'),
+        }
+    return result
+
+
+def compare(baseline: Sequence[ProfileRecord], current: Sequence[ProfileRecord],
+            tolerance: float = 0.2) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """
+    Operations whose median wall time grew by more than the tolerance
+    @param baseline:
+    @param current:
+    @param tolerance: fractional increase allowed, 0.2 = 20%
+    @return: {(operation, label): {'baseline': seconds, 'current': seconds, 'ratio': current / baseline}}
+    """
+    baseline_summary = aggregate(baseline)
+    regressions = {}
+    for key, summary in aggregate(current).items():
+        if key not in baseline_summary:
+            continue
+        before = baseline_summary[key]['wall_time_median']
+        after = summary['wall_time_median']
+        if before > 0 and after > before * (1.0 + tolerance):
+            regressions[key] = {'baseline': before, 'current': after, 'ratio': after / before}
+    return regressions
@@ -0,0 +1,240 @@
+"""
+Catalogue of tool scripts grouped by category, e.g. the Tool Caddy's tool_caddy.json
+
+The JSON is read once and reloaded only when its mtime or size changes. Every script is compiled to a code object when
+the catalogue loads so syntax errors are reported up front, and tools are served from sorted in-memory lists with a
+fuzzy name search.
+"""
+import json
+import os
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import CodeType
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class ToolEntry:
+    name: str
+    category: str
+    script: str
+    tool_tip: str = ''
+    code: Optional[CodeType] = field(default=None, repr=False)
+    error: Optional[str] = None
+    search_text: str = field(default='', repr=False)
+    char_mask: int = field(default=0, repr=False)
+    word_starts: frozenset = field(default=frozenset(), repr=False)
+
+    @property
+    def label(self) -> str:
+        return f'{self.category}/{self.name}'
+
+    def execute(self, namespace: Optional[dict] = None):
+        """
+        Run the precompiled script
+        @param namespace: globals for the script, a fresh namespace if None
+        """
+        if self.code is None:
+            raise SyntaxError(f'{self.label}: {self.error}')
+        exec(self.code, {'__name__': '__main__'} if namespace is None else namespace)
+
+
+def compile_script(script: str, file_name: str) -> Tuple[Optional[CodeType], Optional[str]]:
+    """
+    Compile a script, returning the error message instead of raising
+    @param script:
+    @param file_name: shown in tracebacks
+    @return: (code, None) or (None, error)
+    """
+    try:
+        return compile(script, file_name, 'exec'), None
+    except SyntaxError as err:
+        return None, f'{err.msg} (line {err.lineno})'
+    except ValueError as err:
+        return None, str(err)
+
+
+def char_mask(text: str) -> int:
+    """
+    Bitmask of the characters in a string, a cheap test that a query could match
+    @param text:
+    @return:
+    """
+    mask = 0
+    for char in text:
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+def word_starts(text: str) -> frozenset:
+    """
+    Indices of the first character of each word
+    @param text:
+    @return:
+    """
+    return frozenset(i for i, char in enumerate(text) if char.isalnum() and (i == 0 or not text[i - 1].isalnum()))
+
+
+def fuzzy_score(query: str, text: str, starts: frozenset = frozenset()) -> Optional[int]:
+    """
+    Score a lower case query against lower case text, higher is better
+    Substrings beat scattered matches, matches at word starts and runs of adjacent characters score extra
+    Outside a substring, at most one run of matched characters may start mid-word, so 'cwef' finds
+    'connect with edge flow' and 'mrr' finds 'mirror' without every long name matching every short query
+    @param query:
+    @param text:
+    @param starts: word start indices of the text
+    @return: None if the query does not match the text
+    """
+    position = text.find(query)
+    if position >= 0:
+        return 1000 - position + (100 if position in starts else 0)
+
+    score = 0
+    previous = -1
+    mid_word_runs = 0
+    for char in query:
+        index = text.find(char, previous + 1)
+        if index < 0:
+            return None
+        if index == previous + 1:
+            score += 5
+        elif index in starts:
+            score += 10
+        else:
+            mid_word_runs += 1
+            if mid_word_runs > 1:
+                return None
+        score -= index - previous - 1
+        previous = index
+    return score
+
+
+class ToolCatalogue:
+    """
+    Tools loaded from a JSON file of {category: {name: {'script': ..., 'tool_tip': ...}}}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._categories: List[str] = []
+        self._tools: Dict[Optional[str], List[ToolEntry]] = {None: []}
+        self._last_search: Tuple[Optional[str], str, List[ToolEntry]] = (None, '', [])
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the catalogue if the file has changed
+        @param force: reload even if the mtime and size are unchanged
+        @return: True if the catalogue was reloaded
+        """
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if not force and stamp == self._stamp:
+            return False
+
+        with open(self.path) as f:
+            data = json.load(f)
+
+        tools = {None: []}
+        for category, items in data.items():
+            tools[category] = []
+            for name, value in items.items():
+                code, error = compile_script(value['script'], f'<tool {category}/{name}>')
+                search_text = f'{name} {category}'.lower()
+                entry = ToolEntry(name=name, category=category, script=value['script'],
+                                  tool_tip=value.get('tool_tip', ''), code=code, error=error, search_text=search_text,
+                                  char_mask=char_mask(search_text), word_starts=word_starts(search_text))
+                tools[category].append(entry)
+                tools[None].append(entry)
+
+        for entries in tools.values():
+            entries.sort(key=lambda x: x.name.lower())
+        self._categories = sorted(data, key=str.lower)
+        self._tools = tools
+        self._last_search = (None, '', [])
+        self._stamp = stamp
+        return True
+
+    def categories(self) -> List[str]:
+        """
+        Category names, sorted case-insensitively
+        @return:
+        """
+        self.refresh()
+        return list(self._categories)
+
+    def tools(self, category: Optional[str] = None) -> List[ToolEntry]:
+        """
+        Tools sorted by name
+        @param category: None for every category
+        @return:
+        """
+        self.refresh()
+        return list(self._tools.get(category, []))
+
+    def errors(self) -> List[ToolEntry]:
+        """
+        Tools whose script failed to compile
+        @return:
+        """
+        return [x for x in self.tools() if x.error is not None]
+
+    def get(self, category: str, name: str) -> Optional[ToolEntry]:
+        return next((x for x in self.tools(category) if x.name == name), None)
+
+    def search(self, query: str, category: Optional[str] = None) -> List[ToolEntry]:
+        """
+        Fuzzy search of tool names and categories, best match first
+        Every whitespace separated term has to match, each as a substring or in-order subsequence
+        Refining the previous query only rescans the previous results
+        @param query:
+        @param category: None for every category
+        @return:
+        """
+        self.refresh()
+        query = ' '.join(query.lower().split())
+        if not query:
+            return list(self._tools.get(category, []))
+
+        last_category, last_query, last_results = self._last_search
+        if last_query and last_category == category and query.startswith(last_query):
+            candidates = last_results
+        else:
+            candidates = self._tools.get(category, [])
+
+        terms = query.split()
+        query_mask = char_mask(''.join(terms))
+        scored = []
+        for entry in candidates:
+            if entry.char_mask & query_mask != query_mask:
+                continue
+            total = 0
+            for term in terms:
+                score = fuzzy_score(term, entry.search_text, entry.word_starts)
+                if score is None:
+                    break
+                total += score
+            else:
+                scored.append((-total, entry.name.lower(), entry))
+
+        scored.sort(key=lambda x: x[:2])
+        results = [x[2] for x in scored]
+        self._last_search = (category, query, results)
+        return list(results)
+
+
+_CATALOGUES: Dict[Path, ToolCatalogue] = {}
+
+
+def get_tool_catalogue(path: Path) -> ToolCatalogue:
+    """
+    Shared catalogue for a file
+    @param path:
+    @return:
+    """
+    path = Path(path)
+    if path not in _CATALOGUES:
+        _CATALOGUES[path] = ToolCatalogue(path)
+    return _CATALOGUES[path]
@@ -0,0 +1,218 @@
+"""
+Transform math for batches of Maya style transforms, pure NumPy
+
+Matrices follow Maya's row vector convention: points are row vectors multiplied on the left, so p' = p @ M and the
+translation sits in the last row. Rotate orders use Maya's rotateOrder enum, 0 = xyz ... 5 = zyx, where xyz rotates
+about x first. Every function takes stacked arrays, (N, 3) vectors and (N, 4, 4) matrices.
+"""
+import numpy as np
+
+from typing import Optional, Tuple, Union
+
+ROTATE_ORDERS: Tuple[str, ...] = ('xyz', 'yzx', 'zxy', 'xzy', 'yxz', 'zyx')
+AXIS_INDICES = {'x': 0, 'y': 1, 'z': 2}
+RotateOrders = Union[int, np.ndarray]
+
+
+def _vectors(values, count: Optional[int] = None, default: float = 0.0) -> np.ndarray:
+    """
+    Stack vectors to an (N, 3) float array, broadcasting a single vector or a default
+    @param values:
+    @param count:
+    @param default:
+    @return:
+    """
+    if values is None:
+        return np.full((count or 1, 3), default, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64).reshape(-1, 3)
+    if count is not None and len(values) == 1 and count != 1:
+        values = np.repeat(values, count, axis=0)
+    return values
+
+
+def _rotate_orders(rotate_orders: RotateOrders, count: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(rotate_orders, dtype=np.int64), (count,))
+
+
+def axis_rotation_matrices(angles: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Row vector rotation matrices about one axis
+    @param angles: (N,) radians
+    @param axis: 0, 1 or 2
+    @return: (N, 3, 3)
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    cos, sin = np.cos(angles), np.sin(angles)
+    i, j = (axis + 1) % 3, (axis + 2) % 3
+    matrices = np.zeros(angles.shape + (3, 3))
+    matrices[..., axis, axis] = 1.0
+    matrices[..., i, i] = cos
+    matrices[..., j, j] = cos
+    matrices[..., i, j] = sin
+    matrices[..., j, i] = -sin
+    return matrices
+
+
+def euler_to_matrices(rotations, rotate_orders: RotateOrders = 0, degrees: bool = True) -> np.ndarray:
+    """
+    Rotation matrices from Euler angles
+    @param rotations: (N, 3) rotate x, y, z
+    @param rotate_orders: one rotate order or one per rotation
+    @param degrees:
+    @return: (N, 3, 3)
+    """
+    rotations = _vectors(rotations)
+    angles = np.radians(rotations) if degrees else rotations
+    orders = _rotate_orders(rotate_orders, len(angles))
+    axis_matrices = [axis_rotation_matrices(angles[:, axis], axis) for axis in range(3)]
+    result = np.empty((len(angles), 3, 3))
+    for order_index, order in enumerate(ROTATE_ORDERS):
+        mask = orders == order_index
+        if mask.any():
+            first, second, third = (axis_matrices[AXIS_INDICES[x]][mask] for x in order)
+            result[mask] = first @ second @ third
+    return result
+
+
+def matrices_to_euler(matrices, rotate_orders: RotateOrders = 0, degrees: bool = True) -> np.ndarray:
+    """
+    Euler angles of pure rotation matrices
+    At gimbal lock the first rotation absorbs the angle and the third is zero
+    @param matrices: (N, 3, 3) or (N, 4, 4), only the rotation part is read
+    @param rotate_orders: one rotate order or one per matrix
+    @param degrees:
+    @return: (N, 3) rotate x, y, z
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, *np.shape(matrices)[-2:])[:, :3, :3]
+    # column vector form, m = R_third @ R_second @ R_first
+    m = np.swapaxes(matrices, 1, 2)
+    orders = _rotate_orders(rotate_orders, len(m))
+    result = np.zeros((len(m), 3))
+    for order_index, order in enumerate(ROTATE_ORDERS):
+        mask = orders == order_index
+        if not mask.any():
+            continue
+        i, j, k = (AXIS_INDICES[x] for x in order)
+        sign = 1.0 if (j - i) % 3 == 1 else -1.0
+        sub = m[mask]
+        sin_second = np.clip(-sign * sub[:, k, i], -1.0, 1.0)
+        second = np.arcsin(sin_second)
+        locked = np.abs(sin_second) > 1.0 - 1e-12
+        first = np.where(locked, np.arctan2(-sign * sub[:, j, k], sub[:, j, j]),
+                         np.arctan2(sign * sub[:, k, j], sub[:, k, k]))
+        third = np.where(locked, 0.0, np.arctan2(sign * sub[:, j, i], sub[:, i, i]))
+        angles = np.empty((len(sub), 3))
+        angles[:, i], angles[:, j], angles[:, k] = first, second, third
+        result[mask] = angles
+    return np.degrees(result) if degrees else result
+
+
+def compose_matrices(translations=None, rotations=None, scales=None, rotate_orders: RotateOrders = 0,
+                     rotate_pivots=None, scale_pivots=None, rotate_pivot_translations=None,
+                     scale_pivot_translations=None, rotate_axes=None, degrees: bool = True) -> np.ndarray:
+    """
+    Local matrices from transform attributes, as Maya builds them:
+    [-scalePivot][scale][scalePivot][scalePivotTranslate][-rotatePivot][rotateAxis][rotate][rotatePivot]
+    [rotatePivotTranslate][translate]
+    @param translations: (N, 3)
+    @param rotations: (N, 3)
+    @param scales: (N, 3), defaults to 1
+    @param rotate_orders:
+    @param rotate_pivots: (N, 3)
+    @param scale_pivots: (N, 3)
+    @param rotate_pivot_translations: (N, 3)
+    @param scale_pivot_translations: (N, 3)
+    @param rotate_axes: (N, 3) rotateAxis, always applied in xyz order
+    @param degrees: rotations and rotate axes are in degrees
+    @return: (N, 4, 4)
+    """
+    count = max(len(_vectors(x)) for x in (translations, rotations, scales, rotate_pivots, scale_pivots,
+                                          rotate_pivot_translations, scale_pivot_translations, rotate_axes))
+    translations = _vectors(translations, count)
+    scales = _vectors(scales, count, default=1.0)
+    rotate_pivots = _vectors(rotate_pivots, count)
+    scale_pivots = _vectors(scale_pivots, count)
+
+    rotation = euler_to_matrices(_vectors(rotations, count), rotate_orders, degrees)
+    if rotate_axes is not None:
+        rotation = euler_to_matrices(_vectors(rotate_axes, count), 0, degrees) @ rotation
+
+    linear = scales[:, :, None] * rotation
+    # pivots only shift the translation row: p' = ((p - sp) * s + sp + spt - rp) @ R + rp + rpt + t
+    offset = (scale_pivots - scale_pivots * scales + _vectors(scale_pivot_translations, count) - rotate_pivots)
+    translation_row = np.einsum('ni,nij->nj', offset, rotation) + rotate_pivots + \
+        _vectors(rotate_pivot_translations, count) + translations
+
+    matrices = np.zeros((count, 4, 4))
+    matrices[:, :3, :3] = linear
+    matrices[:, 3, :3] = translation_row
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def decompose_matrices(matrices, rotate_orders: RotateOrders = 0,
+                       degrees: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split matrices without shear into translate, rotate and scale, with pivots at the origin
+    A negative determinant is returned as a negative x scale
+    @param matrices: (N, 4, 4)
+    @param rotate_orders:
+    @param degrees:
+    @return: translations (N, 3), rotations (N, 3), scales (N, 3)
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    linear = matrices[:, :3, :3]
+    scales = np.linalg.norm(linear, axis=2)
+    scales[:, 0] *= np.where(np.linalg.det(linear) < 0.0, -1.0, 1.0)
+    safe_scales = np.where(scales == 0.0, 1.0, scales)
+    rotations = matrices_to_euler(linear / safe_scales[:, :, None], rotate_orders, degrees)
+    return matrices[:, 3, :3].copy(), rotations, scales
+
+
+def transform_points(points, matrices) -> np.ndarray:
+    """
+    Apply one matrix per point
+    @param points: (N, 3)
+    @param matrices: (N, 4, 4) or a single (4, 4)
+    @return: (N, 3)
+    """
+    points = _vectors(points)
+    matrices = np.asarray(matrices, dtype=np.float64)
+    if matrices.ndim == 2:
+        return points @ matrices[:3, :3] + matrices[3, :3]
+    return np.einsum('ni,nij->nj', points, matrices[:, :3, :3]) + matrices[:, 3, :3]
+
+
+def world_rotate_pivots(translations, rotate_pivots, parent_matrices, rotate_pivot_translations=None) -> np.ndarray:
+    """
+    World space rotate pivots, as xform(query=True, worldSpace=True, rotatePivot=True) reports them
+    @param translations: (N, 3)
+    @param rotate_pivots: (N, 3) local rotate pivots
+    @param parent_matrices: (N, 4, 4) parent world matrices
+    @param rotate_pivot_translations: (N, 3)
+    @return: (N, 3)
+    """
+    translations = _vectors(translations)
+    count = len(translations)
+    local = translations + _vectors(rotate_pivots, count) + _vectors(rotate_pivot_translations, count)
+    return transform_points(local, parent_matrices)
+
+
+def pivot_offsets(pivots, matrices) -> np.ndarray:
+    """
+    Offsets that move each transform's translation onto a world space pivot
+    @param pivots: (N, 3) world space pivots
+    @param matrices: (N, 4, 4) world matrices
+    @return: (N, 3)
+    """
+    return _vectors(pivots) - np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)[:, 3, :3]
+
+
+def local_translations(world_translations, parent_inverse_matrices) -> np.ndarray:
+    """
+    Convert world space positions to translate values under each parent
+    @param world_translations: (N, 3)
+    @param parent_inverse_matrices: (N, 4, 4)
+    @return: (N, 3)
+    """
+    return transform_points(world_translations, parent_inverse_matrices)
@@ -0,0 +1,135 @@
+"""
+Index of versioned files in a directory, e.g. base_mesh_male.0012.mb
+
+Versions are compared numerically, the directory listing is cached against the directory mtime and the latest version
+of each file is resolved when the index is built.
+"""
+import os
+import re
+
+from dataclasses import dataclass, field
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+VERSION_PATTERN = re.compile(r'^(?P<name>[^.]+)\.v?(?P<version>\d+)(?P<extension>\.[^.]+)$', re.IGNORECASE)
+
+
+@dataclass(frozen=True, order=True)
+class VersionedFile:
+    name: str
+    version: int
+    extension: str
+    file_name: str = field(compare=False)
+    directory: Path = field(compare=False)
+
+    @property
+    def path(self) -> Path:
+        return self.directory.joinpath(self.file_name)
+
+
+def parse_versioned_file(path: Path) -> Optional[VersionedFile]:
+    """
+    Split a file name into name, numeric version and extension
+    Returns None for files without a version token
+    @param path:
+    @return:
+    """
+    path = Path(path)
+    return _parse_file_name(path.parent, path.name)
+
+
+def _parse_file_name(directory: Path, file_name: str) -> Optional[VersionedFile]:
+    match = VERSION_PATTERN.match(file_name)
+    if not match:
+        return None
+    return VersionedFile(name=match.group('name'), version=int(match.group('version')),
+                         extension=match.group('extension').lower(), file_name=file_name, directory=directory)
+
+
+class VersionIndex:
+    """
+    Versioned files of a directory grouped by name
+    The listing is rebuilt only when the directory mtime changes
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._mtime: Optional[int] = None
+        self._versions: Dict[Tuple[str, Optional[str]], List[VersionedFile]] = {}
+        self._latest: Dict[Tuple[str, Optional[str]], VersionedFile] = {}
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rebuild the index if the directory has changed
+        @param force: rebuild even if the mtime is unchanged, for filesystems with coarse timestamps
+        @return: True if the index was rebuilt
+        """
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if not force and self._mtime is not None and mtime == self._mtime:
+            return False
+
+        versions = {}
+        if mtime is not None:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    item = _parse_file_name(self.directory, entry.name)
+                    if item is not None:
+                        versions.setdefault((item.name, item.extension), []).append(item)
+                        versions.setdefault((item.name, None), []).append(item)
+
+        for items in versions.values():
+            items.sort(key=attrgetter('version'))
+        self._versions = versions
+        self._latest = {key: items[-1] for key, items in versions.items()}
+        self._mtime = mtime
+        return True
+
+    def names(self) -> List[str]:
+        """
+        Names with at least one version
+        @return:
+        """
+        self.refresh()
+        return sorted(name for name, extension in self._versions if extension is None)
+
+    def versions(self, name: str, extension: Optional[str] = None) -> List[VersionedFile]:
+        """
+        All versions of a file, oldest first
+        @param name:
+        @param extension: e.g. '.mb', None matches any extension
+        @return:
+        """
+        self.refresh()
+        return list(self._versions.get((name, extension.lower() if extension else None), []))
+
+    def latest(self, name: str, extension: Optional[str] = None) -> Optional[VersionedFile]:
+        """
+        Highest version of a file
+        @param name:
+        @param extension: e.g. '.mb', None matches any extension
+        @return:
+        """
+        self.refresh()
+        return self._latest.get((name, extension.lower() if extension else None))
+
+
+_INDEXES: Dict[Path, VersionIndex] = {}
+
+
+def get_version_index(directory: Path) -> VersionIndex:
+    """
+    Shared index for a directory
+    @param directory:
+    @return:
+    """
+    directory = Path(directory)
+    if directory not in _INDEXES:
+        _INDEXES[directory] = VersionIndex(directory)
+    return _INDEXES[directory]
@@ -0,0 +1,189 @@
+import numpy as np
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+ColorKey = Tuple[float, ...]
+
+
+def face_colors_from_face_vertex_colors(colors: np.ndarray, face_counts: Sequence[int]) -> np.ndarray:
+    """
+    Average face-vertex colors per face, as polyColorPerVertex reports when queried on a face
+    Faces with an unset (negative) face-vertex color are returned as NaN
+    @param colors: (face-vertex count, 3 or 4) array ordered face by face
+    @param face_counts: vertex count per face
+    @return: (face count, 3) rgb array
+    """
+    colors = np.asarray(colors, dtype=np.float64)[:, :3]
+    face_counts = np.asarray(face_counts, dtype=np.int64)
+    face_colors = np.full((face_counts.size, 3), np.nan)
+    populated = face_counts > 0
+    if not populated.any():
+        return face_colors
+    starts = (np.cumsum(face_counts) - face_counts)[populated]
+    sums = np.add.reduceat(colors, starts, axis=0)
+    unset = np.add.reduceat((colors < 0).any(axis=1).astype(np.int64), starts) > 0
+    averages = sums / face_counts[populated, None]
+    averages[unset] = np.nan
+    face_colors[populated] = averages
+    return face_colors
+
+
+def quantize_colors(colors: np.ndarray, precision: int = 4) -> np.ndarray:
+    """
+    Round colors to integer steps of 10 ** -precision
+    @param colors:
+    @param precision:
+    @return: int64 array, NaN colors become -1
+    """
+    colors = np.asarray(colors, dtype=np.float64)
+    quantized = np.rint(np.nan_to_num(colors, nan=-1.0) * 10 ** precision).astype(np.int64)
+    quantized[np.isnan(colors).any(axis=-1)] = -1
+    return quantized
+
+
+MAX_PACK_BASE: int = 2 ** 21
+
+
+def pack_color_keys(quantized: np.ndarray, base: int) -> np.ndarray:
+    """
+    Pack quantized rgb rows into one integer per row
+    @param quantized: (N, 3) non-negative integers below base
+    @param base: at most MAX_PACK_BASE, so three components fit an int64
+    @return:
+    """
+    quantized = np.asarray(quantized, dtype=np.int64).reshape(-1, 3)
+    if not 0 < base <= MAX_PACK_BASE:
+        raise ValueError(f'Color key base {base} is outside 1 - {MAX_PACK_BASE}')
+    if quantized.size and (quantized.min() < 0 or quantized.max() >= base):
+        raise ValueError(f'Quantized color components must lie in 0 - {base - 1}')
+    return (quantized[:, 0] * base + quantized[:, 1]) * base + quantized[:, 2]
+
+
+def color_key(color: Sequence[float], precision: int = 4) -> ColorKey:
+    """
+    Numeric dictionary key for a color
+    @param color:
+    @param precision:
+    @return:
+    """
+    return tuple(round(float(x), precision) for x in color[:3])
+
+
+def group_faces_by_color(face_colors: np.ndarray, precision: int = 4) -> Dict[ColorKey, np.ndarray]:
+    """
+    Group faces sharing a color after quantization, faces without a color are skipped
+    @param face_colors: (face count, 3) rgb array, NaN for faces without a color
+    @param precision:
+    @return: color key -> sorted face indices
+    """
+    return ColorFaceIndex.from_face_colors(face_colors, precision).as_dict()
+
+
+class ColorFaceIndex:
+    """
+    Reverse index from quantized color to faces for one mesh
+
+    palette: (K, 3) distinct colors
+    face_labels: palette index per face, -1 for faces without a color
+    faces: sorted face indices per palette entry
+    """
+
+    def __init__(self, palette: np.ndarray, face_labels: np.ndarray, precision: int = 4):
+        self.precision = precision
+        self.palette = np.asarray(palette, dtype=np.float64).reshape(-1, 3)
+        self.quantized_palette = quantize_colors(self.palette, precision)
+        self.face_labels = np.asarray(face_labels, dtype=np.int64)
+        colored = np.flatnonzero(self.face_labels >= 0)
+        order = colored[np.argsort(self.face_labels[colored], kind='stable')]
+        boundaries = np.searchsorted(self.face_labels[order], np.arange(len(self.palette) + 1))
+        self.faces = [order[boundaries[i]:boundaries[i + 1]] for i in range(len(self.palette))]
+
+    @classmethod
+    def from_face_colors(cls, face_colors: np.ndarray, precision: int = 4) -> 'ColorFaceIndex':
+        """
+        Build the index from per-face colors
+        @param face_colors: (face count, 3) rgb array, NaN for faces without a color
+        @param precision:
+        @return:
+        """
+        quantized = quantize_colors(face_colors, precision)
+        face_labels = np.full(len(quantized), -1, dtype=np.int64)
+        colored = np.flatnonzero((quantized >= 0).all(axis=1))
+        if colored.size == 0:
+            return cls(np.empty((0, 3)), face_labels, precision)
+
+        keys = pack_color_keys(quantized[colored], int(quantized[colored].max()) + 1)
+        order = np.argsort(keys, kind='stable')
+        is_first = np.empty(order.size, dtype=bool)
+        is_first[0] = True
+        np.not_equal(keys[order][1:], keys[order][:-1], out=is_first[1:])
+        face_labels[colored[order]] = np.cumsum(is_first) - 1
+        palette = np.round(quantized[colored[order[is_first]]] / 10 ** precision, precision)
+        return cls(palette, face_labels, precision)
+
+    @property
+    def keys(self) -> List[ColorKey]:
+        return [color_key(x, self.precision) for x in self.palette]
+
+    def as_dict(self) -> Dict[ColorKey, np.ndarray]:
+        return dict(zip(self.keys, self.faces))
+
+    def match(self, colors: np.ndarray, tolerance: Optional[float] = None, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Palette entries matching any query color
+        Without a tolerance a query matches the entry it quantizes to, as the faces were grouped.
+        With a tolerance, entries within that euclidean rgb distance of a query match.
+        @param colors: (M, 3) query colors
+        @param tolerance: defaults to an exact match
+        @param chunk_size: query rows per distance block, bounds memory for large palettes
+        @return: sorted palette indices
+        """
+        colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+        matched = np.zeros(len(self.palette), dtype=bool)
+        if not len(self.palette):
+            return np.flatnonzero(matched)
+        if tolerance is None:
+            queries = quantize_colors(colors, self.precision)
+            queries = queries[(queries >= 0).all(axis=1)]
+            if not len(queries):
+                return np.flatnonzero(matched)
+            base = int(max(self.quantized_palette.max(), queries.max())) + 1
+            return np.flatnonzero(np.isin(pack_color_keys(self.quantized_palette, base),
+                                          pack_color_keys(queries, base)))
+        for start in range(0, len(colors), chunk_size):
+            block = colors[start:start + chunk_size]
+            distances = np.linalg.norm(block[:, None, :] - self.palette[None, :, :], axis=2)
+            matched |= (distances <= tolerance).any(axis=0)
+        return np.flatnonzero(matched)
+
+    def faces_for_labels(self, labels: Sequence[int]) -> np.ndarray:
+        """
+        Union of the faces of several palette entries
+        @param labels:
+        @return: sorted face indices
+        """
+        groups = [self.faces[i] for i in labels]
+        return np.sort(np.concatenate(groups)) if groups else np.empty(0, dtype=np.int64)
+
+    def faces_for_colors(self, colors: np.ndarray, tolerance: Optional[float] = None) -> np.ndarray:
+        """
+        Faces whose color is within tolerance of any query color
+        @param colors:
+        @param tolerance:
+        @return: sorted face indices
+        """
+        return self.faces_for_labels(self.match(colors, tolerance))
+
+    def faces_matching_faces(self, faces: Sequence[int], tolerance: Optional[float] = None) -> np.ndarray:
+        """
+        Faces sharing a color with any of the given faces
+        @param faces:
+        @param tolerance:
+        @return: sorted face indices
+        """
+        labels = self.face_labels[np.asarray(faces, dtype=np.int64)]
+        labels = labels[labels >= 0]
+        if tolerance is None:
+            return self.faces_for_labels(np.flatnonzero(np.bincount(labels, minlength=len(self.palette))))
+        return self.faces_for_colors(self.palette[labels], tolerance)
@@ -31,7 +31,11 @@ class GenericWidget(QtWidgets.QWidget):
         Remove all widgets from the current layout
         """
         for i in reversed(range(self.layout().count())):
-            self.layout().itemAt(i).widget().setParent(None)
+            widget = self.layout().itemAt(i).widget()
+            if widget:
+                widget.setParent(None)
+            else:
+                self.layout().takeAt(i)
 
     def add_stretch(self):
         """
@@ -7,6 +7,7 @@ PROJECT_ROOT: Path = Path(r'C:\Users\idavisan\Documents\Projects\Maya2022')
 ICON_DIR: Path = PROJECT_ROOT.joinpath('icons')
 MODELS_FOLDER: Path = PROJECT_ROOT.joinpath('models')
 SCENES_FOLDER: Path = PROJECT_ROOT.joinpath('scenes')
+MESH_CACHE_FOLDER: Path = PROJECT_ROOT.joinpath('cache', 'meshes')
 
 
 def icon_path(file_name: str) -> Path:
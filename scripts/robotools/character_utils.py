@@ -1,28 +1,91 @@
+import logging
 import pymel.core as pm
 
+from pathlib import Path
+from typing import Dict, List
+
 from robotools.maya_scene import load_scene, import_model
+from robotools.geometry_utils import create_mesh
+from robotools.material_utils import material_from_spec
 from core.enums import FileExtension, Gender
-from robotools import SCENES_FOLDER, MODELS_FOLDER
+from core.fbx_reader import FbxError, FbxMesh, FbxReader
+from core.mesh_cache import MeshCache
+from core.version_index import VersionedFile, get_version_index
+from robotools import SCENES_FOLDER, MODELS_FOLDER, MESH_CACHE_FOLDER
 
 
 BASE_MESH_MALE = 'base_mesh_male'
 BASE_MESH_FEMALE = 'base_mesh_female'
+MESH_CACHE: MeshCache = MeshCache(MESH_CACHE_FOLDER)
+
+
+def get_base_character_path(gender: str) -> Path:
+    """
+    Path to the base character model
+    @param gender:
+    @return:
+    """
+    file_name = f'{BASE_MESH_MALE if gender == Gender.male.name else BASE_MESH_FEMALE}{FileExtension.fbx.value}'
+    return MODELS_FOLDER.joinpath(file_name)
+
+
+def read_base_character(gender: str) -> Dict[str, FbxMesh]:
+    """
+    Read the base character meshes straight from the fbx without importing into Maya
+    @param gender:
+    @return: meshes keyed on model name
+    """
+    with FbxReader(get_base_character_path(gender=gender)) as reader:
+        return reader.model_meshes()
 
 
 def import_base_character(gender: str) -> pm.nodetypes.Transform:
     """
     Import a base character
+    The meshes and their materials are built from the mesh cache. The FBX importer is used instead if the model
+    cannot be cached, the scene is not Y up in centimetres, or building from the cache fails.
     @param gender:
+    @return: the base character transform
     """
-    file_name = f'{BASE_MESH_MALE if gender == Gender.male.name else BASE_MESH_FEMALE}{FileExtension.fbx.value}'
-    import_path = MODELS_FOLDER.joinpath(file_name)
-    result = import_model(import_path=import_path)
-    transform = next(x for x in result if type(x) is pm.nodetypes.Transform)
+    import_path = get_base_character_path(gender=gender)
+    assemblies = set(pm.ls(assemblies=True))
+    created = []
+    transforms = []
+    try:
+        if pm.upAxis(query=True, axis=True) != 'y' or pm.currentUnit(query=True, linear=True) != 'cm':
+            raise FbxError('the scene is not Y up in centimetres')
+        material_groups = {}
+        for mesh in MESH_CACHE.load(import_path):
+            for spec in mesh.materials:
+                if spec not in material_groups:
+                    material_groups[spec] = material_from_spec(spec)
+                    created.extend(material_groups[spec])
+            transforms.append(create_mesh(mesh, material_groups=[material_groups[x][1] for x in mesh.materials]))
+    except (FbxError, OSError, ValueError, IndexError, RuntimeError) as error:
+        logging.warning(f'Mesh cache unavailable for {import_path.name}, using the FBX importer: {error}')
+        created.extend(x for x in pm.ls(assemblies=True) if x not in assemblies)
+        pm.delete([x for x in created if x.exists()])
+        transforms = []
+
+    if not transforms:
+        result = import_model(import_path=import_path)
+        transforms = [x for x in result if type(x) is pm.nodetypes.Transform]
+    transform = transforms[0]
     pm.select(transform)
     pm.viewFit()
     return transform
 
 
+def get_base_character_versions(gender: str) -> List[VersionedFile]:
+    """
+    All versioned scenes of a base character, oldest first
+    @param gender:
+    @return:
+    """
+    scene_name = BASE_MESH_MALE if gender == Gender.male.name else BASE_MESH_FEMALE
+    return get_version_index(SCENES_FOLDER).versions(scene_name, FileExtension.mb.value)
+
+
 def load_base_character(gender: str, latest: bool = True) -> pm.nodetypes.Transform:
     """
     Load a base character scene
@@ -31,14 +94,10 @@ def load_base_character(gender: str, latest: bool = True) -> pm.nodetypes.Transf
     """
     scene_name = BASE_MESH_MALE if gender == Gender.male.name else BASE_MESH_FEMALE
 
-    if latest:
-        # find all the scenes
-        scenes = SCENES_FOLDER.glob(f'{scene_name}*')
-        # discount the non-versioned file
-        scenes = [x for x in scenes if len(x.as_posix().split('.')) == 3]
-        # find the highest version
-        scenes.sort(key=lambda x: x.stem.split('.')[1])
-        scene_path = scenes[-1]
+    latest_version = get_version_index(SCENES_FOLDER).latest(scene_name, FileExtension.mb.value) if latest else None
+
+    if latest_version:
+        scene_path = latest_version.path
     else:
         scene_path = SCENES_FOLDER.joinpath(f'{scene_name}{FileExtension.mb.value}')
 
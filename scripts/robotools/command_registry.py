@@ -0,0 +1,214 @@
+"""
+Named Robotools commands for shelf buttons and hotkeys
+
+Each command points at a function by module path. The function is imported once when first run and every call goes
+through the registry, which wraps it in a single undo chunk and records its latency. The robotools_shelf plug-in
+registers every command as a Maya command, so shelf buttons and hotkeys dispatch by name instead of carrying source.
+"""
+import importlib
+import logging
+import time
+
+import pymel.core as pm
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class RobotoolsCommand:
+    name: str
+    target: str
+    label: str = ''
+    args: Tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    undoable: bool = True
+    _function: Optional[Callable] = field(default=None, init=False, repr=False, compare=False)
+
+    def resolve(self) -> Callable:
+        """
+        Import the target function, once
+        @return:
+        """
+        if self._function is None:
+            module_name, function_name = self.target.split(':')
+            self._function = getattr(importlib.import_module(module_name), function_name)
+        return self._function
+
+
+@dataclass
+class CommandStats:
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    minimum: float = float('inf')
+    maximum: float = 0.0
+    last: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, seconds: float, failed: bool = False):
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        self.last = seconds
+
+
+class CommandRegistry:
+    """
+    Commands by name with per-command latency statistics
+    """
+
+    def __init__(self):
+        self._commands: Dict[str, RobotoolsCommand] = {}
+        self._stats: Dict[str, CommandStats] = {}
+
+    def register(self, command: RobotoolsCommand) -> RobotoolsCommand:
+        self._commands[command.name] = command
+        return command
+
+    def get(self, name: str) -> RobotoolsCommand:
+        try:
+            return self._commands[name]
+        except KeyError:
+            raise KeyError(f'Robotools command {name} not registered') from None
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._commands)
+
+    def unresolve(self):
+        """
+        Drop the resolved functions so the next calls pick up reloaded modules
+        """
+        for command in self._commands.values():
+            command._function = None
+
+    def run(self, name: str, *args, **kwargs) -> Any:
+        """
+        Run a command in one undo chunk, recording how long it took
+        @param name:
+        @param args: override the registered args
+        @param kwargs: merged over the registered kwargs
+        @return: the function's return value
+        """
+        command = self.get(name)
+        function = command.resolve()
+        args = args or command.args
+        kwargs = {**command.kwargs, **kwargs}
+        if command.undoable:
+            pm.undoInfo(openChunk=True, chunkName=name)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self._stats.setdefault(name, CommandStats()).add(time.perf_counter() - start, failed)
+            if command.undoable:
+                pm.undoInfo(closeChunk=True)
+
+    def stats(self, name: Optional[str] = None) -> Dict[str, CommandStats]:
+        """
+        Latency statistics of the commands run so far
+        @param name: a single command, all if None
+        @return:
+        """
+        if name is not None:
+            return {name: self._stats[name]} if name in self._stats else {}
+        return dict(self._stats)
+
+    def reset_stats(self):
+        self._stats.clear()
+
+    def report(self) -> str:
+        """
+        Latency table, slowest mean first
+        @return:
+        """
+        lines = [f'{"command":<36}{"calls":>7}{"errors":>7}{"mean ms":>10}{"min ms":>10}{"max ms":>10}']
+        for name, stats in sorted(self._stats.items(), key=lambda x: -x[1].mean):
+            lines.append(f'{name:<36}{stats.count:>7}{stats.errors:>7}{stats.mean * 1000:>10.2f}'
+                         f'{stats.minimum * 1000:>10.2f}{stats.maximum * 1000:>10.2f}')
+        return '\n'.join(lines)
+
+
+ROBOTOOLS_COMMANDS: List[RobotoolsCommand] = [
+    RobotoolsCommand('robotoolsUpdate', 'robotools.robotools_utils:update_robotools', label='Update Robotools',
+                     undoable=False),
+    RobotoolsCommand('robotoolsImportBaseMale', 'robotools.character_utils:import_base_character',
+                     label='Import Base Male', args=('male',)),
+    RobotoolsCommand('robotoolsLoadBaseMale', 'robotools.character_utils:load_base_character',
+                     label='Load Base Male', args=('male',), undoable=False),
+    RobotoolsCommand('robotoolsImportBaseFemale', 'robotools.character_utils:import_base_character',
+                     label='Import Base Female', args=('female',)),
+    RobotoolsCommand('robotoolsLoadBaseFemale', 'robotools.character_utils:load_base_character',
+                     label='Load Base Female', args=('female',), undoable=False),
+    RobotoolsCommand('robotoolsAddToReferenceLayer', 'robotools.layer_utils:add_to_reference_layer',
+                     label='Add To Reference Layer'),
+    RobotoolsCommand('robotoolsToggleReferenceLayerShading', 'robotools.layer_utils:toggle_layer_shading',
+                     label='Toggle Reference Layer Shading', args=('referenceLayer',)),
+    RobotoolsCommand('robotoolsSlice', 'robotools.geometry_utils:slice_geometry', label='Slice'),
+    RobotoolsCommand('robotoolsMirror', 'robotools.geometry_utils:mirror_geometry', label='Mirror'),
+    RobotoolsCommand('robotoolsMergeVertices', 'robotools.geometry_utils:merge_vertices', label='Merge Vertices'),
+    RobotoolsCommand('robotoolsQuadrangulate', 'robotools.geometry_utils:quadrangulate', label='Quadrangulate'),
+    RobotoolsCommand('robotoolsToggleXRay', 'robotools.robotools_utils:toggle_x_ray', label='Toggle X-Ray'),
+    RobotoolsCommand('robotoolsTargetWeld', 'robotools.geometry_utils:target_weld', label='Target Weld'),
+    RobotoolsCommand('robotoolsConnectEdges', 'robotools.geometry_utils:connect_edges', label='Connect Edges'),
+    RobotoolsCommand('robotoolsConnectEdgesFlow', 'robotools.geometry_utils:connect_edges',
+                     label='Connect Edges (Flow)', args=(True,)),
+    RobotoolsCommand('robotoolsRelaxVertices', 'robotools.geometry_utils:relax_vertices', label='Relax Vertices'),
+    RobotoolsCommand('robotoolsSuperReset', 'robotools.node_utils:super_reset', label='Super Reset'),
+    RobotoolsCommand('robotoolsToggleRetainComponentSpacing', 'robotools.node_utils:toggle_retain_component_spacing',
+                     label='Toggle Retain Component Spacing'),
+]
+
+REGISTRY = CommandRegistry()
+for _command in ROBOTOOLS_COMMANDS:
+    REGISTRY.register(_command)
+
+
+def run_command(name: str, *args, **kwargs) -> Any:
+    """
+    Run a registered command
+    @param name:
+    @return:
+    """
+    return REGISTRY.run(name, *args, **kwargs)
+
+
+def dispatch_script(name: str) -> str:
+    """
+    Python for a shelf button calling a registered command through its plug-in command
+    @param name:
+    @return:
+    """
+    return f'import maya.cmds\nmaya.cmds.{name}()'
+
+
+def log_stats():
+    """
+    Log the latency table
+    """
+    logging.info('Robotools command latency\n{}'.format(REGISTRY.report()))
+
+
+def command_hotkey(name: str, key: str, alt: bool = False, ctrl: bool = False, cmd: bool = False):
+    """
+    Hotkey running a registered command through its plug-in command
+    @param name:
+    @param key:
+    @param alt:
+    @param ctrl:
+    @param cmd:
+    @return: HotkeyDefinition
+    """
+    from robotools.utils.hotkey_utils import HotkeyDefinition
+
+    return HotkeyDefinition(f'{name}NameCommand', annotation=REGISTRY.get(name).label, key=key, mel_command=name,
+                            alt=alt, ctrl=ctrl, cmd=cmd)
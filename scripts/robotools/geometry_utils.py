@@ -1,14 +1,31 @@
 import math
+import numpy as np
 import pymel.core as pm
+import maya.api.OpenMaya as om
 
-from typing import Optional
+from typing import Optional, Dict, Tuple, Sequence, List
 from maya import mel
 
-from robotools.node_utils import State, is_node_type, set_component_mode, get_component_indices, get_component_mode, \
-    select_components, encode_components, reset_pivot
+from core.face_extraction import FaceSplitPlan, plan_face_split, group_faces_by_label
+from core.mesh_cache import MeshArrays
+from core.mesh_topology import MeshTopology, slot_edge_vertices
+from robotools.node_utils import BatchEdit, State, is_node_type, set_component_mode, get_component_mode, \
+    select_components, encode_components, reset_pivot, get_dag_path, get_node_uuid, get_selected_components, \
+    get_selected_component_array, get_selected_component_map, get_world_rotate_pivots
 from robotools.robotools_enums import Axis, ComponentType
 
 
+FACE_LABEL_COLOR_SET = 'robotoolsFaceLabel'
+
+# a reload re-runs this module over its old globals, so release the previous cache's callbacks first
+if '_TOPOLOGY_CACHE' in globals():
+    invalidate_mesh_topology()
+# mesh uuid -> (topology, topology changed and node removal callback ids)
+_TOPOLOGY_CACHE: Dict[str, Tuple[MeshTopology, List[int]]] = {}
+# scene new / open callbacks dropping every cached topology, added with the first entry
+_TOPOLOGY_SCENE_CALLBACKS: List[int] = []
+
+
 def merge_vertices(transform: Optional[pm.nt.Transform] = None, precision: int = 5) -> pm.nt.PolyMergeVert:
     """
     Merge vertices on a selected or supplied object
@@ -39,86 +56,171 @@ def get_selected_geometry():
     return geometry_list
 
 
-def get_selected_vertices(obj):
-    state = State()
-    pm.select(obj)
-    set_component_mode(ComponentType.vertex)
-    components = pm.ls(sl=True)
-    selection = [] if components == [] else get_component_indices(components)
-    state.restore()
-    return selection
+def get_selected_vertices(obj) -> List[int]:
+    return get_selected_components(obj, ComponentType.vertex)
 
 
-def get_selected_edges(obj):
-    state = State()
-    pm.select(obj)
-    pm.selectMode(component=True)
-    pm.selectType(edge=True)
-    set_component_mode(ComponentType.edge)
-    components = pm.ls(sl=True)
-    selection = [] if components == [] else get_component_indices(components)
-    pm.select(clear=True)
-    state.restore()
-    return selection
+def get_selected_edges(obj) -> List[int]:
+    return get_selected_components(obj, ComponentType.edge)
 
 
-def get_selected_faces(obj):
-    state = State()
-    pm.select(obj)
-    set_component_mode(ComponentType.face)
-    components = pm.ls(sl=True)
-    selection = [] if components == [] else get_component_indices(components)
-    state.restore()
-    return selection
+def get_selected_faces(obj) -> List[int]:
+    return get_selected_components(obj, ComponentType.face)
+
+
+def get_mesh_function_set(obj) -> om.MFnMesh:
+    """
+    Get an API 2.0 mesh function set for a transform or mesh shape
+    @param obj:
+    @return:
+    """
+    return om.MFnMesh(get_dag_path(obj, shape=True))
+
+
+def get_mesh_topology(obj) -> MeshTopology:
+    """
+    Get the cached adjacency index for a mesh, building it on first use
+    The index is dropped when Maya reports a topology change on the mesh, when the mesh is removed and when a scene
+    is opened or created
+    @param obj:
+    @return:
+    """
+    mesh_fn = get_mesh_function_set(obj)
+    uuid = get_node_uuid(mesh_fn.dagPath())
+    signature = (mesh_fn.numVertices, mesh_fn.numEdges, mesh_fn.numPolygons)
+    cached = _TOPOLOGY_CACHE.get(uuid)
+
+    if cached and cached[0].signature == signature:
+        return cached[0]
+
+    invalidate_mesh_topology(uuid)
+    face_counts, face_connects = mesh_fn.getVertices()
+    face_counts = np.array(face_counts, dtype=np.int64)
+    face_connects = np.array(face_connects, dtype=np.int64)
+    edge_vertices = slot_edge_vertices(face_counts, face_connects, get_face_edge_ids(mesh_fn, face_counts),
+                                       mesh_fn.numEdges)
+    topology = MeshTopology(face_counts=face_counts, face_connects=face_connects, edge_vertices=edge_vertices,
+                            vertex_count=mesh_fn.numVertices)
+    if not _TOPOLOGY_SCENE_CALLBACKS:
+        _TOPOLOGY_SCENE_CALLBACKS.extend(
+            om.MSceneMessage.addCallback(message, lambda *args: invalidate_mesh_topology())
+            for message in (om.MSceneMessage.kBeforeNew, om.MSceneMessage.kBeforeOpen))
+    mesh = mesh_fn.object()
+    _TOPOLOGY_CACHE[uuid] = (topology, [
+        om.MPolyMessage.addPolyTopologyChangedCallback(mesh, lambda *args: invalidate_mesh_topology(uuid)),
+        om.MNodeMessage.addNodePreRemovalCallback(mesh, lambda *args: invalidate_mesh_topology(uuid)),
+    ])
+    return topology
+
+
+def get_face_edge_ids(mesh_fn: om.MFnMesh, face_counts: np.ndarray) -> np.ndarray:
+    """
+    Maya edge id of every face-vertex in face order, from a single polyInfo query over all faces
+    Each line reads 'FACE <face>: <edge> <edge> ...' so the face ids are dropped by position
+    @param mesh_fn:
+    @param face_counts:
+    @return:
+    """
+    if not face_counts.size:
+        return np.empty(0, dtype=np.int64)
+    lines = pm.polyInfo(f'{mesh_fn.fullPathName()}.f[*]', faceToEdge=True)
+    numbers = np.array(' '.join(lines).replace('FACE', ' ').replace(':', ' ').split(), dtype=np.int64)
+    face_positions = np.cumsum(face_counts + 1) - face_counts - 1
+    keep = np.ones(numbers.size, dtype=bool)
+    keep[face_positions] = False
+    return numbers[keep]
+
+
+def invalidate_mesh_topology(uuid: Optional[str] = None):
+    """
+    Drop cached topology and its callbacks for a mesh uuid, or for every mesh if no uuid is passed
+    @param uuid:
+    """
+    for key in [uuid] if uuid else list(_TOPOLOGY_CACHE.keys()):
+        cached = _TOPOLOGY_CACHE.pop(key, None)
+        if cached:
+            om.MMessage.removeCallbacks(cached[1])
+    if uuid is None and _TOPOLOGY_SCENE_CALLBACKS:
+        om.MMessage.removeCallbacks(_TOPOLOGY_SCENE_CALLBACKS)
+        _TOPOLOGY_SCENE_CALLBACKS.clear()
 
 
 def get_faces_from_edge(obj, edge):
-    return get_component_indices(
-        pm.polyListComponentConversion(obj.e[edge], toFace=True))
+    return get_mesh_topology(obj).faces_from_edges(edge).tolist()
 
 
 def get_edges_from_face(obj, face):
-    return get_component_indices(
-        pm.polyListComponentConversion(obj.f[face], toEdge=True))
+    return get_mesh_topology(obj).edges_from_faces(face).tolist()
 
 
 def get_vertices_from_edge(obj, edge):
-    return get_component_indices(
-        pm.polyListComponentConversion(obj.e[edge], toVertex=True))
+    return get_mesh_topology(obj).vertices_from_edges(edge).tolist()
 
 
 def get_edges_from_vertex(obj, vertex):
-    return get_component_indices(
-        pm.polyListComponentConversion(obj.vtx[vertex], toEdge=True))
+    return get_mesh_topology(obj).edges_from_vertices(vertex).tolist()
 
 
 def get_vertices_from_faces(obj, faces):
-    return get_component_indices(
-        pm.polyListComponentConversion(obj.f[faces], toVertex=True))
+    return get_mesh_topology(obj).vertices_from_faces(faces).tolist()
+
+
+def get_mesh_topology_with_uvs(obj, uv_set: Optional[str] = None) -> MeshTopology:
+    """
+    Get the cached topology for a mesh with face-vertex uv ids refreshed from a uv set
+    @param obj:
+    @param uv_set: defaults to the current uv set
+    @return:
+    """
+    topology = get_mesh_topology(obj)
+    mesh_fn = get_mesh_function_set(obj)
+    uv_counts, uv_ids = mesh_fn.getAssignedUVs(uv_set) if uv_set else mesh_fn.getAssignedUVs()
+    topology.set_uvs(uv_counts=np.array(uv_counts, dtype=np.int64), uv_ids=np.array(uv_ids, dtype=np.int64),
+                     uv_count=mesh_fn.numUVs(uv_set) if uv_set else mesh_fn.numUVs())
+    return topology
+
+
+def convert_component_indices(component_map: Dict[pm.nodetypes.Transform, Sequence[int]],
+                              from_type: ComponentType = ComponentType.face,
+                              to_type: ComponentType = ComponentType.edge) -> Dict[pm.nodetypes.Transform, np.ndarray]:
+    """
+    Convert component indices for many meshes without touching the selection
+    @param component_map: mesh -> component indices
+    @param from_type: vertex, edge, face or uv
+    @param to_type: vertex, edge, face or uv
+    @return: mesh -> sorted index array of the target component type
+    """
+    uses_uvs = ComponentType.uv in (from_type, to_type)
+    result = {}
+
+    for obj, indices in component_map.items():
+        topology = get_mesh_topology_with_uvs(obj) if uses_uvs else get_mesh_topology(obj)
+        result[obj] = topology.convert(indices, from_type.name, to_type.name)
+
+    return result
 
 
 def convert_components(obj, components=None, from_type=ComponentType.face,
-                       to_type=ComponentType.edge, select=False):
-    state = State()
-    set_component_mode(from_type)
-    if components:
-        select_components(obj, components, from_type)
-    result = pm.polyListComponentConversion(pm.ls(sl=True),
-                                            fv=from_type == ComponentType.vertex,
-                                            fe=from_type == ComponentType.edge,
-                                            ff=from_type == ComponentType.face,
-                                            fuv=from_type == ComponentType.uv,
-                                            tv=to_type == ComponentType.vertex,
-                                            te=to_type == ComponentType.edge,
-                                            tf=to_type == ComponentType.face,
-                                            tuv=to_type == ComponentType.uv)
+                       to_type=ComponentType.edge, select=False) -> np.ndarray:
+    """
+    Convert components of a mesh to another component type
+    @param obj:
+    @param components: indices, defaults to the selected components of from_type
+    @param from_type:
+    @param to_type:
+    @param select: select the converted components
+    @return:
+    """
+    if components is None:
+        components = get_selected_component_array(obj, from_type)
+    result = convert_component_indices({obj: components}, from_type, to_type)[obj]
     if select:
-        pm.select(result)
-    else:
-        state.restore()
-    return [i.index() for i in pm.ls(result, flatten=True)]
+        set_component_mode(to_type)
+        select_components(obj, result, to_type)
+    return result
 
 
+@BatchEdit('sliceGeometry')
 def slice_geometry(nodes=None, axis=Axis.x, positive=True):
     """
     Slice polygon geometry along an axis
@@ -135,11 +237,10 @@ def slice_geometry(nodes=None, axis=Axis.x, positive=True):
         Axis.z: [0, 180 - positive * 180, 0]
     }
     cut_axis = angles[axis]
+    pivot_positions = get_world_rotate_pivots(nodes).tolist()
 
-    for item in nodes:
+    for item, pivot_position in zip(nodes, pivot_positions):
         pm.select(item)
-        pivot_matrix = pm.xform(query=True, piv=True, ws=True)
-        pivot_position = [pivot_matrix[0], pivot_matrix[1], pivot_matrix[2]]
         pm.polyCut(
             cutPlaneCenter=pivot_position,
             cutPlaneRotate=cut_axis,
@@ -151,6 +252,7 @@ def slice_geometry(nodes=None, axis=Axis.x, positive=True):
     state.restore()
 
 
+@BatchEdit('mirrorGeometry')
 def mirror_geometry(nodes=None, axis=Axis.x, positive=False, merge_threshold=0.001):
     """
     Mirror polygon geometry along an axis
@@ -164,8 +266,9 @@ def mirror_geometry(nodes=None, axis=Axis.x, positive=False, merge_threshold=0.0
     nodes = pm.ls(nodes) if nodes else pm.ls(sl=True, tr=True)
     direction = {Axis.x: 0 + positive, Axis.y: 2 + positive, Axis.z: 4 + positive}
 
-    for item in nodes:
-        pivot_position = [pm.xform(item, query=True, piv=True, ws=True)[i] for i in range(3)]
+    pivot_positions = get_world_rotate_pivots(nodes).tolist()
+
+    for item, pivot_position in zip(nodes, pivot_positions):
         slice_geometry(item, axis, not positive)
         pm.polyMirrorFace(item, ws=True, d=direction[axis], mergeMode=1, p=pivot_position, mt=merge_threshold, mtt=1)
 
@@ -177,24 +280,21 @@ def connect_edges(edge_flow=False):
         pm.polyConnectComponents(pm.ls(sl=True), insertWithEdgeFlow=1 if edge_flow else 0, adjustEdgeFlow=1)
 
 
+@BatchEdit('relaxVertices')
 def relax_vertices(nodes=None, iterations=2, history=False):
     state = State()
     for n in pm.ls(nodes, tr=True) if nodes else get_selected_geometry():
         selected_vertices = get_selected_vertices(n)
-        indices = selected_vertices if selected_vertices else range(len(n.vtx))
-        pm.polyAverageVertex(n.vtx[indices], iterations=iterations, ch=history)
+        indices = selected_vertices if len(selected_vertices) else range(len(n.vtx))
+        pm.polyAverageVertex(encode_components(n, indices, ComponentType.vertex), iterations=iterations, ch=history)
     state.restore()
 
 
 def extract_selected_faces():
     if get_component_mode() == ComponentType.face:
         state = State()
-        dupe_list = []
-        for item in state.object_selection:
-            pm.hilite(item, replace=True)
-            faces = get_component_indices()
-            if faces:
-                dupe_list.append(extract_faces(item, faces, False))
+        dupe_list = [extract_face_sets(node, [faces])[0]
+                     for node, faces in get_selected_component_map(ComponentType.face).items() if len(faces)]
         if dupe_list:
             set_component_mode(ComponentType.object)
             pm.select(dupe_list)
@@ -208,11 +308,7 @@ def extract_selected_faces():
 
 def extract_faces(node, faces, restore_state=True):
     state = State()
-    inverse_faces = [i for i in range(node.faces.count()) if i not in faces]
-    dupe = pm.duplicate(node)[0]
-    pm.rename(dupe, '{}_extraction'.format(node.name()))
-    pm.delete(encode_components(node, faces, ComponentType.face))
-    pm.delete(encode_components(dupe, inverse_faces, ComponentType.face))
+    dupe = extract_face_sets(node, [faces])[0]
     if restore_state:
         state.restore()
         if node in state.object_selection:
@@ -220,6 +316,161 @@ def extract_faces(node, faces, restore_state=True):
     return dupe
 
 
+@BatchEdit('extractFaceSets')
+def extract_face_sets(node, face_sets: Sequence[Sequence[int]],
+                      names: Optional[Sequence[str]] = None) -> List[pm.nodetypes.Transform]:
+    """
+    Extract several face sets from a mesh in one pass
+    The faces of every set are duplicated once into a working mesh and removed from the source, which keeps the
+    faces in no set. With several sets, each set's faces are chipped off the working mesh, faces shared with an
+    earlier set as a copy, and a single polySeparate splits it; shells of the same set are combined again.
+    If the sets cover every face, the source itself is split and no duplicate is made.
+    @param node:
+    @param face_sets: face indices per piece
+    @param names: optional name per piece, defaults to <node>_extraction; a source kept whole keeps its name
+    @return: the extracted pieces
+    """
+    empty = [i for i, faces in enumerate(face_sets) if not len(faces)]
+    if empty:
+        raise ValueError(f'Face sets {empty} are empty')
+
+    node = pm.PyNode(node)
+    node_name = node.name()
+    plan = plan_face_split(get_mesh_function_set(node).numPolygons, face_sets)
+
+    if len(plan.remainder):
+        work = pm.duplicate(node)[0]
+        pm.delete(encode_components(work, plan.remainder, ComponentType.face))
+        pm.delete(encode_components(node, plan.extracted, ComponentType.face))
+    else:
+        work = node
+
+    pieces = [work] if plan.set_count == 1 else _split_face_labels(work, plan)
+    for i, piece in enumerate(pieces):
+        if names:
+            pm.rename(piece, names[i])
+        elif piece != node:
+            pm.rename(piece, '{}_extraction'.format(node_name))
+    return pieces
+
+
+def _split_face_labels(work: pm.nodetypes.Transform, plan: FaceSplitPlan) -> List[pm.nodetypes.Transform]:
+    """
+    Split a working mesh into one piece per set of a FaceSplitPlan
+    Faces are labelled with their set in a temporary color set, which survives polySeparate, so every separated
+    shell is matched to its set with one color query rather than by output order. History is baked before the
+    labels are written so no upstream node can re-evaluate over them
+    @param work:
+    @param plan:
+    @return: one piece per set, in order
+    """
+    parent = work.getParent()
+    owned_sets = np.unique(plan.owners)
+    for i in owned_sets[:-1]:
+        pm.polyChipOff(encode_components(work, np.flatnonzero(plan.owners == i), ComponentType.face),
+                       duplicate=False, keepFacesTogether=True, constructionHistory=False)
+    for copies in plan.copies:
+        if len(copies):
+            pm.polyChipOff(encode_components(work, copies, ComponentType.face), duplicate=True,
+                           keepFacesTogether=True, constructionHistory=False)
+    # a mesh with history still gets chip off nodes, whose evaluation would drop the labels written below
+    pm.delete(work, constructionHistory=True)
+
+    mesh_fn = get_mesh_function_set(work)
+    current_color_set = mesh_fn.currentColorSetName()
+    mesh_fn.createColorSet(FACE_LABEL_COLOR_SET, False)
+    mesh_fn.setColors(om.MColorArray([om.MColor((i, 0.0, 0.0)) for i in range(plan.set_count)]),
+                      FACE_LABEL_COLOR_SET)
+    face_counts = np.array(mesh_fn.getVertices()[0], dtype=np.int64)
+    mesh_fn.assignColors(np.repeat(plan.labels(), face_counts).tolist(), FACE_LABEL_COLOR_SET)
+
+    shells: Dict[int, List[str]] = {}
+    for shell in pm.ls(pm.polySeparate(work, constructionHistory=False), transforms=True):
+        label = int(round(get_mesh_function_set(shell).getFaceVertexColors(FACE_LABEL_COLOR_SET)[0].r))
+        pm.polyColorSet(shell, delete=True, colorSet=FACE_LABEL_COLOR_SET)
+        if current_color_set:
+            pm.polyColorSet(shell, currentColorSet=True, colorSet=current_color_set)
+        shells.setdefault(label, []).append(shell.longName())
+
+    pieces = []
+    for i in range(plan.set_count):
+        if len(shells[i]) == 1:
+            piece = pm.PyNode(shells[i][0])
+        else:
+            piece = pm.polyUnite(shells[i], constructionHistory=False, mergeUVSets=True)[0]
+            pm.delete([x for x in shells[i] if pm.objExists(x)])
+        if piece.getParent() != parent:
+            piece = pm.parent(piece, parent)[0] if parent else pm.parent(piece, world=True)[0]
+        pieces.append(piece)
+    pm.delete(work)
+    return pieces
+
+
+def split_mesh_by_material(node) -> List[pm.nodetypes.Transform]:
+    """
+    Split a mesh into one piece per assigned shading group
+    @param node:
+    @return:
+    """
+    node = pm.PyNode(node)
+    shading_groups, face_shaders = get_mesh_function_set(node).getConnectedShaders(0)
+    groups = group_faces_by_label(np.array(face_shaders, dtype=np.int64))
+    names = ['{}_{}'.format(node.name(), om.MFnDependencyNode(shading_groups[x]).name() if x >= 0 else 'unassigned')
+             for x in groups.keys()]
+    return extract_face_sets(node, list(groups.values()), names)
+
+
+def create_mesh(mesh: MeshArrays, shading_group: str = 'initialShadingGroup',
+                material_groups: Optional[Sequence] = None) -> pm.nodetypes.Transform:
+    """
+    Build a mesh directly from cached arrays with MFnMesh.create
+    Edge smoothing is set before the normals, which are written as the FBX stores them
+    @param mesh:
+    @param shading_group: assigned when the mesh has no materials
+    @param material_groups: shading group per entry of mesh.materials
+    @return:
+    """
+    mesh_fn = om.MFnMesh()
+    points = om.MPointArray([om.MPoint(x) for x in np.asarray(mesh.points).tolist()])
+    if mesh.u_values is not None:
+        transform = mesh_fn.create(points, mesh.face_counts.tolist(), mesh.face_connects.tolist(),
+                                   mesh.u_values.tolist(), mesh.v_values.tolist())
+        mesh_fn.assignUVs(mesh.uv_counts.tolist(), mesh.uv_ids.tolist())
+        if mesh.uv_set and mesh.uv_set != mesh_fn.currentUVSetName():
+            mesh_fn.renameUVSet(mesh_fn.currentUVSetName(), mesh.uv_set)
+    else:
+        transform = mesh_fn.create(points, mesh.face_counts.tolist(), mesh.face_connects.tolist())
+
+    if mesh.hard_edge_slots is not None:
+        # the created mesh keeps the face-vertex layout, so its slot -> edge map gives the Maya id of each hard edge
+        smooths = np.ones(mesh_fn.numEdges, dtype=bool)
+        smooths[get_mesh_topology(mesh_fn.fullPathName()).slot_edges[mesh.hard_edge_slots]] = False
+        mesh_fn.setEdgeSmoothings(list(range(mesh_fn.numEdges)), smooths.tolist())
+        mesh_fn.cleanupEdgeSmoothing()
+
+    if mesh.normals is not None:
+        normals = om.MVectorArray([om.MVector(x) for x in np.asarray(mesh.normals)[mesh.normal_ids].tolist()])
+        face_ids = np.repeat(np.arange(mesh.face_count), mesh.face_counts).tolist()
+        mesh_fn.setFaceVertexNormals(normals, face_ids, mesh.face_connects.tolist())
+
+    transform = pm.PyNode(om.MFnDagNode(transform).fullPathName())
+    pm.rename(transform, mesh.name)
+    pm.rename(transform.getShape(), f'{transform.name()}Shape')
+
+    if material_groups and mesh.material_ids is not None:
+        face_groups = group_faces_by_label(mesh.material_ids)
+        if len(face_groups) == 1:
+            pm.sets(material_groups[next(iter(face_groups))], edit=True, forceElement=transform)
+        else:
+            for material_id, faces in face_groups.items():
+                pm.sets(material_groups[material_id], edit=True,
+                        forceElement=encode_components(transform, faces, ComponentType.face))
+    else:
+        pm.sets(shading_group, edit=True, forceElement=transform)
+    return transform
+
+
+@BatchEdit('combine')
 def combine(nodes=None, construction_history=False):
     state = State()
     nodes = pm.ls(nodes) if nodes else pm.ls(sl=True, transforms=True)
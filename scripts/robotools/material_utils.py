@@ -3,9 +3,28 @@ import pymel.core as pm
 from pathlib import Path
 from typing import Optional, List, Tuple
 
+from core.lazy_attributes import lazy_attributes
 
-FILE_TEXTURE_NODES: List[pm.nodetypes.File] = pm.ls(type=pm.nodetypes.File)
-LAMBERT_SHADER_NODES: List[pm.nodetypes.Lambert] = pm.ls(type=pm.nodetypes.Lambert)
+
+def get_file_texture_nodes() -> List[pm.nodetypes.File]:
+    """
+    File texture nodes in the current scene
+    @return:
+    """
+    return pm.ls(type=pm.nodetypes.File)
+
+
+def get_lambert_shader_nodes() -> List[pm.nodetypes.Lambert]:
+    """
+    Lambert shader nodes in the current scene
+    @return:
+    """
+    return pm.ls(type=pm.nodetypes.Lambert)
+
+
+# FILE_TEXTURE_NODES and LAMBERT_SHADER_NODES used to be scene snapshots taken at import
+__getattr__ = lazy_attributes(__name__, {'FILE_TEXTURE_NODES': get_file_texture_nodes,
+                                         'LAMBERT_SHADER_NODES': get_lambert_shader_nodes}, cached=False)
 
 
 def apply_shader(shading_group, obj_list: Optional[pm.nodetypes.Transform] = None):
@@ -34,6 +53,23 @@ def lambert_shader(name: str, color: Optional = None):
     return shader, shading_group
 
 
+def material_from_spec(spec) -> Tuple[pm.nodetypes.Lambert, pm.nodetypes.ShadingEngine]:
+    """
+    Create a Lambert shader and shading group matching an FBX material, named as the FBX importer names them
+    @param spec: core.mesh_cache.MaterialSpec
+    @return:
+    """
+    shader = pm.shadingNode('lambert', asShader=True, name=spec.name)
+    shading_group = pm.sets(renderable=True, noSurfaceShader=True, empty=True, name=f'{shader.name()}SG')
+    pm.connectAttr(shader.outColor, shading_group.surfaceShader)
+    shader.color.set(spec.color)
+    shader.diffuse.set(spec.diffuse)
+    shader.ambientColor.set(spec.ambient_color)
+    shader.incandescence.set(spec.incandescence)
+    shader.transparency.set(spec.transparency)
+    return shader, shading_group
+
+
 def get_shading_group_from_shader(shader):
     """
     Get the shading group for a shader
@@ -59,7 +95,7 @@ def lambert_file_texture_shader(texture_path: Path, name=None, check_existing: b
     shader_name = f'{name}Shader'
 
     if check_existing:
-        output_shader = next((x for x in LAMBERT_SHADER_NODES if x.name() == shader_name), None)
+        output_shader = next(iter(pm.ls(shader_name, type=pm.nodetypes.Lambert)), None)
         if output_shader:
             return output_shader, get_shading_group_from_shader(output_shader)
 
@@ -93,7 +129,7 @@ def file_texture_node(texture_path: Path, name: Optional[str] = None, check_exis
     file_node_name = f'{name}File'
 
     if check_existing:
-        file_node = next((x for x in FILE_TEXTURE_NODES if x.name() == file_node_name), None)
+        file_node = next(iter(pm.ls(file_node_name, type=pm.nodetypes.File)), None)
         if file_node:
             return file_node
 
@@ -18,21 +18,33 @@ def create_rigging_layers():
 def create_joints_from_transforms(transforms, scale=0.2):
     joints = []
     pm.select(clear=True)
-    for i in transforms:
-        joint = pm.joint(p=pm.getAttr(i.translate), radius=scale)
+    for position in node_utils.get_translations(transforms).tolist():
+        joint = pm.joint(p=position, radius=scale)
         joints.append(joint)
     reorient_joints(joints[0])
     return joints[0]
 
 
-def create_joints_from_hierarchy(node, parent=None, scale=0.2):
+def create_joints_from_hierarchy(node, parent=None, scale=0.2, positions=None):
+    """
+    Create a joint chain matching a transform hierarchy
+    The world positions of the whole hierarchy are read in one pass
+    @param node:
+    @param parent:
+    @param scale:
+    @param positions: world positions by node, read from the hierarchy if None
+    @return: root joint
+    """
+    if positions is None:
+        nodes = [node] + pm.listRelatives(node, allDescendents=True, type=pm.nodetypes.Transform)
+        positions = dict(zip(nodes, node_utils.get_world_rotate_pivots(nodes).tolist()))
     if parent:
         pm.select(parent)
     else:
         pm.select(clear=True)
-    joint = pm.joint(p=maya_node.get_world_space_translation(node), radius=scale)
+    joint = pm.joint(p=positions[node], radius=scale)
     for i in pm.listRelatives(node, children=True, type=pm.nodetypes.Transform):
-        create_joints_from_hierarchy(i, parent=joint, scale=scale)
+        create_joints_from_hierarchy(i, parent=joint, scale=scale, positions=positions)
     return get_root_joint(joint)
 
 
@@ -73,11 +85,23 @@ def reorient_selected_joints():
         reorient_joints(root_joint)
 
 
-def create_locators_from_joints(joint, parent=None):
-    locator = maya_node.create_locator(maya_node.get_world_space_translation(joint))
-    pm.parent(locator, parent)
-    for i in pm.listRelatives(joint):
-        create_locators_from_joints(i, locator)
+def create_locators_from_joints(joint, parent=None, positions=None):
+    """
+    Create a locator hierarchy matching a joint hierarchy
+    The world positions of the whole hierarchy are read in one pass
+    @param joint:
+    @param parent:
+    @param positions: world positions by joint, read from the hierarchy if None
+    @return: root locator
+    """
+    if positions is None:
+        joints = [joint] + pm.listRelatives(joint, allDescendents=True, type=pm.nodetypes.Transform)
+        positions = dict(zip(joints, node_utils.get_world_rotate_pivots(joints).tolist()))
+    locator = node_utils.create_locator(positions[joint])
+    if parent:
+        pm.parent(locator, parent)
+    for i in pm.listRelatives(joint, type=pm.nodetypes.Transform):
+        create_locators_from_joints(i, locator, positions)
     return get_root_joint(locator)
 
 
@@ -2,9 +2,45 @@ import os
 import pymel.core as pm
 import logging
 
-from typing import List
+from collections import Counter
+from typing import Any, Dict, List
 from enum import Enum
 from pathlib import Path
+from maya import cmds
+
+from robotools import PROJECT_ROOT, node_utils
+from core.iff_scanner import SceneInfo, scan_scene
+from core.profiler import Profiler
+
+# State moved to node_utils, the alias keeps maya_scene.State working for existing scripts
+State = node_utils.State
+
+
+def get_maya_memory() -> int:
+    """
+    Heap memory used by Maya in bytes
+    @return:
+    """
+    return int(cmds.memory(heapMemory=True, megaByte=True) * 1024 * 1024)
+
+
+def inspect_scene_result(result: Any) -> Dict[str, Any]:
+    """
+    Node and reference counts for the return value of a load, import or reference call
+    @param result: list of new nodes or a FileReference
+    @return:
+    """
+    nodes = result.nodes() if isinstance(result, pm.system.FileReference) else (result or [])
+    typed = cmds.ls([str(x) for x in nodes], showType=True) if nodes else []
+    return {
+        'node_count': len(nodes),
+        'node_types': dict(Counter(typed[1::2]).most_common()),
+        'reference_count': len(cmds.file(query=True, reference=True) or []),
+    }
+
+
+PROFILER: Profiler = Profiler(report_dir=PROJECT_ROOT.joinpath('profiles'), memory_sampler=get_maya_memory,
+                              inspector=inspect_scene_result)
 
 
 def get_scene_name(include_extension: bool = False) -> str:
@@ -32,6 +68,7 @@ def new_scene():
     pm.system.newFile(force=True)
 
 
+@PROFILER.profile(label_arg='import_path')
 def import_model(import_path: Path) -> List[pm.nodetypes.Transform]:
     """
     Imports a file
@@ -41,6 +78,7 @@ def import_model(import_path: Path) -> List[pm.nodetypes.Transform]:
     return nodes
 
 
+@PROFILER.profile(label_arg='file_path')
 def load_scene(file_path: Path, force: bool = True):
     """
     Load a scene in Maya
@@ -51,6 +89,16 @@ def load_scene(file_path: Path, force: bool = True):
     return pm.system.openFile(file_path.as_posix(), force=force, returnNewNodes=True)
 
 
+def get_scene_info(file_path: Path) -> SceneInfo:
+    """
+    Read version, plug-ins, references and node counts from a Maya binary scene without opening it
+    @param file_path:
+    @return:
+    """
+    assert file_path.exists(), 'Path does not exist.'
+    return scan_scene(file_path)
+
+
 def save_scene(force: bool = False) -> bool:
     """
     Perform a file save operation
@@ -71,6 +119,7 @@ def save_scene(force: bool = False) -> bool:
         return False
 
 
+@PROFILER.profile(label_arg='file_path')
 def create_reference(file_path: Path, force: bool = False) -> pm.system.FileReference:
     """
     Creates a reference in the Maya scene
@@ -84,50 +133,6 @@ def create_reference(file_path: Path, force: bool = False) -> pm.system.FileRefe
     return pm.system.createReference(file_path.as_posix())
 
 
-class State:
-    """Query and restore selection/component mode"""
-
-    def __init__(self):
-        self.component_mode = get_component_mode()
-        self.selection = pm.ls(sl=True)
-        if self.object_mode:
-            self.object_selection = pm.ls(sl=True)
-            self.component_selection = []
-        else:
-            self.component_selection = pm.ls(sl=True)
-            set_component_mode(ComponentType.object)
-            self.object_selection = pm.ls(sl=True)
-            set_component_mode(self.component_mode)
-            pm.hilite(self.object_selection)
-
-    def restore(self):
-        """
-        Reset the Maya scene to the last state
-        """
-        if self.object_selection:
-            pm.select(self.object_selection, noExpand=True)
-            set_component_mode(self.component_mode)
-        else:
-            set_component_mode(ComponentType.object)
-            pm.select(clear=True)
-        if not self.object_mode:
-            pm.select(self.component_selection)
-
-    @property
-    def object_mode(self) -> bool:
-        return self.component_mode == ComponentType.object
-
-    def remove_objects(self, objects: List[pm.nodetypes.Transform]) -> object:
-        """
-        Remove objects from current selection
-        Sometimes necessary as pm.objExists check causes an exception
-        @param objects:
-        """
-        for item in list(objects):
-            if item in self.object_selection:
-                self.object_selection.remove(item)
-
-
 class ComponentType(Enum):
     vertex = 'vertex'
     edge = 'edge'
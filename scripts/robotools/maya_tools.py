@@ -1,16 +1,18 @@
 import logging
 
-from maya.OpenMayaUI import MQtUtil
 import pymel.core as pm
 from PySide2.QtWidgets import QWidget
-from shiboken2 import wrapInstance
 from typing import Type, List
 from importlib import reload
 
+from core.lazy_attributes import lazy_attributes
+from robotools.widgets.maya_widget import get_maya_main_window
+
 logging.basicConfig()
 logging.getLogger().setLevel(logging.DEBUG)
 
-MAYA_MAIN_WINDOW: QWidget = wrapInstance(int(MQtUtil.mainWindow()), QWidget)
+
+__getattr__ = lazy_attributes(__name__, {'MAYA_MAIN_WINDOW': get_maya_main_window})
 
 
 def get_widget(widget_class: Type[QWidget], first_only: bool = True) -> Type[QWidget] or List[Type[QWidget]] or None:
@@ -20,12 +22,11 @@ def get_widget(widget_class: Type[QWidget], first_only: bool = True) -> Type[QWi
     @param first_only: set to true to only pass the first instance
     @return:
     """
-    for x in MAYA_MAIN_WINDOW.children():
-        print(x)
+    children = get_maya_main_window().children()
     if first_only:
-        return next((x for x in MAYA_MAIN_WINDOW.children() if type(x) is widget_class), None)
+        return next((x for x in children if type(x) is widget_class), None)
     else:
-        return [x for x in MAYA_MAIN_WINDOW.children() if type(x) is widget_class]
+        return [x for x in children if type(x) is widget_class]
 
 
 def launch_utility(module: Type, utility_class: Type, **kwargs):
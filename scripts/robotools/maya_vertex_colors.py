@@ -1,7 +1,17 @@
+import numpy as np
 import pymel.core as pm
+import maya.api.OpenMaya as om
 import random
 
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.vertex_color_groups import ColorKey, ColorFaceIndex, face_colors_from_face_vertex_colors, \
+    group_faces_by_color
+from robotools import node_utils, geometry_utils
+
+COLOR_PRECISION: int = 4
+DEFAULT_COLOR_SET: str = 'colorSet1'
+UNSET_COLOR: om.MColor = om.MColor((-1.0, -1.0, -1.0, -1.0))
 
 
 def random_vector3() -> list:
@@ -9,55 +19,279 @@ def random_vector3() -> list:
 
 
 def apply_vertex_color(rgb_color=None, display=True):
+    """
+    Color the selected faces of every selected mesh, one undoable polyColorPerVertex call per mesh
+    @param rgb_color: defaults to a random color
+    @param display:
+    """
     vertex_color = rgb_color if rgb_color else random_vector3()
-    if ad_node.get_component_mode() == ad_node.ComponentType.face:
-        for obj in ad_poly.get_selected_geometry():
-            for face in ad_node.get_selected_faces(obj):
-                pm.polyColorPerVertex(obj.f[face], colorRGB=vertex_color, cdo=display)
+    if node_utils.get_component_mode() == node_utils.ComponentType.face:
+        for obj, faces in node_utils.get_selected_component_map(node_utils.ComponentType.face).items():
+            pm.polyColorPerVertex(node_utils.encode_components(obj, faces), colorRGB=vertex_color, cdo=display)
 
 
 def remove_vertex_color(display=True):
-    if ad_node.get_component_mode() == ad_node.ComponentType.face:
-        for obj in ad_poly.get_selected_geometry():
-            for face in ad_node.get_selected_faces(obj):
-                pm.polyColorPerVertex(obj.f[face], remove=True, cdo=display)
-
-
-def get_face_vertex_color_dict(node):
-    color_dict = {}
-    if pm.polyColorSet(node, q=True, currentColorSet=True):
-        for fid in range(node.faces.count()):
-            color_value = pm.polyColorPerVertex(node.f[fid], q=True, colorRGB=True)
-            color_key = formatted_color(color_value)
-            if color_key in color_dict.keys():
-                color_dict[color_key].append(fid)
-            else:
-                color_dict[color_key] = [fid]
-    return color_dict
-
-
-def select_faces_by_selected_vertex_colors(transforms=None):
-    for node in ad_node.get_transforms(transforms):
-        selected_colors = []
-        for fid in ad_node.get_selected_faces(node):
-            color_value = pm.polyColorPerVertex(node.f[fid], q=True, colorRGB=True)
-            selected_colors.append(formatted_color(color_value))
-        color_dict = get_face_vertex_color_dict(node)
-        for color_value in list(set(selected_colors)):
-            pm.select(node.f[color_dict[color_value]], add=True)
-
-
-def select_faces_by_vertex_color(color: Any, transforms=None):
-    transforms = ad_node.get_transforms(transforms)
-    # pm.select(clear=True)
+    """
+    Remove colors from the selected faces of every selected mesh, one call per mesh
+    @param display:
+    """
+    if node_utils.get_component_mode() == node_utils.ComponentType.face:
+        for obj, faces in node_utils.get_selected_component_map(node_utils.ComponentType.face).items():
+            pm.polyColorPerVertex(node_utils.encode_components(obj, faces), remove=True, cdo=display)
+
+
+def apply_face_colors(node, faces: Sequence[int], colors: np.ndarray, display: bool = True):
+    """
+    Set a color per face with a single MFnMesh.setFaceColors write
+    Intended for scripted colorization of large meshes, the API write is not recorded in the undo queue
+    @param node:
+    @param faces: face indices
+    @param colors: (N, 3) rgb array matching faces, or a single rgb color for all faces
+    @param display: turn on vertex color display
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.float64), (faces.size, 3))
+    mesh_fn = geometry_utils.get_mesh_function_set(node)
+
+    if not mesh_fn.numColorSets:
+        mesh_fn.createColorSet(DEFAULT_COLOR_SET, False)
+        mesh_fn.setCurrentColorSetName(DEFAULT_COLOR_SET)
+
+    mesh_fn.setFaceColors(om.MColorArray([om.MColor(x) for x in colors.tolist()]), om.MIntArray(faces.tolist()))
+    pm.setAttr(f'{mesh_fn.fullPathName()}.displayColors', display)
+
+
+def remove_face_colors(node, faces: Sequence[int]):
+    """
+    Remove the colors of faces with a single MFnMesh.removeFaceColors write, not undoable
+    @param node:
+    @param faces:
+    """
+    mesh_fn = geometry_utils.get_mesh_function_set(node)
+    if mesh_fn.numColorSets:
+        mesh_fn.removeFaceColors(om.MIntArray(np.asarray(faces, dtype=np.int64).tolist()))
+
+
+def get_face_vertex_colors(node, color_set: Optional[str] = None) -> np.ndarray:
+    """
+    Read every face-vertex color of a mesh with one API call
+    @param node:
+    @param color_set: defaults to the current color set
+    @return: (face-vertex count, 4) rgba array, unset colors are -1
+    """
+    mesh_fn = geometry_utils.get_mesh_function_set(node)
+    colors = mesh_fn.getFaceVertexColors(color_set, UNSET_COLOR) if color_set else \
+        mesh_fn.getFaceVertexColors(defaultUnsetColor=UNSET_COLOR)
+    # API 2.0 arrays expose no buffer, numpy reads the MColors through the sequence protocol without Python tuples
+    return np.array(colors, dtype=np.float64).reshape(-1, 4)
+
+
+def get_face_colors(node, color_set: Optional[str] = None) -> np.ndarray:
+    """
+    Average color per face
+    @param node:
+    @param color_set:
+    @return: (face count, 3) rgb array, NaN for faces without a color
+    """
+    face_counts = geometry_utils.get_mesh_function_set(node).getVertices()[0]
+    return face_colors_from_face_vertex_colors(get_face_vertex_colors(node, color_set), face_counts)
+
+
+def get_color_face_index(node, precision: int = COLOR_PRECISION) -> ColorFaceIndex:
+    """
+    Build the color -> faces reverse index of a mesh
+    @param node:
+    @param precision:
+    @return:
+    """
+    if not pm.polyColorSet(node, q=True, currentColorSet=True):
+        face_count = geometry_utils.get_mesh_function_set(node).numPolygons
+        return ColorFaceIndex(np.empty((0, 3)), np.full(face_count, -1, dtype=np.int64), precision)
+    return ColorFaceIndex.from_face_colors(get_face_colors(node), precision)
+
+
+def get_face_vertex_color_dict(node, precision: int = COLOR_PRECISION) -> Dict[ColorKey, np.ndarray]:
+    """
+    Group the faces of a mesh by color
+    @param node:
+    @param precision:
+    @return: (r, g, b) -> face indices
+    """
+    if not pm.polyColorSet(node, q=True, currentColorSet=True):
+        return {}
+    return group_faces_by_color(get_face_colors(node), precision)
+
+
+class MeshChangeTracker:
+    """
+    Per-mesh change counters keyed on mesh uuid
+    A node dirty callback on each tracked mesh shape bumps its counter, so cached data can be
+    validated by comparing counters rather than re-reading the mesh.
+    A mesh stops being tracked when it is removed, and every mesh when a scene is opened or created.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._callbacks: Dict[str, List[int]] = {}
+        self._scene_callbacks: List[int] = []
+        self.untrack_listeners: List[Callable[[Optional[str]], None]] = []
+
+    def counter(self, node) -> Tuple[str, int]:
+        """
+        Get the identity and current change count of a mesh, tracking it on first use
+        @param node:
+        @return: uuid, change count
+        """
+        dag_path = node_utils.get_dag_path(node, shape=True)
+        uuid = node_utils.get_node_uuid(dag_path)
+        if uuid not in self._callbacks:
+            if not self._scene_callbacks:
+                self._scene_callbacks = [om.MSceneMessage.addCallback(message, lambda *args: self.clear())
+                                         for message in (om.MSceneMessage.kBeforeNew, om.MSceneMessage.kBeforeOpen)]
+            self._counters.setdefault(uuid, 0)
+            mesh = dag_path.node()
+            self._callbacks[uuid] = [
+                om.MNodeMessage.addNodeDirtyCallback(mesh, lambda *args: self.bump(uuid)),
+                om.MNodeMessage.addNodePreRemovalCallback(mesh, lambda *args: self.untrack(uuid)),
+            ]
+        return uuid, self._counters[uuid]
+
+    def bump(self, uuid: str):
+        self._counters[uuid] = self._counters.get(uuid, 0) + 1
+
+    def untrack(self, uuid: str):
+        """
+        Remove the callbacks and counter of a mesh, e.g. as it is deleted
+        @param uuid:
+        """
+        for callback_id in self._callbacks.pop(uuid, []):
+            om.MMessage.removeCallback(callback_id)
+        self._counters.pop(uuid, None)
+        for listener in self.untrack_listeners:
+            listener(uuid)
+
+    def clear(self):
+        """
+        Remove all callbacks and counters
+        """
+        for callback_ids in self._callbacks.values():
+            om.MMessage.removeCallbacks(callback_ids)
+        if self._scene_callbacks:
+            om.MMessage.removeCallbacks(self._scene_callbacks)
+        self._callbacks.clear()
+        self._scene_callbacks = []
+        self._counters.clear()
+        for listener in self.untrack_listeners:
+            listener(None)
+
+
+class VertexColorCache:
+    """
+    Color -> faces reverse index per mesh, kept across calls and rebuilt only when the mesh has changed
+    """
+
+    def __init__(self, tracker: Optional[MeshChangeTracker] = None, precision: int = COLOR_PRECISION):
+        self.tracker = tracker if tracker else MeshChangeTracker()
+        self.tracker.untrack_listeners.append(self.discard)
+        self.precision = precision
+        self._entries: Dict[str, Tuple[int, ColorFaceIndex]] = {}
+
+    def color_index(self, node) -> ColorFaceIndex:
+        """
+        The reverse index for a mesh
+        @param node:
+        @return:
+        """
+        uuid, counter = self.tracker.counter(node)
+        entry = self._entries.get(uuid)
+        if entry is None or entry[0] != counter:
+            entry = (counter, get_color_face_index(node, self.precision))
+            self._entries[uuid] = entry
+        return entry[1]
+
+    def color_dict(self, node) -> Dict[ColorKey, np.ndarray]:
+        """
+        Cached equivalent of get_face_vertex_color_dict
+        @param node:
+        @return:
+        """
+        return self.color_index(node).as_dict()
+
+    def palette(self, node) -> List[ColorKey]:
+        """
+        The distinct colors of a mesh
+        @param node:
+        @return:
+        """
+        return self.color_index(node).keys
+
+    def discard(self, uuid: Optional[str] = None):
+        """
+        Drop the cached index of a mesh, or of every mesh if no uuid is passed
+        @param uuid:
+        """
+        if uuid is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(uuid, None)
+
+    def clear(self):
+        """
+        Drop every cached index and remove the tracker's callbacks
+        """
+        self.tracker.clear()
+        self._entries.clear()
+
+
+# a reload re-runs this module over its old globals, so release the previous cache's callbacks first
+if 'COLOR_CACHE' in globals():
+    COLOR_CACHE.clear()
+COLOR_CACHE: VertexColorCache = VertexColorCache()
+
+
+def split_mesh_by_vertex_color(node) -> List[pm.nodetypes.Transform]:
+    """
+    Split a mesh into one piece per face color
+    @param node:
+    @return:
+    """
+    color_dict = get_face_vertex_color_dict(node)
+    return geometry_utils.extract_face_sets(node, list(color_dict.values()))
+
+
+def select_faces_by_selected_vertex_colors(transforms=None, tolerance: Optional[float] = None):
+    """
+    Add faces sharing a color with the selected faces to the selection, in one select call
+    @param transforms:
+    @param tolerance: rgb distance for colors to match, defaults to an exact match
+    """
+    selected_faces = node_utils.get_selected_component_map(node_utils.ComponentType.face)
+    components = []
+    for node in node_utils.get_transforms(transforms):
+        faces = selected_faces.get(node)
+        if faces is not None and len(faces):
+            matched = COLOR_CACHE.color_index(node).faces_matching_faces(faces, tolerance)
+            components.extend(node_utils.encode_components(node, matched))
+    if components:
+        pm.select(components, add=True)
+
+
+def select_faces_by_vertex_color(color: Any, transforms=None, tolerance: Optional[float] = None):
+    """
+    Add faces of a color to the selection, in one select call
+    @param color: rgb
+    @param transforms:
+    @param tolerance: rgb distance for colors to match, defaults to an exact match
+    """
+    transforms = node_utils.get_transforms(transforms)
+    components = []
     for node in transforms:
-        faces = get_face_vertex_color_dict(node).get(str(color))
-        if faces:
-            pm.select(node.f[faces], add=True)
-            # pm.hilite(node)
-    # pm.select(transforms)
+        faces = COLOR_CACHE.color_index(node).faces_for_colors([color[:3]], tolerance)
+        components.extend(node_utils.encode_components(node, faces))
+    if components:
+        pm.select(components, add=True)
     pm.hilite(transforms)
 
 
-def formatted_color(rgb_float_list: Any, precision: int = 4) -> str:
+def formatted_color(rgb_float_list: Any, precision: int = COLOR_PRECISION) -> str:
     return str([round(x, precision) for x in rgb_float_list])
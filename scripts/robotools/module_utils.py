@@ -1,11 +1,31 @@
 import pymel.util
 
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
+from core.lazy_attributes import lazy_attributes
 
-LOCAL_MAYA_MODULE_DIRECTORY: Path = Path(pymel.util.getEnv('MAYA_APP_DIR')).joinpath('modules')
-LOCAL_MAYA_MODULE_FILES: List[Path] = LOCAL_MAYA_MODULE_DIRECTORY.glob('*.mod')
+
+@lru_cache(maxsize=None)
+def get_local_module_directory() -> Path:
+    """
+    The modules folder of the local Maya app directory
+    @return:
+    """
+    return Path(pymel.util.getEnv('MAYA_APP_DIR')).joinpath('modules')
+
+
+def get_local_module_files() -> List[Path]:
+    """
+    Module files in the local Maya app directory
+    @return:
+    """
+    return list(get_local_module_directory().glob('*.mod'))
+
+
+__getattr__ = lazy_attributes(__name__, {'LOCAL_MAYA_MODULE_DIRECTORY': get_local_module_directory,
+                                         'LOCAL_MAYA_MODULE_FILES': get_local_module_files}, cached=False)
 
 
 def get_module_files(root: Path):
@@ -21,9 +41,9 @@ def format_module_files():
     """
     from common_lib import PYTHON_TOOLS
     
-    local_files = [str(x) for x in LOCAL_MAYA_MODULE_FILES]
+    local_files = [str(x) for x in get_local_module_files()]
     project_files = [str(x) for x in get_module_files(PYTHON_TOOLS)]
-    print(f'Local modules [{LOCAL_MAYA_MODULE_DIRECTORY}]: \n' + '\n'.join(local_files))
+    print(f'Local modules [{get_local_module_directory()}]: \n' + '\n'.join(local_files))
     print(f'\nProject modules found [{PYTHON_TOOLS}]: \n' + '\n'.join(project_files))
 
 
@@ -1,12 +1,20 @@
+import functools
+import numpy as np
 import pymel.core as pm
+import maya.api.OpenMaya as om
 import random
 
-from typing import Sequence, List, Optional
+from dataclasses import dataclass
+from maya import cmds
+from typing import Callable, Sequence, List, Optional, Dict
+
+from core.component_strings import decode_components, decode_component_strings, encode_component_strings
+from core.transform_math import local_translations
 from robotools.robotools_enums import MayaNodeType, ComponentType
 
 
 def get_world_space_translation(transform):
-    return pm.xform(transform, query=True, worldSpace=True, rotatePivot=True)
+    return get_world_rotate_pivots([transform])[0].tolist()
 
 
 def create_locator(translation: Sequence[float], local_scale: float = 0.1):
@@ -81,42 +89,142 @@ def create_random_symmetrical_hierarchy(count, scale):
 
 
 class State:
-    """Query and restore selection/component mode"""
+    """
+    Snapshot and restore selection/component mode
+    The object selection is read from the hilite list so component mode is never toggled
+    Usable as a context manager, restoring on exit
+    """
 
     def __init__(self):
         self.component_mode = get_component_mode()
         self.selection = pm.ls(sl=True)
         if self.object_mode:
-            self.object_selection = pm.ls(sl=True)
+            self.object_selection = list(self.selection)
             self.component_selection = []
         else:
-            self.component_selection = pm.ls(sl=True)
-            set_component_mode(ComponentType.object)
-            self.object_selection = pm.ls(sl=True)
-            set_component_mode(self.component_mode)
-            pm.hilite(self.object_selection)
+            self.object_selection = pm.ls(hilite=True)
+            self.component_selection = list(self.selection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.restore()
+        return False
 
     def restore(self):
-        if self.object_selection:
-            pm.select(self.object_selection, noExpand=True)
-            set_component_mode(self.component_mode)
+        """
+        Reset the Maya scene to the last state
+        """
+        set_component_mode(self.component_mode)
+        if self.object_mode:
+            if self.object_selection:
+                pm.select(self.object_selection, noExpand=True)
+            else:
+                pm.select(clear=True)
         else:
-            set_component_mode(ComponentType.object)
-            pm.select(clear=True)
-        if not self.object_mode:
-            pm.select(self.component_selection)
+            if self.object_selection:
+                pm.hilite(self.object_selection, replace=True)
+            else:
+                hilited = pm.ls(hilite=True)
+                if hilited:
+                    pm.hilite(hilited, unHilite=True)
+            if self.component_selection:
+                pm.select(self.component_selection)
+            else:
+                pm.select(clear=True)
 
     @property
-    def object_mode(self):
+    def object_mode(self) -> bool:
         return self.component_mode == ComponentType.object
 
-    def remove_objects(self, objects):
-        # Sometimes necessary as pm.objExists check causes an exception
+    def remove_objects(self, objects: List[pm.nodetypes.Transform]):
+        """
+        Remove objects from the stored selection
+        Sometimes necessary as pm.objExists check causes an exception
+        @param objects:
+        """
         for item in list(objects):
             if item in self.object_selection:
                 self.object_selection.remove(item)
 
 
+class BatchEdit:
+    """
+    Group the commands of a multi-step edit
+    Opens one undo chunk, suspends viewport refresh and optionally switches construction history off, restoring
+    each to its prior state on exit or exception, so a refresh the caller suspended stays suspended. Usable as a
+    context manager or a decorator. Nested batches are absorbed by the outermost one, so decorated functions can
+    call each other freely
+    Set BatchEdit.enabled to False to run every batch as plain commands, e.g. to time the difference
+    """
+    enabled: bool = True
+    _depth: int = 0
+
+    def __init__(self, name: str = 'robotoolsBatchEdit', undo_chunk: bool = True, suspend_refresh: bool = True,
+                 construction_history: Optional[bool] = None):
+        """
+        @param name: undo chunk name
+        @param undo_chunk:
+        @param suspend_refresh:
+        @param construction_history: False to switch construction history off, None leaves it alone
+        """
+        self.name = name
+        self.undo_chunk = undo_chunk
+        self.suspend_refresh = suspend_refresh
+        self.construction_history = construction_history
+        self._active = False
+        self._history_state: Optional[bool] = None
+        self._refresh_suspended: Optional[bool] = None
+
+    def __enter__(self):
+        if not BatchEdit.enabled or BatchEdit._depth:
+            return self
+
+        BatchEdit._depth += 1
+        self._active = True
+        if self.undo_chunk:
+            pm.undoInfo(openChunk=True, chunkName=self.name)
+        if self.suspend_refresh:
+            self._refresh_suspended = pm.refresh(query=True, suspend=True)
+            if not self._refresh_suspended:
+                pm.refresh(suspend=True)
+        if self.construction_history is not None:
+            self._history_state = pm.constructionHistory(query=True, toggle=True)
+            pm.constructionHistory(toggle=self.construction_history)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self._active:
+            return False
+
+        try:
+            if self._history_state is not None:
+                pm.constructionHistory(toggle=self._history_state)
+            if self.suspend_refresh and not self._refresh_suspended:
+                pm.refresh(suspend=False)
+        finally:
+            if self.undo_chunk:
+                pm.undoInfo(closeChunk=True)
+            self._active = False
+            self._history_state = None
+            self._refresh_suspended = None
+            BatchEdit._depth -= 1
+        return False
+
+    def __call__(self, function: Callable) -> Callable:
+        """
+        Decorate a function so every call runs in its own batch
+        @param function:
+        @return:
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with BatchEdit(self.name, self.undo_chunk, self.suspend_refresh, self.construction_history):
+                return function(*args, **kwargs)
+        return wrapper
+
+
 # --------------------------------------------------------------------------------------
 # COMPONENTS
 # --------------------------------------------------------------------------------------
@@ -154,34 +262,60 @@ def set_component_mode(component_type=ComponentType.object):
             pm.warning('Unknown component type')
 
 
-def get_component_indices(components=None):
-    """Gets the components selected in the current component mode"""
-    return [i.index() for i in (
-        pm.ls(components, flatten=True) if components else pm.ls(sl=True,
-                                                                 flatten=True))]
+def get_component_strings(components=None) -> List[str]:
+    """
+    Get compact component strings, e.g. 'mesh.vtx[0:4999]', for components or the current selection
+    @param components:
+    @return:
+    """
+    if not components:
+        return cmds.ls(sl=True) or []
+    components = components if isinstance(components, (list, tuple)) else [components]
+    return cmds.ls([str(x) for x in components]) or []
 
 
-def encode_components(obj, component_list, component_type=ComponentType.face):
-    """Convert a list of component indices into a component selection"""
-    flag_dict = {
-        ComponentType.vertex: 'vtx',
-        ComponentType.edge: 'edge',
-        ComponentType.face: 'f',
-        ComponentType.uv: 'map'
-    }
-    return [f'{obj}.{flag_dict.get(component_type)}[{i}]' for i in component_list]
+def get_component_indices(components=None) -> List[int]:
+    """
+    Gets the indices of components, defaulting to the components selected in the current component mode
+    @param components:
+    @return: sorted indices
+    """
+    return get_component_index_array(components).tolist()
+
+
+def get_component_index_array(components=None) -> np.ndarray:
+    """
+    Array form of get_component_indices for batched callers
+    Indices are decoded from the compact range strings rather than flattened component objects
+    @param components:
+    @return: sorted index array
+    """
+    return decode_component_strings(get_component_strings(components))
+
+
+COMPONENT_FLAGS = {
+    ComponentType.vertex: 'vtx',
+    ComponentType.edge: 'e',
+    ComponentType.face: 'f',
+    ComponentType.uv: 'map'
+}
+
+
+def encode_components(obj, component_list, component_type=ComponentType.face) -> List[str]:
+    """
+    Convert component indices into a minimal component selection of range slices, e.g. ['obj.f[17:5000]']
+    @param obj:
+    @param component_list: indices in any order
+    @param component_type:
+    @return:
+    """
+    return encode_component_strings(str(obj), COMPONENT_FLAGS[component_type], component_list)
 
 
 def select_components(obj, components, component_type=ComponentType.face, hilite=True):
     state = State()
-    if component_type == ComponentType.vertex:
-        pm.select(obj.vtx[components])
-    elif component_type == ComponentType.edge:
-        pm.select(obj.e[components])
-    elif component_type == ComponentType.face:
-        pm.select(obj.f[components])
-    elif component_type == ComponentType.uv:
-        pm.select(obj.map[components])
+    if component_type in COMPONENT_FLAGS:
+        pm.select(encode_components(obj, components, component_type))
     else:
         pm.warning('Component type not supported')
     if hilite:
@@ -190,26 +324,49 @@ def select_components(obj, components, component_type=ComponentType.face, hilite
         state.restore()
 
 
-def get_selected_components(obj, component_type):
-    state = State()
-    pm.select(obj)
-    set_component_mode(component_type)
-    components = pm.ls(sl=True)
-    selection = [] if components == [] else get_component_indices(components)
-    state.restore()
-    return selection
+def get_selected_component_map(component_type=ComponentType.face) -> Dict[pm.nodetypes.Transform, np.ndarray]:
+    """
+    Read the selected components of every object in one pass without changing the selection
+    @param component_type:
+    @return: transform -> sorted component indices
+    """
+    flag = COMPONENT_FLAGS[component_type]
+    component_map = {}
+    for (node, component_flag), indices in decode_components(cmds.ls(sl=True) or []).items():
+        if component_flag == flag:
+            transform = get_transform_from_shape(pm.PyNode(node))
+            existing = component_map.get(transform)
+            component_map[transform] = indices if existing is None else np.union1d(existing, indices)
+    return component_map
+
+
+def get_selected_components(obj, component_type) -> List[int]:
+    return get_selected_component_array(obj, component_type).tolist()
 
 
-def get_selected_vertices(obj):
+def get_selected_component_array(obj, component_type) -> np.ndarray:
+    """
+    Array form of get_selected_components for batched callers
+    @param obj:
+    @param component_type:
+    @return: sorted index array
+    """
+    with State():
+        pm.select(obj)
+        set_component_mode(component_type)
+        return decode_component_strings(cmds.ls(sl=True) or [])
+
+
+def get_selected_vertices(obj) -> List[int]:
     return get_selected_components(obj, ComponentType.vertex)
 
 
-def get_selected_edges(obj):
+def get_selected_edges(obj) -> List[int]:
     # n.b. different code path for edges in Maya 2018
     return get_selected_components(obj, ComponentType.edge)
 
 
-def get_selected_faces(obj):
+def get_selected_faces(obj) -> List[int]:
     return get_selected_components(obj, ComponentType.face)
 
 
@@ -243,11 +400,52 @@ def get_transform_from_shape(node, full_path=False):
         pm.listRelatives(node, fullPath=full_path, parent=True)[0]
 
 
+def get_dag_path(node, shape: bool = False) -> om.MDagPath:
+    """
+    Get an API 2.0 dag path for a node
+    @param node: PyNode or node name
+    @param shape: extend the path to the shape node
+    @return:
+    """
+    selection = om.MSelectionList()
+    selection.add(node.longName() if hasattr(node, 'longName') else str(node))
+    dag_path = selection.getDagPath(0)
+    if shape:
+        dag_path.extendToShape()
+    return dag_path
+
+
+def get_selection_list(nodes: Sequence) -> om.MSelectionList:
+    """
+    Get an API 2.0 selection list holding nodes in order, one entry per node
+    Dag paths are added without merging so a node listed twice keeps a row for each entry
+    @param nodes: PyNodes or node names
+    @return:
+    """
+    selection = om.MSelectionList()
+    for node in nodes:
+        selection.add(get_dag_path(node), False)
+    if selection.length() != len(nodes):
+        raise ValueError(f'Selection list holds {selection.length()} entries for {len(nodes)} nodes')
+    return selection
+
+
+def get_node_uuid(node) -> str:
+    """
+    Get the uuid of a node, stable across renames and reparenting
+    @param node: PyNode, node name or MDagPath
+    @return:
+    """
+    dag_path = node if isinstance(node, om.MDagPath) else get_dag_path(node)
+    return om.MFnDependencyNode(dag_path.node()).uuid().asString()
+
+
 def is_node_type(obj, node_type: MayaNodeType):
     shape = get_shapes_from_transform(obj)
     return node_type == pm.nodeType(shape[0]) if shape else None
 
 
+@BatchEdit('superReset')
 def super_reset(nodes: Optional[List[pm.nodetypes.Transform]] = None):
     """
     Freeze transformations, reset the pivot and delete history
@@ -259,19 +457,223 @@ def super_reset(nodes: Optional[List[pm.nodetypes.Transform]] = None):
     delete_history(nodes)
 
 
+@BatchEdit('freezeTransformations')
 def freeze_transformations(pm_obj=None):
-    for node in list(pm_obj) if pm_obj else pm.ls(sl=True, tr=True):
-        pm.makeIdentity(node, apply=True, translate=True, rotate=True, scale=True)
+    """
+    Freeze translate, rotate and scale
+    All nodes go to a single makeIdentity, which applies to each node and its hierarchy as a per-node loop would
+    @param pm_obj:
+    """
+    nodes = list(pm_obj) if pm_obj else pm.ls(sl=True, tr=True)
+    if nodes:
+        pm.makeIdentity(nodes, apply=True, translate=True, rotate=True, scale=True)
+
+
+def get_translations(nodes: Sequence) -> np.ndarray:
+    """
+    Translate attribute values of transforms, read through the API in one pass
+    @param nodes: PyNodes or long names
+    @return: (n, 3) array
+    """
+    selection = get_selection_list(nodes)
+    translations = []
+    for i in range(selection.length()):
+        translation = om.MFnTransform(selection.getDagPath(i)).translation(om.MSpace.kTransform)
+        translations.append((translation.x, translation.y, translation.z))
+    return np.array(translations, dtype=np.float64).reshape(-1, 3)
+
+
+def get_world_rotate_pivots(nodes: Sequence) -> np.ndarray:
+    """
+    World space rotate pivots of transforms, read through the API in one pass
+    Matches xform(query=True, worldSpace=True, rotatePivot=True)
+    @param nodes: PyNodes or long names
+    @return: (n, 3) array
+    """
+    selection = get_selection_list(nodes)
+    pivots = []
+    for i in range(selection.length()):
+        pivot = om.MFnTransform(selection.getDagPath(i)).rotatePivot(om.MSpace.kWorld)
+        pivots.append((pivot.x, pivot.y, pivot.z))
+    return np.array(pivots, dtype=np.float64).reshape(-1, 3)
+
+
+@dataclass
+class TransformArrays:
+    """Transforms read in one DAG pass, row vector matrices as in core.transform_math"""
+    world_matrices: np.ndarray
+    local_matrices: np.ndarray
+    parent_matrices: np.ndarray
+    translations: np.ndarray
+    world_rotate_pivots: np.ndarray
+    rotate_orders: np.ndarray
+
+    @property
+    def world_translations(self) -> np.ndarray:
+        return self.world_matrices[:, 3, :3]
+
+
+def _matrix_array(matrix: om.MMatrix) -> List[float]:
+    return list(matrix)
+
 
+def get_transform_arrays(nodes: Sequence) -> TransformArrays:
+    """
+    World, local and parent matrices, translates, world rotate pivots and rotate orders of transforms in one pass
+    @param nodes: PyNodes or long names
+    @return:
+    """
+    selection = get_selection_list(nodes)
+    count = selection.length()
+    world, local, parent = (np.empty((count, 16)) for _ in range(3))
+    translations, pivots = np.empty((count, 3)), np.empty((count, 3))
+    rotate_orders = np.empty(count, dtype=np.int64)
+    for i in range(count):
+        dag_path = selection.getDagPath(i)
+        transform_fn = om.MFnTransform(dag_path)
+        world[i] = _matrix_array(dag_path.inclusiveMatrix())
+        parent[i] = _matrix_array(dag_path.exclusiveMatrix())
+        local[i] = _matrix_array(transform_fn.transformation().asMatrix())
+        translation = transform_fn.translation(om.MSpace.kTransform)
+        translations[i] = translation.x, translation.y, translation.z
+        pivot = transform_fn.rotatePivot(om.MSpace.kWorld)
+        pivots[i] = pivot.x, pivot.y, pivot.z
+        rotate_orders[i] = transform_fn.rotationOrder() - om.MTransformationMatrix.kXYZ
+    return TransformArrays(world_matrices=world.reshape(-1, 4, 4), local_matrices=local.reshape(-1, 4, 4),
+                           parent_matrices=parent.reshape(-1, 4, 4), translations=translations,
+                           world_rotate_pivots=pivots, rotate_orders=rotate_orders)
+
+
+def get_world_matrices(nodes: Sequence) -> np.ndarray:
+    """
+    World matrices of transforms, read through the API in one pass
+    @param nodes: PyNodes or long names
+    @return: (n, 4, 4) array
+    """
+    selection = get_selection_list(nodes)
+    return np.array([_matrix_array(selection.getDagPath(i).inclusiveMatrix()) for i in range(selection.length())],
+                    dtype=np.float64).reshape(-1, 4, 4)
 
+
+def get_world_translations(nodes: Sequence) -> np.ndarray:
+    """
+    World space positions of transforms
+    @param nodes: PyNodes or long names
+    @return: (n, 3) array
+    """
+    return get_world_matrices(nodes)[:, 3, :3]
+
+
+def set_translations(nodes: Sequence, translations: np.ndarray, world_space: bool = False):
+    """
+    Set the translate of many transforms
+    World space positions are converted under each parent with the parent matrices read in one pass. The values go
+    through one MDGModifier with the undo queue off, otherwise through an undoable setAttr per node
+    @param nodes: PyNodes or long names
+    @param translations: (n, 3) array
+    @param world_space:
+    """
+    names = [x.longName() if hasattr(x, 'longName') else str(x) for x in nodes]
+    translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+    if world_space:
+        selection = get_selection_list(names)
+        parent_inverse = np.array([_matrix_array(selection.getDagPath(i).exclusiveMatrixInverse())
+                                   for i in range(selection.length())], dtype=np.float64).reshape(-1, 4, 4)
+        translations = local_translations(translations, parent_inverse)
+    _set_translate_plugs(names, translations)
+
+
+def set_matrices(nodes: Sequence, matrices: np.ndarray, world_space: bool = True):
+    """
+    Set the matrices of many transforms, Maya decomposes each into its transform attributes
+    This is one xform per node rather than a batched write: xform decomposes against each node's rotate order and
+    pivots, which a single MFnTransform.setTransformation pass would not honour
+    @param nodes: PyNodes or long names
+    @param matrices: (n, 4, 4) array
+    @param world_space: False to set local matrices
+    """
+    names = [x.longName() if hasattr(x, 'longName') else str(x) for x in nodes]
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 16)
+    for name, matrix in zip(names, matrices.tolist()):
+        cmds.xform(name, worldSpace=world_space, objectSpace=not world_space, matrix=matrix)
+
+
+def _set_translate_plugs(names: Sequence[str], translations: np.ndarray):
+    """
+    Write the translate of many transforms
+    With the undo queue off every value goes through one MDGModifier, which Maya applies in a single doIt. API edits
+    are not recorded for undo, so while the queue is on each node gets an undoable setAttr
+    @param names: long names
+    @param translations: (n, 3) array
+    """
+    translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3).tolist()
+    if cmds.undoInfo(query=True, state=True):
+        for name, translation in zip(names, translations):
+            cmds.setAttr(f'{name}.translate', *translation, type='double3')
+        return
+
+    selection = get_selection_list(names)
+    modifier = om.MDGModifier()
+    for i, translation in enumerate(translations):
+        plug = om.MFnDependencyNode(selection.getDependNode(i)).findPlug('translate', False)
+        for axis, value in enumerate(translation):
+            modifier.newPlugValueDouble(plug.child(axis), value)
+    modifier.doIt()
+
+
+def get_unrelated_mask(long_names: Sequence[str]) -> np.ndarray:
+    """
+    Flag nodes with no ancestor or descendant among the others
+    Edits of unrelated nodes cannot affect each other, so they can be applied in any order or in one batch
+    @param long_names:
+    @return: boolean array
+    """
+    names = set(long_names)
+    related = set()
+    for name in long_names:
+        parts = name.split('|')
+        for depth in range(2, len(parts)):
+            ancestor = '|'.join(parts[:depth])
+            if ancestor in names:
+                related.update((ancestor, name))
+    return np.array([x not in related for x in long_names], dtype=bool)
+
+
+@BatchEdit('resetPivot')
 def reset_pivot(nodes=None):
-    for item in pm.ls(nodes, tr=True) if nodes else pm.ls(sl=True, tr=True):
-        pivot_node = pm.xform(item, query=True, worldSpace=True, rotatePivot=True)
-        pm.xform(item, relative=True, translation=[-i for i in pivot_node])
-        pm.makeIdentity(item, apply=True, translate=True)
-        pm.xform(item, translation=pivot_node)
+    """
+    Move transforms to their rotate pivot, keeping the geometry in place
+    Unrelated nodes are reset together: pivots and translates are read in one API pass, translates are offset and
+    restored with one batched write each and frozen with a single makeIdentity. Nodes nested under other nodes being
+    reset go through the per-node path in order, as each reset moves the hierarchy below it
+    @param nodes:
+    """
+    items = pm.ls(nodes, tr=True) if nodes else pm.ls(sl=True, tr=True)
+    if not items:
+        return
+
+    long_names = [x.longName() for x in items]
+    unrelated = get_unrelated_mask(long_names)
+    bulk = [x for x, keep in zip(long_names, unrelated) if keep]
+    if bulk:
+        pivots = get_world_rotate_pivots(bulk)
+        _set_translate_plugs(bulk, get_translations(bulk) - pivots)
+        cmds.makeIdentity(bulk, apply=True, translate=True)
+        _set_translate_plugs(bulk, pivots)
+
+    for item, keep in zip(items, unrelated):
+        if not keep:
+            _reset_pivot(item)
 
 
+def _reset_pivot(item):
+    pivot_node = pm.xform(item, query=True, worldSpace=True, rotatePivot=True)
+    pm.xform(item, relative=True, translation=[-i for i in pivot_node])
+    pm.makeIdentity(item, apply=True, translate=True)
+    pm.xform(item, translation=pivot_node)
+
+
+@BatchEdit('deleteHistory')
 def delete_history(nodes=None):
     state = State()
     set_component_mode(ComponentType.object)
@@ -279,6 +681,7 @@ def delete_history(nodes=None):
     state.restore()
 
 
+@BatchEdit('duplicateBetween')
 def duplicate_between(count: int) -> List[pm.nodetypes.Transform]:
     """
     Select two objects and this function duplicates a number of objects between the two objects
@@ -287,16 +690,13 @@ def duplicate_between(count: int) -> List[pm.nodetypes.Transform]:
     objects = pm.ls(sl=True, tr=True)
     assert len(objects) == 2, print('select two objects')
     source = objects[0]
-    last_object = objects[1]
-    source_position = pm.getAttr(source.translate)
-    last_position = pm.getAttr(last_object.translate)
-    increment = [(last_position[i] - source_position[i]) / (count + 1) for i in range(3)]
+    source_position, last_position = get_translations(objects)
+    steps = np.arange(1, count + 1)[:, None] / (count + 1)
+    positions = source_position + (last_position - source_position) * steps
 
-    for i in range(count):
-        new_object = pm.duplicate(source)[0]
-        new_position = [source_position[j] + increment[j] * (i + 1) for j in range(3)]
-        pm.setAttr(new_object.translate, new_position, type='float3')
-        objects.append(new_object)
+    new_objects = [pm.duplicate(source)[0] for _ in range(count)]
+    set_translations(new_objects, positions)
+    objects.extend(new_objects)
 
     return objects
 
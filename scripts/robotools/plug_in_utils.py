@@ -9,6 +9,7 @@ from typing import List
 from maya import mel
 from dataclasses import dataclass
 
+from core.lazy_attributes import lazy_attributes
 from robotools.environment_utils import get_environment_variable_paths
 
 PLUG_IN_PATH_STR: str = 'MAYA_PLUG_IN_PATH'
@@ -23,7 +24,8 @@ def get_plug_in_paths(verbose: bool = False) -> List[Path]:
     return get_environment_variable_paths(variable_name=PLUG_IN_PATH_STR, verbose=verbose)
 
 
-PLUG_IN_PATHS: List[Path] = get_plug_in_paths()
+# PLUG_IN_PATHS is resolved on first use rather than at import
+__getattr__ = lazy_attributes(__name__, {'PLUG_IN_PATHS': get_plug_in_paths})
 
 
 def get_loaded_plug_ins(verbose: bool = False):
@@ -1,7 +1,66 @@
 import pymel.core as pm
+import hashlib
+import json
+import logging
 import os
 
-from pymel.core import Path
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DIGEST_SUFFIX: str = '.digest.json'
+Binding = Tuple[str, bool, bool, bool]
+
+
+@dataclass(frozen=True)
+class HotkeyDefinition:
+    """A named command bound to a key, either a mel command or a python script"""
+    name: str
+    annotation: str
+    key: str
+    mel_command: Optional[str] = None
+    python: Optional[str] = None
+    alt: bool = False
+    ctrl: bool = False
+    cmd: bool = False
+
+    @property
+    def command(self) -> str:
+        return self.mel_command if self.mel_command else python_command(self.python)
+
+    @property
+    def binding(self) -> Binding:
+        return self.key, self.alt, self.ctrl, self.cmd
+
+
+def hotkey_digest(definition: HotkeyDefinition) -> str:
+    """
+    Digest of everything that is applied for a hotkey
+    @param definition:
+    @return:
+    """
+    return hashlib.sha1(json.dumps(asdict(definition), sort_keys=True).encode()).hexdigest()
+
+
+def hotkey_table_hash(definitions: Sequence[HotkeyDefinition]) -> str:
+    """
+    Hash of a hotkey table
+    @param definitions:
+    @return:
+    """
+    return hashlib.sha1(''.join(hotkey_digest(x) for x in definitions).encode()).hexdigest()
+
+
+def find_conflicts(definitions: Sequence[HotkeyDefinition]) -> Dict[Binding, List[str]]:
+    """
+    Bindings claimed by more than one hotkey in a table
+    @param definitions:
+    @return: {(key, alt, ctrl, cmd): [names]}
+    """
+    claims = {}
+    for definition in definitions:
+        claims.setdefault(definition.binding, []).append(definition.name)
+    return {binding: names for binding, names in claims.items() if len(names) > 1}
 
 
 def set_hotkey(name, annotation, key, mel_command=None, python=None, alt=False, ctrl=False, cmd=False, overwrite=False):
@@ -76,9 +135,10 @@ class HotkeyManager(object):
     def __init__(self, name, path):
         self.name = name
         self.path = path
+        self.set_existed = pm.hotkeySet(name, exists=True)
 
         # Make a custom key set since Maya's default is locked.
-        if not pm.hotkeySet(name, exists=True):
+        if not self.set_existed:
             pm.hotkeySet(name, source='Maya_Default')
 
         # set the current hotkey set
@@ -98,7 +158,33 @@ class HotkeyManager(object):
 
     @property
     def exists(self):
-        return Path(self.path).exists()
+        return os.path.exists(self.path)
+
+    @property
+    def digest_path(self) -> Path:
+        return Path('{}{}'.format(os.path.splitext(self.path)[0], DIGEST_SUFFIX))
+
+    def read_digest(self) -> dict:
+        """
+        The table hash, per-hotkey digests and bindings stored when the set was last exported
+        @return:
+        """
+        try:
+            return json.loads(self.digest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def write_digest(self, definitions: Sequence[HotkeyDefinition]):
+        """
+        Store the digests of the table alongside the exported set
+        @param definitions:
+        """
+        state = {
+            'hash': hotkey_table_hash(definitions),
+            'digests': {x.name: hotkey_digest(x) for x in definitions},
+            'bindings': {x.name: list(x.binding) for x in definitions},
+        }
+        self.digest_path.write_text(json.dumps(state, indent=1, sort_keys=True))
 
     def import_set(self):
         """
@@ -111,6 +197,44 @@ class HotkeyManager(object):
 
         pm.hotkeySet(edit=True, ip=self.path)
 
+    def apply(self, definitions: Sequence[HotkeyDefinition], force: bool = False) -> List[str]:
+        """
+        Bring the hotkey set in line with a table of definitions
+        Nothing is done if the table matches the digest stored with the exported set, the exported set is imported if
+        Maya does not have it yet, and otherwise only the hotkeys whose digest changed are applied and exported
+        @param definitions:
+        @param force: apply every hotkey regardless of the stored digests
+        @return: names of the hotkeys applied
+        """
+        conflicts = find_conflicts(definitions)
+        for binding, names in conflicts.items():
+            pm.warning('Hotkey {} alt: {} ctrl: {} cmd: {} claimed by {}, keeping {}'.format(
+                *binding, ', '.join(names), names[-1]))
+        kept = {x.binding: x for x in definitions}
+        definitions = [x for x in definitions if kept[x.binding] is x]
+
+        stored = self.read_digest() if self.exists and not force else {}
+        if stored and not self.set_existed:
+            self.import_set()
+        if stored.get('hash') == hotkey_table_hash(definitions):
+            return []
+
+        stored_digests = stored.get('digests', {})
+        changed = [x for x in definitions if stored_digests.get(x.name) != hotkey_digest(x)]
+        stale_bindings = {tuple(x) for x in stored.get('bindings', {}).values()} - set(kept)
+        for key, alt, ctrl, cmd in stale_bindings:
+            pm.hotkey(keyShortcut=key, altModifier=alt, ctrlModifier=ctrl, commandModifier=cmd, name='',
+                      releaseName='')
+
+        for definition in changed:
+            pm.nameCommand(definition.name, annotation=definition.annotation, command=definition.command)
+            pm.hotkey(keyShortcut=definition.key, altModifier=definition.alt, ctrlModifier=definition.ctrl,
+                      commandModifier=definition.cmd, name=definition.name)
+
+        self.export_set()
+        self.write_digest(definitions)
+        return [x.name for x in changed]
+
     @staticmethod
     def set_hotkey(name, annotation, key, mel_command=None, python=None, alt=False, ctrl=False, cmd=False,
                    overwrite=False):
@@ -1,9 +1,14 @@
 import pymel.core as pm
+import hashlib
 import inspect
+import json
 import logging
+import re
 
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from maya import mel
-from typing import List, Optional, Type, Tuple
+from typing import Dict, List, Optional, Sequence, Type, Tuple, Union
 from pathlib import Path
 from PySide2.QtGui import QPalette
 from PySide2.QtWidgets import QFrame
@@ -14,27 +19,119 @@ logging.basicConfig()
 logging.getLogger().setLevel(logging.INFO)
 
 _DEBUG_MODE: bool = False
+SHELF_STATE_OPTION_VAR: str = '{}ShelfState'
+DEFAULT_SEPARATOR_COLOR: Tuple[float, float, float] = (0.9, 0.9, 0.9)
 
 
-class ShelfManager:
-    TOP_LEVEL_SHELF: str = mel.eval('$tmpVar=$gShelfTopLevel')
+@dataclass(frozen=True)
+class ShelfButton:
+    label: str
+    command: str = ''
+    icon: Optional[str] = None
+    overlay_label: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ShelfSeparator:
+    color: Tuple[float, float, float] = DEFAULT_SEPARATOR_COLOR
+
+
+@dataclass(frozen=True)
+class ShelfLabel:
+    text: str
+    bold: bool = False
+
+
+ShelfItem = Union[ShelfButton, ShelfSeparator, ShelfLabel]
+
+
+def shelf_item_digest(item: ShelfItem) -> str:
+    """
+    Content hash of a single shelf item
+    @param item:
+    @return:
+    """
+    data = json.dumps([type(item).__name__, asdict(item)], sort_keys=True, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+def shelf_spec_hash(items: Sequence[ShelfItem], spacing: int = 0) -> str:
+    """
+    Content hash of a whole shelf spec
+    @param items:
+    @param spacing:
+    @return:
+    """
+    digest = hashlib.sha1(str(spacing).encode('utf-8'))
+    for item in items:
+        digest.update(shelf_item_digest(item).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def shelf_control_names(shelf_name: str, items: Sequence[ShelfItem]) -> List[str]:
+    """
+    Stable UI names for the items of a shelf, so a rebuild can find the controls it made last time
+    @param shelf_name:
+    @param items:
+    @return:
+    """
+    names = []
+    counts = {}
+    for item in items:
+        if isinstance(item, ShelfButton):
+            base = f'{shelf_name}_{item.label}'
+        elif isinstance(item, ShelfLabel):
+            base = f'{shelf_name}_label_{item.text}'
+        else:
+            base = f'{shelf_name}_separator'
+        base = re.sub(r'\W+', '_', base).strip('_')
+        counts[base] = counts.get(base, 0) + 1
+        names.append(base if counts[base] == 1 else f'{base}{counts[base]}')
+    return names
+
+
+@lru_cache(maxsize=None)
+def get_top_level_shelf() -> str:
+    """
+    Name of Maya's shelf tab layout, evaluated on first use
+    @return:
+    """
+    return mel.eval('$tmpVar=$gShelfTopLevel')
+
 
+class ShelfManager:
     def __init__(self, name: str, spacing: int = 4):
         self.name = name
         self._spacing = spacing
+        self._label_index: Optional[Dict[str, str]] = None
+
+    @property
+    def TOP_LEVEL_SHELF(self) -> str:
+        return get_top_level_shelf()
 
     @property
     def shelf_names(self) -> List[str]:
         return pm.tabLayout(self.TOP_LEVEL_SHELF, query=True, childArray=True)
 
+    @property
+    def label_index(self) -> Dict[str, str]:
+        """
+        Button control by label, read from the shelf once and maintained as buttons are added and deleted
+        """
+        if self._label_index is None:
+            self._label_index = {}
+            for control in self.buttons:
+                if pm.objectTypeUI(control) == 'shelfButton':
+                    self._label_index[pm.shelfButton(control, query=True, label=True)] = control
+        return self._label_index
+
     @property
     def current_button_labels(self) -> List[str]:
-        return [pm.shelfButton(x, query=True, label=True) for x in self.current_buttons]
+        return list(self.label_index.keys())
 
     @property
     def current_buttons(self) -> List[str]:
-        shelf_contents = pm.shelfLayout(self.name, query=True, childArray=True)
-        return [] if shelf_contents is None else [x for x in shelf_contents if 'shelfButton' in x]
+        return list(self.label_index.values())
 
     @property
     def tab_index(self) -> int or None:
@@ -60,6 +157,7 @@ class ShelfManager:
         """
         if self.name not in self.shelf_names:
             pm.shelfLayout(self.name, parent=self.TOP_LEVEL_SHELF)
+            self._label_index = {}
             self.spacing = self._spacing
             if select:
                 self.select_tab_index()
@@ -70,6 +168,115 @@ class ShelfManager:
         """
         if self.name in self.shelf_names:
             pm.deleteUI(self.name)
+        self._label_index = None
+        if pm.optionVar(exists=self.state_option_var):
+            pm.optionVar(remove=self.state_option_var)
+
+    @property
+    def state_option_var(self) -> str:
+        return SHELF_STATE_OPTION_VAR.format(self.name)
+
+    def _load_build_state(self) -> dict:
+        """
+        Spec hash and per-control digests of the last build, kept in an optionVar
+        @return:
+        """
+        try:
+            state = json.loads(pm.optionVar(query=self.state_option_var) or '{}')
+        except (TypeError, ValueError):
+            state = {}
+        return state if isinstance(state, dict) else {}
+
+    def build(self, items: Sequence[ShelfItem], force: bool = False) -> bool:
+        """
+        Bring the shelf in line with a spec, touching only the controls that differ
+        Nothing is done when the spec hash matches the last build and the controls are still in place
+        @param items:
+        @param force: diff every control even if the hash matches
+        @return: True if the shelf was edited
+        """
+        spec_hash = shelf_spec_hash(items, self._spacing)
+        names = shelf_control_names(self.name, items)
+        exists = self.exists
+        live = self.buttons if exists else []
+        state = self._load_build_state()
+
+        if not force and live == names and state.get('hash') == spec_hash:
+            return False
+
+        if not exists:
+            pm.shelfLayout(self.name, parent=self.TOP_LEVEL_SHELF)
+        if self.spacing != self._spacing:
+            self.spacing = self._spacing
+
+        built = {} if force else dict(state.get('digests', {}))
+        live = self._adopt_controls(items, names, live, built)
+        for control in [x for x in live if x not in names]:
+            pm.deleteUI(control)
+        live = [x for x in live if x in names]
+
+        digests = {}
+        for item, name in zip(items, names):
+            digest = digests[name] = shelf_item_digest(item)
+            if name in live:
+                if built.get(name) == digest:
+                    continue
+                if isinstance(item, ShelfButton) and pm.shelfButton(name, exists=True):
+                    self._edit_button(name, item)
+                    continue
+                pm.deleteUI(name)
+                live.remove(name)
+            self._add_item(item, name)
+            live.append(name)
+
+        for index, name in enumerate(names):
+            if live[index] != name:
+                pm.shelfLayout(self.name, edit=True, position=(name, index + 1))
+                live.remove(name)
+                live.insert(index, name)
+
+        pm.optionVar(stringValue=(self.state_option_var, json.dumps({'hash': spec_hash, 'digests': digests})))
+        self._label_index = {item.label: name for item, name in zip(items, names) if isinstance(item, ShelfButton)}
+        return True
+
+    def _adopt_controls(self, items: Sequence[ShelfItem], names: Sequence[str], live: List[str],
+                        built: dict) -> List[str]:
+        """
+        Rename buttons whose label matches a spec button but whose name does not, e.g. a shelf restored from prefs
+        Adopted buttons are dropped from the built digests so their contents are refreshed
+        @param items:
+        @param names:
+        @param live:
+        @param built: digests of the last build by control name
+        @return: live control names after renaming
+        """
+        wanted = {item.label: name for item, name in zip(items, names)
+                  if isinstance(item, ShelfButton) and name not in live}
+        if not wanted:
+            return live
+        result = []
+        for control in live:
+            if control not in names and pm.shelfButton(control, exists=True):
+                label = pm.shelfButton(control, query=True, label=True)
+                if label in wanted:
+                    control = pm.renameUI(control, wanted.pop(label))
+                    built.pop(control, None)
+            result.append(control)
+        return result
+
+    def _add_item(self, item: ShelfItem, name: str):
+        if isinstance(item, ShelfButton):
+            self.add_shelf_button(label=item.label, icon=item.icon, command=item.command,
+                                  overlay_label=item.overlay_label, overwrite=False, name=name)
+        elif isinstance(item, ShelfLabel):
+            self.add_label(text=item.text, bold=item.bold, name=name)
+        else:
+            self.add_separator(color=item.color, name=name)
+
+    @staticmethod
+    def _edit_button(name: str, item: ShelfButton):
+        pm.shelfButton(name, edit=True, label=item.label, image1=item.icon if item.icon else icon_path('script.png'),
+                       command=item.command, imageOverlayLabel=item.overlay_label or '')
 
     def select_tab_index(self, tab_index: Optional[int] = None):
         """
@@ -90,7 +297,7 @@ class ShelfManager:
         pm.shelfTabLayout(self.TOP_LEVEL_SHELF, edit=True, selectTab=name if name else self.name)
 
     def add_shelf_button(self, label: str, icon: Optional[Path] = None, command: str = '',
-                         overlay_label: Optional[str] = None,  overwrite: bool = True):
+                         overlay_label: Optional[str] = None,  overwrite: bool = True, name: Optional[str] = None):
         """
         Add a button to the current shelf
         :param label: str
@@ -98,23 +305,41 @@ class ShelfManager:
         :param command: str
         :param overlay_label: str
         :param overwrite: bool
+        :param name: optional UI name
         """
-        if label in self.current_button_labels and overwrite:
+        if overwrite and label in self.label_index:
             self.delete_button(label=label)
 
         icon = icon if icon else icon_path('script.png')
-        button = pm.shelfButton(label=label, image1=icon, parent=self.name, command=command,
+        args = [name] if name else []
+        button = pm.shelfButton(*args, label=label, image1=icon, parent=self.name, command=command,
                                 overlayLabelBackColor=(0, 0, 0, 0))
         if overlay_label:
             button.setImageOverlayLabel(overlay_label)
+        if self._label_index is not None:
+            self._label_index[label] = str(button)
+        return button
+
+    def add_shelf_buttons(self, buttons: Sequence[ShelfButton], overwrite: bool = True) -> list:
+        """
+        Add a section of buttons, the label index is read at most once
+        @param buttons:
+        @param overwrite: replace existing buttons with the same label
+        @return:
+        """
+        index = self.label_index
+        return [self.add_shelf_button(label=x.label, icon=x.icon, command=x.command, overlay_label=x.overlay_label,
+                                      overwrite=overwrite and x.label in index) for x in buttons]
 
-    def add_separator(self, color: Tuple[float] = (0.9, 0.9, 0.9)):
+    def add_separator(self, color: Tuple[float] = DEFAULT_SEPARATOR_COLOR, name: Optional[str] = None):
         """
         Add a separator to the current shelf
         @param color: tuple
+        @param name: optional UI name
         """
         pm.setParent(self.name)
-        separator = pm.separator(width=12, height=35, horizontal=False)
+        args = [name] if name else []
+        separator = pm.separator(*args, width=12, height=35, horizontal=False)
         qt_sep: QFrame = pm.windows.toQtObject(separator)
         qt_sep.setFixedWidth(1)
         rgb = [str(int(color[i] * 255)) for i in range(3)]
@@ -122,20 +347,24 @@ class ShelfManager:
         style_string = f'border-width: 1; border-style: solid; border-color: {rgb_string};'
         qt_sep.setStyleSheet(style_string)
 
-    def add_label(self, text: str, bold: bool = False):
+    def add_label(self, text: str, bold: bool = False, name: Optional[str] = None):
         """
         Add a text to the current shelf
+        @param text:
+        @param bold:
+        @param name: optional UI name
         """
         pm.setParent(self.name)
-        pm.text(label=f'<b>{text}</b>' if bold else text, width=len(text) * 7, align='center')
+        args = [name] if name else []
+        pm.text(*args, label=f'<b>{text}</b>' if bold else text, width=len(text) * 7, align='center')
 
     def delete_button(self, label: str):
         """
         Delete a button by label
         :param label:
         """
-        button = next((x for x in self.current_buttons if pm.shelfButton(x, query=True, label=True) == label), None)
-        if button:
+        button = self.label_index.pop(label, None)
+        if button and pm.shelfButton(button, exists=True):
             pm.deleteUI(button)
 
     def delete_buttons(self):
@@ -144,6 +373,7 @@ class ShelfManager:
         """
         for button in self.buttons:
             pm.deleteUI(button)
+        self._label_index = {}
 
     @property
     def buttons(self) -> List[str]:
@@ -151,6 +381,7 @@ class ShelfManager:
         return buttons if buttons is not None else []
 
 
+@lru_cache(maxsize=None)
 def build_shelf_command(function: Type, script: str, imports: Optional[str] = None) -> str:
     """
     Creates a text script incorporating a function, a function call and an optional import header
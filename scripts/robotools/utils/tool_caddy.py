@@ -1,83 +1,196 @@
-import json
+import logging
 import os
-from functools import partial
 
-from PySide2.QtCore import QSettings
-from PySide2.QtWidgets import QComboBox, QLabel, QPushButton, QSizePolicy
+from typing import Dict, List, Optional
+
+from PySide2.QtCore import QAbstractListModel, QModelIndex, QSettings, QSortFilterProxyModel, Qt
+from PySide2.QtWidgets import QComboBox, QLabel, QLineEdit, QListView, QSizePolicy
 
 from robotools import icon_path
-from robotools.widgets.maya_widgets import MayaDockableWidget
+from robotools.widgets.dockable_widget import DockableWidget
+from core.tool_catalogue import ToolCatalogue, ToolEntry, get_tool_catalogue
 from core.widgets.icon_button import IconButton
 from core.widgets.generic_widget import GenericWidget
 
+TOOL_ENTRY_ROLE = Qt.UserRole + 1
+
+
+class ToolListModel(QAbstractListModel):
+    """Every tool of the catalogue, one row each, reset only when the catalogue reloads"""
+
+    def __init__(self, parent=None):
+        super(ToolListModel, self).__init__(parent)
+        self.tools: List[ToolEntry] = []
+
+    def set_tools(self, tools: List[ToolEntry]):
+        self.beginResetModel()
+        self.tools = list(tools)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.tools)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.tools[index.row()]
+        if role == Qt.DisplayRole:
+            return entry.name
+        if role == Qt.ToolTipRole:
+            return entry.tool_tip if entry.code else f'Syntax error: {entry.error}'
+        if role == TOOL_ENTRY_ROLE:
+            return entry
+        return None
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self.tools[index.row()].code is None:
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class ToolFilterProxyModel(QSortFilterProxyModel):
+    """Shows the rows matched by a catalogue search, in match order"""
+
+    def __init__(self, parent=None):
+        super(ToolFilterProxyModel, self).__init__(parent)
+        self.ranks: Dict[int, int] = {}
+
+    def set_matches(self, matches: List[ToolEntry]):
+        """
+        Filter and order rows by a search result
+        @param matches: entries best first
+        """
+        self.ranks = {id(entry): rank for rank, entry in enumerate(matches)}
+        self.invalidate()
+        self.sort(0)
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        return id(self.sourceModel().tools[source_row]) in self.ranks
+
+    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
+        tools = self.sourceModel().tools
+        return self.ranks[id(tools[left.row()])] < self.ranks[id(tools[right.row()])]
 
-class ToolCaddy(MayaDockableWidget):
+
+class ToolCaddy(DockableWidget):
     control_name = 'ToolCaddy'
     window_name = 'Tool Caddy'
     JSON_PATH = os.path.join(os.path.dirname(__file__), 'tool_caddy.json')
     all = 'All'
 
     def __init__(self):
-        super(ToolCaddy, self).__init__(self.control_name, self.window_name)
+        super(ToolCaddy, self).__init__(name=self.control_name)
+        self.setWindowTitle(self.window_name)
         self.settings = QSettings('robotools', 'tool_caddy')
         self.filter = self.settings.value('filter', self.all)
-        button_bar = GenericWidget()
+        button_bar = GenericWidget('Button Bar')
         self.refresh_button = IconButton("Refresh Button", icon_path('refresh.png'), 24)
         button_bar.add_widget(self.refresh_button)
         button_bar.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
         self.combo_box = QComboBox()
-        self.button_widget = GenericWidget()
-        self.script_widget = GenericWidget()
+        self.search_field = QLineEdit()
+        self.search_field.setPlaceholderText('Search')
+        self.search_field.setClearButtonEnabled(True)
+        self.tool_model = ToolListModel(self)
+        self.proxy_model = ToolFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.tool_model)
+        self.tool_view = QListView()
+        self.tool_view.setModel(self.proxy_model)
+        self.tool_view.setUniformItemSizes(True)
+        self.tool_view.setEditTriggers(QListView.NoEditTriggers)
         self.status_bar = QLabel('Ready')
         self.add_widget(button_bar)
         self.add_widget(self.combo_box)
-        self.add_widget(self.script_widget)
+        self.add_widget(self.search_field)
+        self.add_widget(self.tool_view)
         self.add_widget(self.status_bar)
-        self.init_combo_box()
+        self.load_catalogue()
+        self.combo_box.currentIndexChanged.connect(self.combo_box_changed)
+        self.search_field.textChanged.connect(self.search_changed)
+        self.search_field.returnPressed.connect(self.search_return_pressed)
+        self.tool_view.clicked.connect(self.tool_clicked)
         self.refresh_button.clicked.connect(self.refresh_button_clicked)
-        self.refresh_buttons()
         self.setMinimumWidth(320)
 
     @property
-    def tool_data(self):
-        with open(self.JSON_PATH) as f:
-            return json.load(f)
+    def catalogue(self) -> ToolCatalogue:
+        return get_tool_catalogue(self.JSON_PATH)
+
+    @property
+    def tool_data(self) -> dict:
+        return {category: {x.name: {'script': x.script, 'tool_tip': x.tool_tip} for x in self.catalogue.tools(category)}
+                for category in self.catalogue.categories()}
+
+    def load_catalogue(self, force: bool = False):
+        """
+        Reload the catalogue into the model, the view only repaints the visible rows
+        @param force: reload even if the file is unchanged
+        """
+        self.catalogue.refresh(force=force)
+        self.tool_model.set_tools(self.catalogue.tools())
+        self.init_combo_box()
+        self.apply_filter()
+        self.report_errors()
 
     def init_combo_box(self):
+        self.combo_box.blockSignals(True)
         self.combo_box.clear()
-        tool_keys = list(self.tool_data.keys())
-        tool_keys.sort(key=lambda x: x.lower())
-        self.combo_box.addItems([self.all] + tool_keys)
+        self.combo_box.addItems([self.all] + self.catalogue.categories())
         self.combo_box.setCurrentText(self.filter)
-        self.combo_box.currentIndexChanged.connect(self.combo_box_changed)
+        self.combo_box.blockSignals(False)
+
+    def report_errors(self):
+        """
+        Flag tools whose scripts do not compile
+        """
+        errors = self.catalogue.errors()
+        for entry in errors:
+            logging.warning(f'Tool Caddy: {entry.label} does not compile: {entry.error}')
+        if errors:
+            self.status_bar.setText(f'{len(errors)} tool(s) with syntax errors: {", ".join(x.name for x in errors)}')
 
     def refresh_button_clicked(self):
         self.status_bar.setText('Refresh button clicked')
-        self.refresh_buttons()
+        self.load_catalogue(force=True)
 
     def combo_box_changed(self):
         self.filter = self.combo_box.currentText()
         self.status_bar.setText(f'Filter changed to {self.filter}')
         self.settings.setValue('filter', self.filter)
-        self.refresh_buttons()
-
-    def refresh_buttons(self):
-        self.script_widget.clear_layout()
-        if self.filter == self.all:
-            scripts = [x for y in self.tool_data.keys() for x in self.tool_data[y].items()]
-        else:
-            scripts = [x for x in self.tool_data[self.filter].items()]
-        scripts.sort(key=lambda x: x[0].lower())
-        for name, value in scripts:
-            button = QPushButton(name)
-            button.setToolTip(value['tool_tip'])
-            button.clicked.connect(partial(self.execute_script, value['script']))
-            self.script_widget.add_widget(button)
-        self.script_widget.layout().addStretch(1)
+        self.apply_filter()
+
+    def search_changed(self):
+        self.apply_filter()
+
+    def apply_filter(self):
+        """
+        Show the tools matching the category and search text
+        The catalogue is reloaded into the model first if the file has changed on disk
+        """
+        if self.catalogue.refresh():
+            self.load_catalogue()
+            return
+        category = None if self.filter == self.all else self.filter
+        self.proxy_model.set_matches(self.catalogue.search(self.search_field.text(), category=category))
+
+    def search_return_pressed(self):
+        """
+        Run the best match
+        """
+        if self.proxy_model.rowCount():
+            self.tool_clicked(self.proxy_model.index(0, 0))
+
+    def tool_clicked(self, index: QModelIndex):
+        entry: Optional[ToolEntry] = index.data(TOOL_ENTRY_ROLE)
+        if entry is not None and entry.code is not None:
+            self.status_bar.setText(f'Running {entry.name}')
+            self.execute_script(entry)
 
     @staticmethod
-    def execute_script(script):
-        exec(script)
+    def execute_script(entry: ToolEntry):
+        entry.execute()
 
 
 # if __name__ == '__main__':
@@ -1,69 +1,86 @@
 import pymel.core as pm
 
+from PySide2.QtCore import QTimer
 from PySide2.QtWidgets import QLabel, QSizePolicy
-from robotools.widgets.maya_widgets import MayaWidget
+from robotools import maya_vertex_colors, node_utils
+from robotools.widgets.maya_widget import MayaWidget
 from core.widgets.color_picker_button import ColorPickerButton
 from core.widgets.swatch_multi_button import SwatchMultiButton
 from core.widgets.generic_widget import GenericWidget
 from functools import partial
 
+
 class VertexColorTool(MayaWidget):
     _name = 'Vertex Color Tool'
     button_size = 24
+    refresh_delay_ms = 50
 
     def __init__(self):
         super(VertexColorTool, self).__init__(self._name)
         self.swatch_button = ColorPickerButton('Apply Vertex Color', self.button_size,
                                                self.apply_vertex_color_clicked)
         self.add_widget(self.swatch_button)
-        self.add_button('Apply Random Vertex Color',
-                        self.apply_random_vertex_color_clicked)
-        self.add_button('Remove Vertex Color',
-                        self.remove_vertex_color_clicked)
-        self.add_button('Select Faces By Vertex Color',
-                        self.select_by_vertex_color_clicked)
+        self.add_button('Apply Random Vertex Color').clicked.connect(self.apply_random_vertex_color_clicked)
+        self.add_button('Remove Vertex Color').clicked.connect(self.remove_vertex_color_clicked)
+        self.add_button('Select Faces By Vertex Color').clicked.connect(self.select_by_vertex_color_clicked)
         self.selection_label = QLabel()
         self.selection_label.setWordWrap(True)
         self.selection_label.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
         self.add_widget(self.selection_label)
-        self.button_widget = GenericWidget()
+        self.button_widget = GenericWidget('Swatches')
         self.button_widget.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
         self.add_widget(self.button_widget)
         self.setMinimumWidth(328)
+        self.swatches = {}
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.refresh_delay_ms)
+        self.refresh_timer.timeout.connect(self.refresh_ui)
         self.script_job_id = None
-        self.current_nodes = None
+        self.current_nodes = []
         self.enable_script_job()
         self.refresh_ui()
 
     def enable_script_job(self):
-        self.script_job_id = pm.scriptJob(event=['SelectionChanged', self.refresh_ui])
+        self.script_job_id = pm.scriptJob(event=['SelectionChanged', self.schedule_refresh])
 
     def disable_script_job(self):
         pm.scriptJob(kill=self.script_job_id)
 
+    def schedule_refresh(self):
+        """
+        Coalesce bursts of selection events into a single refresh
+        """
+        self.refresh_timer.start()
+
     def refresh_ui(self):
         self.current_nodes = self.current_transforms
-        transform_names = [x.name() for x in self.current_transforms]
+        transform_names = [x.name() for x in self.current_nodes]
         selection = ', '.join(transform_names) if transform_names else 'None'
         self.selection_label.setText(f"Selection: {selection}")
-        self.button_widget.clear_layout()
-        for x in self.parsed_vertex_colors:
-            print(f'Parsed vertex color: {x}, {type(x)}')
-            button = SwatchMultiButton(self.button_size, x)
-            button.add_button('Select', partial(self.select_vertex_color, x))
+        palette = self.vertex_colors
+
+        for color in [x for x in self.swatches if x not in palette]:
+            self.swatches.pop(color).deleteLater()
+        for color in [x for x in palette if x not in self.swatches]:
+            button = SwatchMultiButton(self.button_size, color)
+            button.add_button('Select', partial(self.select_vertex_color, color))
             button.add_button('Remove', self.test_event)
             self.button_widget.add_widget(button)
-        self.button_widget.setVisible(len(self.vertex_colors) > 0)
+            self.swatches[color] = button
+
+        self.button_widget.setVisible(len(self.swatches) > 0)
         self.button_widget.updateGeometry()
         self.resize(self.width(), self.sizeHint().height())
         self.adjustSize()
 
     def apply_vertex_color_clicked(self):
-        ad_vertex_colors.apply_vertex_color([x/255 for x in self.swatch_button.color])
+        maya_vertex_colors.apply_vertex_color([x/255 for x in self.swatch_button.color])
+        self.schedule_refresh()
 
-    @staticmethod
-    def remove_vertex_color_clicked():
-        ad_vertex_colors.remove_vertex_color()
+    def remove_vertex_color_clicked(self):
+        maya_vertex_colors.remove_vertex_color()
+        self.schedule_refresh()
 
     @staticmethod
     def test_event():
@@ -71,42 +88,42 @@ class VertexColorTool(MayaWidget):
 
     @property
     def current_transforms(self):
-        return ad_node.get_transforms()
+        return node_utils.get_transforms()
 
-    @staticmethod
-    def apply_random_vertex_color_clicked():
-        ad_vertex_colors.apply_vertex_color()
+    def apply_random_vertex_color_clicked(self):
+        maya_vertex_colors.apply_vertex_color()
+        self.schedule_refresh()
 
-    @staticmethod
-    def apply_vertex_color(color):
-        ad_vertex_colors.apply_vertex_color(color)
+    def apply_vertex_color(self, color):
+        maya_vertex_colors.apply_vertex_color(color)
+        self.schedule_refresh()
 
     def select_vertex_color(self, color):
         self.disable_script_job()
-        ad_vertex_colors.select_faces_by_vertex_color(color)
+        maya_vertex_colors.select_faces_by_vertex_color(color)
         self.enable_script_job()
 
     def select_by_vertex_color_clicked(self):
         self.disable_script_job()
-        ad_vertex_colors.select_faces_by_selected_vertex_colors()
+        maya_vertex_colors.select_faces_by_selected_vertex_colors()
         self.enable_script_job()
 
     @property
     def vertex_colors(self):
+        """
+        Distinct colors across the current meshes, served from the per-mesh palette cache
+        """
         vertex_colors = []
-        for x in self.current_transforms:
-            vertex_colors.extend(ad_vertex_colors.get_face_vertex_color_dict(x).keys())
-        return list(set(vertex_colors))
+        for x in [node for node in self.current_nodes if node_utils.is_node_type(node, 'mesh')]:
+            vertex_colors.extend(maya_vertex_colors.COLOR_CACHE.palette(x))
+        return list(dict.fromkeys(vertex_colors))
 
     @property
     def parsed_vertex_colors(self):
-        return [self.parse_vertex_color(x) for x in self.vertex_colors]
-
-    @staticmethod
-    def parse_vertex_color(str_color):
-        return [float(x) for x in str_color[1: -1].split(', ')]
+        return [list(x) for x in self.vertex_colors]
 
     def closeEvent(self, event):
+        self.refresh_timer.stop()
         if pm.scriptJob(exists=self.script_job_id):
             pm.scriptJob(kill=self.script_job_id)
         event.accept()
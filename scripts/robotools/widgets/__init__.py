@@ -0,0 +1,10 @@
+from core.lazy_attributes import lazy_attributes
+
+
+def _maya_main_window():
+    from robotools.widgets.maya_widget import get_maya_main_window
+    return get_maya_main_window()
+
+
+# MAYA_MAIN_WINDOW is wrapped on first use so importing widgets does not touch the Maya UI
+__getattr__ = lazy_attributes(__name__, {'MAYA_MAIN_WINDOW': _maya_main_window})
@@ -1,5 +1,6 @@
 import platform
 
+from functools import lru_cache
 from maya import OpenMayaUI
 from PySide2.QtWidgets import QMainWindow
 from PySide2.QtCore import Qt
@@ -7,13 +8,24 @@ from shiboken2 import wrapInstance
 
 from core.widgets.generic_widget import GenericWidget
 from core import DARWIN_STR
+from core.lazy_attributes import lazy_attributes
 
-MAYA_MAIN_WINDOW = wrapInstance(int(OpenMayaUI.MQtUtil.mainWindow()), QMainWindow)
+
+@lru_cache(maxsize=None)
+def get_maya_main_window() -> QMainWindow:
+    """
+    Maya's main window, wrapped on first use
+    @return:
+    """
+    return wrapInstance(int(OpenMayaUI.MQtUtil.mainWindow()), QMainWindow)
+
+
+__getattr__ = lazy_attributes(__name__, {'MAYA_MAIN_WINDOW': get_maya_main_window})
 
 
 class MayaWidget(GenericWidget):
     def __init__(self, name: str, parent=None):
         super(MayaWidget, self).__init__(name=name, parent=parent)
-        self.mayaMainWindow = MAYA_MAIN_WINDOW
+        self.mayaMainWindow = get_maya_main_window()
         self.setWindowFlags(Qt.Window)
         self.setWindowFlags(Qt.Tool if platform.system() == DARWIN_STR else Qt.Window)